@@ -1,23 +1,271 @@
+import atexit
+import os
+import struct
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
-time_now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-logfile = open(f"./logs/log-{time_now}.txt", "w")
+from src.config import load_config
 
-logfile.write(f"Start Simbiosis Simulation v1.0\n"
-              f"Start Time: {time_now}\n\n\n"
-              f"Runtime Logs:\n"
-              f"{'-' * 60}\n")
+# Levels, from least to most important. Only messages at or above the configured level are kept
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
 
+# Categories of messages that come from the simulation itself, which can each be turned on or off in config.yml
+CATEGORIES = ['VISION', 'REACTION', 'CONSUME', 'COLLIDE', 'MUTATION', 'ENTITY']
 
-def log(message: str):
-    print(f"[{datetime.now()}]", message)
-    logfile.write(f"[{datetime.now()}] {message}\n")
+# Every event in the binary event log is one fixed size record:
+# event type, kind of the other entity, tick, entity ID, other ID, and two numbers that depend on the event
+EVENT_TYPES = {category: number for number, category in enumerate(CATEGORIES, start=1)}
+ENTITY_KINDS = {'': 0, 'Creature': 1, 'Food': 2}
+EVENT_RECORD = struct.Struct('<BBxxIqqdd')
+EVENT_HEADER = struct.Struct('<8sII')
+EVENT_MAGIC = b'SIMEVENT'
+EVENT_VERSION = 1
 
-# if __name__ == "__main__":
-#     time_now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-#     logsfile = open(f"./logs/log-{time_now}.txt", "w")
-#
-#     logsfile.write(f"Start Simbiosis Simulation v0.4\n"
-#                   f"Start Time: {time_now}\n\n\n"
-#                   f"Runtime Logs:\n"
-#                   f"{'-' * 60}\n")
+
+class Logger:
+    def __init__(self, path: str, level: int = INFO, categories: dict[str, bool] = None,
+                 buffer_size: int = 100000, echo: bool = False, drain_interval: float = 0.1, header: str = ''):
+        """
+        Logs messages without slowing down the code that logs them.
+        log() only checks if the message is wanted and puts it in a buffer. A background thread takes messages
+        out of the buffer, formats them and writes them to the file, so formatting is only done for messages
+        that are actually written.
+
+        The buffer holds at most buffer_size messages. If the thread can't keep up, the oldest ones are dropped
+        and counted in dropped, instead of using more and more memory.
+        :param path:
+        :param level: The lowest level that is logged
+        :param categories: Whether each category is logged. Categories that aren't given are logged
+        :param buffer_size:
+        :param echo: Also print every message
+        :param drain_interval: How often in seconds the thread empties the buffer
+        :param header: Written at the top of the file
+        """
+        self.level = level
+        self.categories = {category: True for category in CATEGORIES}
+        self.categories.update(categories or {})
+        self.echo = echo
+        self.drain_interval = drain_interval
+
+        self.buffer: deque[tuple] = deque(maxlen=buffer_size)
+        self.dropped = 0
+
+        self.file = open(path, 'w')
+        self.file.write(header)
+        self.lock = threading.Lock()
+        # The thread is woken early when the buffer is half full
+        self.wake = threading.Event()
+        self.wake_size = buffer_size // 2
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name='logs', daemon=True)
+        self.thread.start()
+
+    def enabled(self, category: str = None, level: int = INFO) -> bool:
+        """
+        Checks if a message would be logged. Code that has to do work to make a message can check this first
+        :param category:
+        :param level:
+        :return:
+        """
+        return level >= self.level and (category is None or self.categories.get(category, True))
+
+    def log(self, message: str, *args, category: str = None, level: int = INFO):
+        """
+        Puts a message in the buffer to be written later.
+        The message is only formatted with args (using %) when it is written, so pass values as args
+        instead of formatting them into the message
+        :param message:
+        :param args:
+        :param category:
+        :param level:
+        :return:
+        """
+        if level < self.level or (category is not None and not self.categories.get(category, True)):
+            return
+
+        if len(self.buffer) >= self.wake_size:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.wake.set()
+        self.buffer.append((time.time(), category, message, args))
+
+    def write(self, record: tuple) -> str:
+        timestamp, category, message, args = record
+        if len(args) != 0:
+            message = message % args
+        if category is not None:
+            message = f"[{category}] {message}"
+        return f"[{datetime.fromtimestamp(timestamp)}] {message}"
+
+    def drain(self):
+        """
+        Writes every message in the buffer to the file
+        :return:
+        """
+        with self.lock:
+            lines = []
+            while len(self.buffer) != 0:
+                lines.append(self.write(self.buffer.popleft()))
+
+            if len(lines) != 0:
+                self.file.write('\n'.join(lines) + '\n')
+                self.file.flush()
+                if self.echo:
+                    print('\n'.join(lines))
+
+    def run(self):
+        while not self.stopped:
+            self.wake.wait(self.drain_interval)
+            self.wake.clear()
+            self.drain()
+
+    def close(self):
+        """
+        Stops the thread and writes everything left in the buffer
+        :return:
+        """
+        self.stopped = True
+        self.wake.set()
+        self.thread.join()
+        self.drain()
+        if self.dropped != 0:
+            self.file.write(f"{self.dropped} messages were dropped because the log buffer was full\n")
+        self.file.close()
+
+
+class EventLog:
+    def __init__(self, folder: str, categories: list[str], max_file_size: int = 64 * 1024 * 1024,
+                 max_files: int = 10, buffer_size: int = 64 * 1024):
+        """
+        Keeps a trace of simulation events as fixed size binary records, so nothing has to be formatted
+        while the simulation runs. python -m simbiosis.logdecode turns the files back into text or CSV.
+
+        The records are collected in memory and written buffer_size bytes at a time. Each file holds up to
+        max_file_size bytes, and once there are more than max_files files, the oldest one is deleted.
+        No file is made until the first event is written.
+        :param folder:
+        :param categories: The categories to record
+        :param max_file_size:
+        :param max_files:
+        :param buffer_size:
+        """
+        self.folder = folder
+        self.event_types = {EVENT_TYPES[category] for category in categories}
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.buffer_size = buffer_size
+
+        # The step of the simulation the events happen in, set by World.step
+        self.tick = 0
+
+        self.buffer = bytearray()
+        self.file = None
+        self.file_size = 0
+        self.paths: deque[str] = deque()
+        self.start_time = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+
+    def wants(self, category: str) -> bool:
+        return EVENT_TYPES[category] in self.event_types
+
+    def record(self, event_type: int, entity_id: int, other_id: int = 0, other_kind: int = 0,
+               first: float = 0, second: float = 0):
+        """
+        Adds an event to the log, if its type is being recorded
+        :param event_type: A value from EVENT_TYPES
+        :param entity_id: The entity the event happened to
+        :param other_id: The other entity in the event
+        :param other_kind: A value from ENTITY_KINDS
+        :param first: A number about the event
+        :param second: Another number about the event
+        :return:
+        """
+        if event_type in self.event_types:
+            self.buffer += EVENT_RECORD.pack(event_type, other_kind, self.tick, entity_id, other_id, first, second)
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+
+    def rotate(self):
+        """
+        Starts the next file, and deletes the oldest files past max_files
+        :return:
+        """
+        if self.file is not None:
+            self.file.close()
+
+        path = os.path.join(self.folder, f"events-{self.start_time}-{len(self.paths) + 1:04}.bin")
+        self.file = open(path, 'wb')
+        self.file.write(EVENT_HEADER.pack(EVENT_MAGIC, EVENT_VERSION, EVENT_RECORD.size))
+        self.file_size = EVENT_HEADER.size
+        self.paths.append(path)
+
+        while len(self.paths) > self.max_files:
+            os.remove(self.paths.popleft())
+
+    def flush(self):
+        """
+        Writes the buffered records, only splitting between files at the end of a record
+        :return:
+        """
+        data = bytes(self.buffer)
+        self.buffer.clear()
+
+        while len(data) != 0:
+            if self.file is None or self.file_size + EVENT_RECORD.size > self.max_file_size:
+                self.rotate()
+
+            space = (self.max_file_size - self.file_size) // EVENT_RECORD.size * EVENT_RECORD.size
+            self.file.write(data[:space])
+            self.file_size += len(data[:space])
+            data = data[space:]
+
+    def close(self):
+        if len(self.buffer) != 0:
+            self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def create_logger() -> Logger:
+    config = load_config().get('logging', {})
+    time_now = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+
+    return Logger(f"./logs/log-{time_now}.txt",
+                  level=LEVELS[str(config.get('level', 'INFO')).upper()],
+                  categories=config.get('categories', {}),
+                  buffer_size=config.get('buffer_size', 100000),
+                  echo=config.get('echo', False),
+                  header=f"Start Simbiosis Simulation v1.0\n"
+                         f"Start Time: {time_now}\n\n\n"
+                         f"Runtime Logs:\n"
+                         f"{'-' * 60}\n")
+
+
+def create_event_log() -> EventLog:
+    config = load_config().get('logging', {}).get('events', {})
+    categories = [category for category, enabled in config.get('categories', {}).items() if enabled]
+
+    return EventLog('./logs', categories if config.get('enabled', False) else [],
+                    max_file_size=config.get('max_file_size_mb', 64) * 1024 * 1024,
+                    max_files=config.get('max_files', 10))
+
+
+logger = create_logger()
+atexit.register(logger.close)
+
+events = create_event_log()
+atexit.register(events.close)
+
+
+def log(message: str, *args, category: str = None, level: int = INFO):
+    logger.log(message, *args, category=category, level=level)
+
+
+def log_enabled(category: str = None, level: int = INFO) -> bool:
+    return logger.enabled(category, level)
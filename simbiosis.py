@@ -8,25 +8,19 @@ if not os.path.exists('logs/'):
 if not os.path.exists('saves/'):
     os.mkdir('saves/')
 
+import contextlib
 import json
 
 import pygame
+from src.clock import FixedStepClock
+from src.config import load_config
+from src.graph import LiveGraph
 from src.world import World, Camera
+from src.worker import SimulationWorker
 from src.ui import Button, TextDisplay, SmallContentDisplay, PresetDisplay, SaveSlotDisplay
 
 from datetime import datetime, timedelta
 
-from matplotlib import pyplot, font_manager
-
-creature_image = pygame.image.load('resources/textures/creature3.png')
-food_image = pygame.image.load('resources/textures/food1.png')
-
-pygame.display.set_caption("Simbiosis - Evolution Simulator")
-pygame.display.set_icon(food_image)
-
-clock = pygame.time.Clock()
-
-
 class Simulation:
     def __init__(self):
         pygame.init()
@@ -86,6 +80,19 @@ class Simulation:
         pygame.display.set_caption("Simbiosis - Evolution Simulator")
 
         self.clock = pygame.time.Clock()
+        self.frame_rate = 120
+
+        # The simulation moves in fixed steps, separate from how often the screen is drawn
+        simulation_config = load_config().get('simulation', {})
+        self.simulation_clock = FixedStepClock(1 / simulation_config.get('ticks_per_second', 120),
+                                               simulation_config.get('max_steps_per_frame', 240),
+                                               frame_budget=1 / self.frame_rate)
+        self.seed = simulation_config.get('seed')
+
+        # In threaded mode, the simulation runs on its own thread and the screen draws snapshots of it
+        self.threaded = simulation_config.get('threaded', False)
+        self.render_frame_rate = simulation_config.get('render_fps', 30)
+        self.worker: SimulationWorker | None = None
 
         self.camera = Camera(self.screen)
         self.world: World = World.create(size=0, start_species=0, start_creatures=0, start_food=0,
@@ -111,6 +118,8 @@ class Simulation:
                             {'type': 'increase_count', 'colour': '#F3E5AB', 'label': 'Population Increase'}]
 
         self.current_graph = self.graph_types[0]
+        self.graphs: dict[str, LiveGraph] = {}
+        self.graph_world: World | None = None
 
     def generate_save_slot_displays(self):
         attributes = ['save_display_1', 'save_display_2', 'save_display_3', 'save_display_4']
@@ -127,70 +136,23 @@ class Simulation:
                 self.__setattr__(attr, SaveSlotDisplay(f'Slot {slot_num}',
                                                        f'{formatted_date}\n\n{preset}'))
 
-    def save_game(self):
-        save_dict = {
-            "save_data": {
-                "time": str(datetime.today()),
-                "preset": self.preset
-            },
-            "world": {
-                "size": self.world.size,
-                "largest_radius": self.world.largest_radius,
-                "food_spawn_rate": self.world.food_spawnrate,
-                "tick_speed": self.world.tick_speed,
-                "seconds": self.world.seconds,
-                "delta_seconds": self.world.delta_second,
-                "food_seconds": self.world.food_second,
-                "paused": self.world.paused,
-                "species_id": self.world.species_id
-            },
-            "specimens": {},
-            "creatures": [],
-            "food": [],
-            "data": {'creature_count': self.world.creature_count,
-                     'food_count': self.world.food_count,
-                     'cumulative_increase_count': self.world.cumulative_increase_count,
-                     'increase_count': self.world.increase_count,
-                     'death_count': self.world.cumulative_increase_count,
-                     'time': self.world.time_data}
-        }
-
-        for creature in self.world.creatures:
-            genes = creature.genes
-            save_genes = []
-
-            for gene_name, value in genes.__dict__.items():
-                save_genes.append(value.save_gene(gene_name))
-
-            save_dict['creatures'].append({
-                "id": creature.id,
-                "energy": creature.energy,
-                "direction": creature.direction,
-                "dead": creature.dead,
-                "seeing": creature.seeing,
-                "memory_reaction": creature.memory_reaction,
-                "position": [creature.x, creature.y],
-                "genes": save_genes
-            })
-
-        for food in self.world.food:
-            save_dict['food'].append({
-                "id": food.id,
-                "eaten": food.eaten,
-                "energy": food.energy,
-                "position": [food.x, food.y]
-            })
-
-        for specimen_id, specimen in self.world.specimens.items():
-            save_genes = []
-
-            for gene_name, value in specimen.__dict__.items():
-                save_genes.append(value.save_gene(gene_name))
-
-            save_dict['specimens'][specimen_id] = save_genes
+    def world_lock(self):
+        """
+        Stops the simulation thread from stepping while the world is read, when it is running in threaded mode
+        :return:
+        """
+        return self.worker.lock if self.worker is not None else contextlib.nullcontext()
 
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def save_game(self):
         save_file = open(f'saves/sim{self.save_slot}.json', 'w')
 
+        with self.world_lock():
+            save_dict = self.world.save(self.preset)
         json.dump(save_dict, save_file, indent=4)
         save_file.close()
 
@@ -351,14 +313,13 @@ class Simulation:
         self.preset_4.draw(self.screen, self.screen.get_width() - self.screen.get_width() // 4, 300)
         if self.preset_4.button.check_for_press():
             self.preset = 'random'
-            self.world: World = World.create(size=1500, start_species=10, start_creatures=100, start_food=5000,
-                                             food_spawn_rate=40, creature_image=self.creature_image,
-                                             food_image=self.food_image)
+            self.seed_random()
+            self.world: World = World.from_preset(self.preset, self.creature_image, self.food_image)
             self.current_menu = 'sim_screen'
 
         if os.path.exists(f'presets/{self.preset}.json'):
-            save_dict = json.load(open(f'presets/{self.preset}.json', 'r'))
-            self.world = World.load(save_dict, self.creature_image, self.food_image)
+            self.seed_random()
+            self.world = World.from_preset(self.preset, self.creature_image, self.food_image)
             self.current_menu = 'sim_screen'
 
     def graph_screen(self):
@@ -400,67 +361,37 @@ class Simulation:
         if self.next_graph_button.check_for_press():
             self.paginate_graph(1)
 
-        display_graph = pygame.image.load(f'resources/graphs/{self.current_graph["type"]}.png')
+        display_graph = self.draw_graph()
         position = ((self.screen.get_width() - display_graph.get_width()) // 2,
                     (self.screen.get_height() - display_graph.get_height()) // 2)
         self.screen.blit(display_graph, position)
 
-    def draw_graph(self):
-        graph_type = self.current_graph
-
-        fig = pyplot.figure(figsize=(12, 7))
-        ax: pyplot.Axes = pyplot.subplot()
-        prop = font_manager.FontProperties(fname='resources/pixel_digivolve.otf')
-
-        # Set the precision of points
-        if len(self.world.time_data) > 3600*7:
-            # If interval is 7 hours, one point = 15 minutes
-            precision = 600
-        elif len(self.world.time_data) > 3600*3:
-            # If interval is 3 hours, one point = 1 minute
-            precision = 60
-        elif len(self.world.time_data) > 60*5:
-            # If interval is 5 minutes, one point = 30 seconds
-            precision = 30
-        else:
-            precision = 1
-
-        # Decide on the x-axis labels in seconds, hours or minutes
-        if len(self.world.time_data) > 3600:
-            mapped_time_data_in_minutes = list(map(lambda x: x / 3600, self.world.time_data[0::precision]))
-            mapped_data = self.world.__getattribute__(graph_type['type'])[0::precision]
-
-            ax.set_xlabel("Time (hours)", fontproperties=prop, size=12, color='#caf7b7')
-        elif len(self.world.time_data) > 60:
-            mapped_time_data_in_minutes = list(map(lambda x: x / 60, self.world.time_data[0::precision]))
-            mapped_data = self.world.__getattribute__(graph_type['type'])[0::precision]
-
-            ax.set_xlabel("Time (minutes)", fontproperties=prop, size=12, color='#caf7b7')
-        else:
-            mapped_time_data_in_minutes = list(map(lambda x: x // 1, self.world.time_data[0::precision]))
-            mapped_data = self.world.__getattribute__(graph_type['type'])[0::precision]
-
-            ax.set_xlabel("Time (seconds)", fontproperties=prop, size=12, color='#caf7b7')
-
-        ax.set_ylabel(graph_type['label'], fontproperties=prop, size=12, color='#caf7b7')
-        ax.set_title(f'{graph_type["label"]} over Time', fontproperties=prop, size=30, color='#caf7b7')
-        ax.grid(visible=True, axis='both', color='#272d35', linestyle='dashed')
-        ax.grid(visible=True, axis='x', which='minor', color='#272d35', linestyle='dotted')
-        ax.set_facecolor('#000712')
-        ax.tick_params(axis='both', colors='#caf7b7')
-        ax.margins(0.01)
-        ax.plot(mapped_time_data_in_minutes, mapped_data, graph_type['colour'])
-
-        if min(mapped_data) >= 0:
-            ax.fill_between(mapped_time_data_in_minutes, mapped_data, min(mapped_data),
-                            facecolor=graph_type['colour'], alpha=0.1)
-        else:
-            ax.fill_between(mapped_time_data_in_minutes, mapped_data, 0, facecolor='#FFBF00', alpha=0.1)
-            ax.plot(mapped_time_data_in_minutes, [0 for i in mapped_data], '#D22B2B')
-
-        fig.savefig(f'resources/graphs/{graph_type["type"]}.png', bbox_inches='tight', facecolor="#000712")
-
-        fig.clear()
+    def create_graphs(self):
+        """
+        Makes a new graph for each series, for the current world
+        :return:
+        """
+        width = min(self.screen.get_width() - 300, 1200)
+        height = min(self.screen.get_height() - 250, 700)
+        self.graphs = {graph_type['type']: LiveGraph(width, height, graph_type['colour'], graph_type['label'])
+                       for graph_type in self.graph_types}
+        self.graph_world = self.world
+
+    def draw_graph(self) -> pygame.Surface:
+        """
+        Adds any new data from the world to the current graph, and gives its surface
+        :return:
+        """
+        if self.graph_world is not self.world:
+            self.create_graphs()
+
+        graph_type = self.current_graph['type']
+        graph = self.graphs[graph_type]
+        with self.world_lock():
+            # Only the points added since the last update are read
+            graph.update(self.world.time_data, self.world.__getattribute__(graph_type))
+
+        return graph.draw()
 
     def paginate_graph(self, direction: int):
         if direction == 1:
@@ -470,22 +401,47 @@ class Simulation:
 
         index = self.graph_types.index(self.current_graph) + direction
         self.current_graph = self.graph_types[index if index < len(self.graph_types) else default]
-        self.draw_graph()
 
-    def simulation_screen(self, deltatime):
-        if not self.world.paused:
-            self.world.tick_world(deltatime)
+    def seed_random(self):
+        """
+        Seeds the random numbers before a world is made, if a seed is set in config.yml.
+        The headless runner does the same, so both give the same simulation.
+        :return:
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+        self.simulation_clock.reset()
 
+    def simulation_screen(self, deltatime):
         self.camera.move(deltatime)
-        self.camera.draw_world(self.world, self.debug_screen)
+
+        if self.threaded:
+            if self.worker is None or self.worker.world is not self.world:
+                self.stop_worker()
+                self.worker = SimulationWorker(self.world, self.simulation_clock)
+                self.worker.start()
+
+            snapshot = self.worker.take_snapshot()
+            self.camera.draw_snapshot(snapshot)
+            seconds, creature_count = snapshot.seconds, snapshot.creature_count
+            species_count, food_count = snapshot.species_count, snapshot.food_count
+        else:
+            self.world.debug = self.debug_screen
+            if not self.world.paused:
+                self.simulation_clock.run(self.world.step, deltatime, self.world.tick_speed)
+
+            self.camera.draw_world(self.world, self.debug_screen, self.simulation_clock.alpha,
+                                   self.simulation_clock.timestep)
+            seconds, creature_count = self.world.seconds, len(self.world.creatures)
+            species_count, food_count = len(self.world.species_count), len(self.world.food)
 
         BUTTON_SIZE = 100
 
-        world_time = timedelta(seconds=round(self.world.seconds))
+        world_time = timedelta(seconds=round(seconds))
         self.sim_screen_time_display.draw(self.screen, world_time, 10, 15)
-        self.sim_screen_creature_display.draw(self.screen, len(self.world.creatures), 10, BUTTON_SIZE + 30)
-        self.sim_screen_species_display.draw(self.screen, len(self.world.species_count), 10, BUTTON_SIZE * 2 + 45)
-        self.sim_screen_food_display.draw(self.screen, len(self.world.food), 10, BUTTON_SIZE * 3 + 60)
+        self.sim_screen_creature_display.draw(self.screen, creature_count, 10, BUTTON_SIZE + 30)
+        self.sim_screen_species_display.draw(self.screen, species_count, 10, BUTTON_SIZE * 2 + 45)
+        self.sim_screen_food_display.draw(self.screen, food_count, 10, BUTTON_SIZE * 3 + 60)
 
         self.sim_screen_pause_button.draw(self.screen, 10, self.screen.get_height() - BUTTON_SIZE - 15)
         if self.sim_screen_pause_button.check_for_press():
@@ -498,21 +454,25 @@ class Simulation:
 
         self.sim_screen_tickspeed_button.draw(self.screen, 10, self.screen.get_height() - BUTTON_SIZE * 2 - 30)
         if self.sim_screen_tickspeed_button.check_for_press():
-            if self.world.tick_speed < 10:
-                self.world.change_tick_speed(1)
+            if self.world.tick_speed < self.world.max_tick_speed:
+                self.world.tick_speed = min(self.world.tick_speed * 2, self.world.max_tick_speed)
             else:
                 self.world.tick_speed = 1
-        self.sim_screen_tickspeed_button.change_text(f'x{self.world.tick_speed}')
+
+        if self.simulation_clock.fast:
+            self.sim_screen_tickspeed_button.change_text('max')
+        else:
+            self.sim_screen_tickspeed_button.change_text(f'x{self.world.tick_speed}')
 
         self.sim_screen_graph_button.draw(self.screen, self.screen.get_width() - BUTTON_SIZE * 2 - 20,
                                           self.screen.get_height() - BUTTON_SIZE - 15)
         if self.sim_screen_graph_button.check_for_press():
             self.current_menu = 'graph'
-            self.draw_graph()
 
     def main(self):
         while self.program_running:
-            deltatime = clock.tick(120) / 1000
+            # When the simulation has its own thread, the screen only needs to keep up with the render frame rate
+            deltatime = self.clock.tick(self.render_frame_rate if self.worker is not None else self.frame_rate) / 1000
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -538,7 +498,6 @@ class Simulation:
 
                     elif event.key == pygame.K_g and self.current_menu == 'sim_screen':
                         self.current_menu = 'graph'
-                        self.draw_graph()
 
                     elif event.key == pygame.K_EQUALS and self.current_menu == 'sim_screen':
                         self.world.change_tick_speed(1)
@@ -549,6 +508,10 @@ class Simulation:
                     elif event.key == pygame.K_0 and self.current_menu == 'sim_screen':
                         self.save_game()
 
+                    elif event.key == pygame.K_f and self.current_menu == 'sim_screen':
+                        # Runs as many steps as fit in each frame, instead of keeping to the tick speed
+                        self.simulation_clock.fast = not self.simulation_clock.fast
+
                     elif event.key == pygame.K_RIGHT and self.current_menu == 'graph':
                         self.paginate_graph(1)
 
@@ -580,11 +543,22 @@ class Simulation:
                 case 'quit':
                     self.program_running = False
 
+            # The simulation only runs on the simulation screen, the same as when it isn't threaded
+            if self.current_menu != 'sim_screen':
+                self.stop_worker()
+
             # self.cursor_rect.topleft = pygame.mouse.get_pos()
             # self.screen.blit(self.cursor_image, self.cursor_rect)
 
             pygame.display.flip()
 
+        self.stop_worker()
+
+
+if __name__ == "__main__":
+    # The display is only set up when the game is started, so the simulation can be imported without one
+    pygame.display.set_caption("Simbiosis - Evolution Simulator")
+    pygame.display.set_icon(pygame.image.load('resources/textures/food1.png'))
 
-simulation = Simulation()
-simulation.main()
+    simulation = Simulation()
+    simulation.main()
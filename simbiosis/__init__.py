@@ -0,0 +1,2 @@
+# Tools for running the simulation outside the game window.
+# The game itself is started with: python simbiosis.py
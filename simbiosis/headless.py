@@ -0,0 +1,77 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from logs import logger
+from src.config import load_config
+from src.world import World
+
+# Run from the project root with: python -m simbiosis.headless --preset debug --seconds 3600
+# Nothing here touches the display, so it can run on machines without one.
+
+# The same timestep the game uses, so both give the same results
+TIMESTEP = 1 / load_config().get('simulation', {}).get('ticks_per_second', 120)
+
+
+def run(preset: str, seconds: float, seed: int | None = None, timestep: float = TIMESTEP) -> World:
+    """
+    Creates the world for the preset and ticks it at a fixed timestep, as fast as possible,
+    until the given number of simulated seconds has passed.
+    The same preset, seed and timestep always give the same world.
+    :param preset:
+    :param seconds:
+    :param seed:
+    :param timestep:
+    :return:
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    world = World.from_preset(preset, None, None)
+    world.paused = False
+
+    for step in range(round(seconds / timestep)):
+        world.step(timestep)
+
+    return world
+
+
+def main(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description="Run the Simbiosis simulation without a display.")
+    parser.add_argument('--preset', required=True, help="A preset from the presets folder, or 'random'")
+    parser.add_argument('--seconds', type=float, required=True, help="How many simulated seconds to run for")
+    parser.add_argument('--seed', type=int, default=load_config().get('simulation', {}).get('seed'),
+                        help="Seed for the random number generator")
+    parser.add_argument('--timestep', type=float, default=TIMESTEP, help="Length of each tick in seconds")
+    parser.add_argument('--save', default=None, help="Path to write the world to when the run is finished")
+    parser.add_argument('--verbose', action='store_true', help="Print the runtime logs while running")
+    args = parser.parse_args(arguments)
+
+    # The runtime logs are always written to the log file. Printing is slow, so nothing is printed while running
+    # unless asked
+    logger.echo = args.verbose
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+
+    start = monotonic()
+    with output:
+        world = run(args.preset, args.seconds, args.seed, args.timestep)
+    elapsed = monotonic() - start
+
+    print(f"Simulated {world.seconds:.2f}s of '{args.preset}' in {elapsed:.2f}s")
+    print(f"Creatures: {len(world.creatures)}   Food: {len(world.food)}   Species: {len(world.species_count)}")
+
+    if args.save is not None:
+        with open(args.save, 'w') as save_file:
+            json.dump(world.save(args.preset), save_file, indent=4)
+        print(f"Saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import sys
+from typing import Iterator
+
+from logs import CATEGORIES, ENTITY_KINDS, EVENT_HEADER, EVENT_MAGIC, EVENT_RECORD, EVENT_TYPES
+from src.genes import CreatureGenes
+
+# Run from the project root with: python -m simbiosis.logdecode logs/events-<time>-0001.bin [--csv] [--output file]
+
+CATEGORY_NAMES = {number: category for category, number in EVENT_TYPES.items()}
+KIND_NAMES = {number: kind for kind, number in ENTITY_KINDS.items()}
+CSV_COLUMNS = ['tick', 'event', 'entity_id', 'other_kind', 'other_id', 'first', 'second']
+
+
+def gene_names() -> dict[str, str]:
+    # Mutation events only store the gene's acronym, so the names come from a set of genes
+    genes = CreatureGenes.create(species=0, generation=0)
+    return {gene.acronym: gene.name for gene_name, gene in genes.items()}
+
+
+def gene_acronym(other_id: int) -> str:
+    # Mutation events pack the gene's acronym into the other ID
+    return other_id.to_bytes(8, 'little').rstrip(b'\0').decode()
+
+
+def read_events(path: str) -> Iterator[tuple]:
+    """
+    Reads every record in an event log file
+    :param path:
+    :return: Tuples of (event type, other kind, tick, entity ID, other ID, first, second)
+    """
+    with open(path, 'rb') as event_file:
+        magic, version, record_size = EVENT_HEADER.unpack(event_file.read(EVENT_HEADER.size))
+        if magic != EVENT_MAGIC or record_size != EVENT_RECORD.size:
+            raise ValueError(f"{path} is not an event log made by this version of Simbiosis")
+
+        data = event_file.read()
+
+    # A file that was cut off part way through a record ends at the last whole record
+    whole = len(data) // EVENT_RECORD.size * EVENT_RECORD.size
+    yield from EVENT_RECORD.iter_unpack(data[:whole])
+
+
+def format_event(record: tuple, names: dict[str, str]) -> str:
+    """
+    Turns a record back into the same line the text log would have
+    :param record:
+    :param names: Gene names for each acronym
+    :return:
+    """
+    event_type, other_kind, tick, entity_id, other_id, first, second = record
+    category = CATEGORY_NAMES[event_type]
+    other = f"{KIND_NAMES[other_kind]} {other_id}"
+
+    match category:
+        case 'VISION':
+            message = f"Creature {entity_id} is seeing {other}"
+        case 'REACTION':
+            message = f"Creature {entity_id} is reacting {'Towards' if first == 1 else 'Away'} {other}"
+        case 'CONSUME':
+            message = f"Creature {entity_id} is eating {other}"
+        case 'COLLIDE':
+            message = f"Creature {entity_id} is colliding with {other}"
+        case 'MUTATION':
+            acronym = gene_acronym(other_id)
+            name = names.get(acronym, acronym)
+            change = f"No Change ({second})" if first == second else f"({first} -> {second})"
+            message = f"Creature {entity_id} {name} {change}"
+        case _:
+            message = f"Created Entity {KIND_NAMES[other_kind]} with ID {entity_id}"
+
+    return f"[tick {tick}] [{category}] {message}"
+
+
+def main(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description="Turn Simbiosis event logs into text or CSV.")
+    parser.add_argument('paths', nargs='+', help="Event log files, in order")
+    parser.add_argument('--csv', action='store_true', help="Write CSV instead of text lines")
+    parser.add_argument('--category', action='append', choices=CATEGORIES,
+                        help="Only decode these categories. Can be given more than once")
+    parser.add_argument('--output', default=None, help="File to write to, instead of printing")
+    args = parser.parse_args(arguments)
+
+    wanted = {EVENT_TYPES[category] for category in args.category or CATEGORIES}
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    names = gene_names()
+
+    try:
+        writer = csv.writer(output) if args.csv else None
+        if writer is not None:
+            writer.writerow(CSV_COLUMNS)
+
+        for path in args.paths:
+            for record in read_events(path):
+                if record[0] not in wanted:
+                    continue
+
+                if writer is not None:
+                    event_type, other_kind, tick, entity_id, other_id, first, second = record
+                    if CATEGORY_NAMES[event_type] == 'MUTATION':
+                        # The gene that changed, by name like the text log, instead of its packed acronym
+                        acronym = gene_acronym(other_id)
+                        other_id = names.get(acronym, acronym)
+                    writer.writerow([tick, CATEGORY_NAMES[event_type], entity_id, KIND_NAMES[other_kind],
+                                     other_id, first, second])
+                else:
+                    output.write(format_event(record, names) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
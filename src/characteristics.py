@@ -1,32 +1,34 @@
 from src.entity import Creature
 
 
-def generate_characteristics(check_creature: Creature, creatures_list: list[Creature]):
-    genes = [creature.genes for creature in creatures_list]
-
+def generate_characteristics(check_creature: Creature, summary: dict[str, dict[str, float]]) -> dict[str, str]:
+    """
+    Describes a creature compared to the rest of the population
+    :param check_creature:
+    :param summary: PopulationStatistics.summary() of the population
+    :return:
+    """
     characteristics_dict = {}
     # Speed Characteristic
-    speed_data = [gene.speed.value for gene in genes]
-    speed_data.sort()
-    q1 = speed_data[len(speed_data)//4]
-    q3 = speed_data[3 * len(speed_data)//4]
-
-    if check_creature.genes.speed.value <= q1:
-        characteristics_dict['speed'] = 'Slow'
-    elif check_creature.genes.speed.value >= q3:
-        characteristics_dict['speed'] = 'Fast'
-    else:
-        characteristics_dict['speed'] = 'Average'
+    speed_summary = summary.get('speed')
+    if speed_summary is not None and speed_summary['count'] > 0:
+        if check_creature.genes.speed.value <= speed_summary['q1']:
+            characteristics_dict['speed'] = 'Slow'
+        elif check_creature.genes.speed.value >= speed_summary['q3']:
+            characteristics_dict['speed'] = 'Fast'
+        else:
+            characteristics_dict['speed'] = 'Average'
 
     # Accuracy
-    reaction_speed_data = [gene.react_speed.value / gene.speed.value for gene in genes]
-    reaction_speed_data.sort()
     q1 = 4
     q3 = 100
 
-    if q1 <= check_creature.genes.react_speed.value / check_creature.genes.speed.value <= q3:
-        characteristics_dict['accuracy'] = f'Accurate {check_creature.genes.react_speed.value / check_creature.genes.speed.value}'
+    # A creature that can't move turns infinitely fast for its speed
+    speed = check_creature.genes.speed.value
+    turning = check_creature.genes.react_speed.value / speed if speed != 0 else float('inf')
+    if q1 <= turning <= q3:
+        characteristics_dict['accuracy'] = 'Accurate'
     else:
-        characteristics_dict['accuracy'] = f'Inaccurate {check_creature.genes.react_speed.value / check_creature.genes.speed.value}'
+        characteristics_dict['accuracy'] = 'Inaccurate'
 
-    print(characteristics_dict)
+    return characteristics_dict
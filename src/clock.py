@@ -0,0 +1,80 @@
+from time import monotonic
+from typing import Callable
+
+
+class FixedStepClock:
+    def __init__(self, timestep: float, max_steps_per_frame: int, frame_budget: float = None):
+        """
+        Runs the simulation in steps of the same length, no matter how long each frame takes to draw.
+        Time from every frame is added to an accumulator, and a step is taken every time it holds a whole timestep.
+        What is left over is used to draw the creatures part way between their last two positions (alpha).
+
+        max_steps_per_frame stops the simulation from falling further and further behind when it can't keep up.
+        If more steps are owed than that, the extra time is dropped and the simulation runs slower than real time.
+
+        In fast mode, the clock ignores real time and takes as many steps as fit in the frame budget
+        (the time one frame should take), up to max_steps_per_frame.
+        :param timestep: Length of each step in seconds
+        :param max_steps_per_frame:
+        :param frame_budget: Seconds of stepping allowed per frame in fast mode
+        """
+        self.timestep = timestep
+        self.max_steps_per_frame = max_steps_per_frame
+        self.frame_budget = frame_budget if frame_budget is not None else timestep
+
+        self.accumulator = 0
+        self.fast = False
+        self.steps = 0
+
+    @property
+    def alpha(self) -> float:
+        """
+        How far the simulation is through the next step, from 0 to 1
+        :return:
+        """
+        return self.accumulator / self.timestep
+
+    def reset(self):
+        self.accumulator = 0
+
+    def advance(self, frame_seconds: float, speed: float = 1) -> int:
+        """
+        Adds the time a frame took to the accumulator, and takes out every whole step it holds
+        :param frame_seconds:
+        :param speed: How many simulated seconds pass for every real second
+        :return: How many steps to run
+        """
+        self.accumulator += frame_seconds * speed
+        steps = int(self.accumulator // self.timestep)
+
+        if steps > self.max_steps_per_frame:
+            steps = self.max_steps_per_frame
+            self.accumulator %= self.timestep
+        else:
+            self.accumulator -= steps * self.timestep
+
+        return steps
+
+    def run(self, step: Callable[[float], None], frame_seconds: float, speed: float = 1) -> int:
+        """
+        Runs the steps owed for this frame, or in fast mode, as many steps as fit in the frame budget
+        :param step: Function that runs one step, given the timestep
+        :param frame_seconds:
+        :param speed:
+        :return: How many steps were run
+        """
+        if self.fast:
+            # Nothing is drawn part way between steps in fast mode
+            self.accumulator = 0
+            start = monotonic()
+            steps = 0
+            while steps < self.max_steps_per_frame and (steps == 0 or monotonic() - start < self.frame_budget):
+                step(self.timestep)
+                steps += 1
+        else:
+            steps = self.advance(frame_seconds, speed)
+            for i in range(steps):
+                step(self.timestep)
+
+        self.steps += steps
+        return steps
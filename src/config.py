@@ -0,0 +1,17 @@
+import os
+
+import yaml
+
+
+def load_config(path: str = 'config.yml') -> dict:
+    """
+    Loads the simulation configuration from config.yml.
+    Returns an empty dictionary if the file is missing, so every setting should be read with a default.
+    :param path:
+    :return:
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r') as config_file:
+        return yaml.safe_load(config_file) or {}
@@ -1,10 +1,10 @@
 import math
-import copy
 import random
 
+import numpy as np
 import pygame
 
-from logs import log
+from logs import log, log_enabled, events, EVENT_TYPES, ENTITY_KINDS
 from src.genes import CreatureGenes
 
 
@@ -14,26 +14,44 @@ from src.genes import CreatureGenes
 
 class BaseEntity:
     """
-    Base Entity class to inherit from. Stores the basics such as position, rect and image
+    Base Entity class to inherit from. Stores the basics such as position, rect and image.
+    Entities use __slots__ instead of a __dict__ each, since large worlds have millions of them
     """
-    id = 1
+    __slots__ = ('id', 'x', 'y', 'previous_x', 'previous_y', 'radius', 'image', 'world_bottom_right', 'mouse_down')
+
+    # The ID given to the next entity made
+    next_id = 1
 
     def __init__(self, x_position: float, y_position: float, radius: float, image: pygame.Surface,
                  world_bottomright: tuple[int, int]):
-        self.id = BaseEntity.id
+        self.id = BaseEntity.next_id
         self.x = x_position
         self.y = y_position
+        # Where the entity was before the last step, used to draw it between steps
+        self.previous_x = x_position
+        self.previous_y = y_position
         self.radius = radius
         self.image = image
         self.world_bottom_right = world_bottomright
         self.mouse_down = False
 
-        BaseEntity.id += 1
-        log(f"[ENTITY] Created Entity {type(self).__name__} with ID {self.id}")
+        BaseEntity.next_id += 1
+        log("Created Entity %s with ID %s", type(self).__name__, self.id, category='ENTITY')
+        if events.wants('ENTITY'):
+            events.record(EVENT_TYPES['ENTITY'], self.id, other_kind=ENTITY_KINDS[type(self).__name__])
 
     def get_coordinates(self) -> tuple[float, float]:
         return self.x, self.y
 
+    def interpolated_coordinates(self, alpha: float) -> tuple[float, float]:
+        """
+        Gives the position part way from where the entity was before the last step to where it is now
+        :param alpha: 0 is the previous position, 1 is the current position
+        :return:
+        """
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha)
+
     def get_rect(self) -> pygame.Rect:
         return pygame.Rect(self.x, self.y, self.radius * 2, self.radius * 2)
 
@@ -57,22 +75,26 @@ class BaseEntity:
 
 
 class Creature(BaseEntity):
+    __slots__ = ('genes', 'energy', 'direction', 'food_list', 'reaction', 'visible_entity', 'check_entities',
+                 'all_check_entities', 'vision_entities', 'child', 'seeing', 'memory_reaction', 'dead')
+
     def __init__(self, x_position: float, y_position: float, image: pygame.Surface, world_bottomright: tuple[int, int],
                  genes: CreatureGenes, energy: float, direction: float, food_list: list, seeing: bool,
                  memory_reaction: int, dead: bool, entity_id: int = None):
-        self.id = Creature.id if entity_id is None else entity_id
+        self.id = Creature.next_id if entity_id is None else entity_id
 
         self.genes = genes
         self.energy = energy
         self.direction = direction
         self.food_list = food_list
 
-        # Attributes used for debug
+        # Attributes used for debug. The entity lists are only filled in while debug is on,
+        # and share one empty tuple the rest of the time
         self.reaction = None
         self.visible_entity = None
-        self.check_entities = []
-        self.all_check_entities = []
-        self.vision_entities = []
+        self.check_entities = ()
+        self.all_check_entities = ()
+        self.vision_entities = ()
         self.child = None
 
         # Memory attributes
@@ -153,32 +175,45 @@ class Creature(BaseEntity):
 
         return False
 
-    def vision(self, entity: BaseEntity) -> bool:
-        # Because of how pygame works, angle 0 is facing to the right, and 270 is facing up
-        vector = (entity.x - self.x,
-                  entity.y - self.y)
-        vector_distance = math.sqrt(vector[0] ** 2 + vector[1] ** 2)
-        if vector_distance < self.genes.vision_radius.value:
-            self.check_entities.append(entity)
-
-            # Map the bearing to the range [0, 360] and flip the angle
-            bearing = self.map_angle(-1 * math.degrees(math.atan2(-1 * vector[1], vector[0])))
-
-            left_boundary = self.map_angle(self.direction - self.genes.vision_angle.value // 2)
-            right_boundary = self.map_angle(self.direction + self.genes.vision_angle.value // 2)
-
-            # Checks for the minimum and maximum values, since sometimes the right boundary goes over 360 and
-            # becomes a small value (e.g. 366 becomes 6 degrees)
-
-            if left_boundary < right_boundary and left_boundary <= bearing <= right_boundary:
-                return True
-            elif (left_boundary > right_boundary) and (left_boundary <= bearing <= 360 or 0 <= bearing <= right_boundary):
-                return True
-            else:
-                ...
-                # Check if line segments intersect. Later...
+    @staticmethod
+    def vision_masks(vectors: np.ndarray, facing: np.ndarray, vision_radii: np.ndarray | float,
+                     half_angles: np.ndarray | float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Checks many (creature, entity) pairs at once, without any trigonometry per entity.
+        An entity is in range if it is closer than the vision radius, and visible if the angle between the
+        facing direction and the vector to it is at most half the vision angle. That is the same as
+        the dot product of the two being at least the vector's length times the cosine of the half angle.
+
+        :param vectors: Array of shape (n, 2), from each creature to the entity
+        :param facing: Array of shape (n, 2) or (2,), the unit vector each creature is facing
+        :param vision_radii: Array of shape (n,) or a single number
+        :param half_angles: Half the vision angle in degrees, array of shape (n,) or a single number
+        :return: The in range mask and the visible mask
+        """
+        half_angles = np.asarray(half_angles, dtype=np.float64)
+        distances = np.sqrt(vectors[:, 0] ** 2 + vectors[:, 1] ** 2)
+        dots = vectors[:, 0] * facing[..., 0] + vectors[:, 1] * facing[..., 1]
+
+        in_range = distances < vision_radii
+        # Entities exactly on the edge of the cone count as visible, so the cosine is given a little
+        # room for rounding. A vision angle below 2 degrees has no width, so it can't see anything
+        cosines = np.cos(np.radians(half_angles)) - 1e-9
+        visible = in_range & (dots >= distances * cosines) & (half_angles > 0)
+        return in_range, visible
+
+    def vision_mask(self, positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Checks which of the positions the creature can see, all in one go.
+        Because of how pygame works, angle 0 is facing to the right, and 270 is facing up
+        :param positions: Array of shape (n, 2)
+        :return: The in range mask and the visible mask
+        """
+        vectors = np.asarray(positions, dtype=np.float64).reshape(-1, 2) - (self.x, self.y)
+        facing = np.array([math.cos(self.direction_radians()), math.sin(self.direction_radians())])
+        return self.vision_masks(vectors, facing, self.genes.vision_radius.value, self.genes.vision_angle.value // 2)
 
-        return False
+    def vision(self, entity: BaseEntity) -> bool:
+        return bool(self.vision_mask(np.array([entity.get_coordinates()]))[1][0])
 
     def react(self, entity: BaseEntity, deltatime):
         towards = 1
@@ -215,21 +250,18 @@ class Creature(BaseEntity):
 
         self.energy -= self.genes.turning_energy.value * self.genes.react_speed.value * deltatime
 
-        log(f"[REACTION] Creature {self.id} is reacting {'Towards' if reaction == 1 else 'Away'} {type(entity).__name__} {entity.id}")
+        log("Creature %s is reacting %s %s %s", self.id, 'Towards' if reaction == 1 else 'Away', type(entity).__name__,
+            entity.id, category='REACTION')
+        if events.wants('REACTION'):
+            events.record(EVENT_TYPES['REACTION'], self.id, entity.id, ENTITY_KINDS[type(entity).__name__], reaction)
 
     def birth(self, parent=None):
         if self.energy > self.genes.birth_energy.value:
             self.energy -= self.genes.birth_energy.value
 
-            child_genes = copy.deepcopy(self.genes)
-            if parent is None:
-                for gene, gene_object in vars(child_genes).items():
-                    gene_object.mutate()
-            else:
-                parent_genes = vars(parent.genes)
-                for gene, gene_object in vars(child_genes).items():
-                    gene_object.value = (gene_object.value + parent_genes[gene].value) // 2
-                    gene_object.mutate()
+            # The child is made straight after its genes, so it will be given the next ID
+            child_genes = self.genes.child(parent.genes if parent is not None else None,
+                                           entity_id=BaseEntity.next_id)
 
             new_coords = [self.x + random.uniform(self.radius * 4, self.radius * 8) * random.choice([1, -1]),
                           self.y + random.uniform(self.radius * 4, self.radius * 8) * random.choice([1, -1])]
@@ -240,59 +272,96 @@ class Creature(BaseEntity):
             if not self.child.within_border():
                 self.child.dead = True
 
-    def tick(self, deltatime: float, range_search_box: list[BaseEntity]):
+    def sense(self, deltatime: float, range_search_box: list[BaseEntity],
+              vision_masks: tuple[np.ndarray, np.ndarray] = None, debug: bool = False):
+        """
+        Looks at the entities around the creature, and reacts to one of the ones it can see
+        :param deltatime:
+        :param range_search_box:
+        :param vision_masks: The in range and visible masks for range_search_box, if they were already worked out
+        :param debug: Whether to keep the entities that were checked and seen, for the debug lines
+        :return:
+        """
+        if vision_masks is None:
+            vision_masks = self.vision_mask(np.array([entity.get_coordinates() for entity in range_search_box]))
+        in_range, visible = vision_masks
+
+        vision_entities = [range_search_box[index] for index in visible.nonzero()[0].tolist()]
+        if debug:
+            self.all_check_entities = range_search_box
+            self.check_entities = [range_search_box[index] for index in in_range.nonzero()[0].tolist()]
+            self.vision_entities = vision_entities
+        elif self.all_check_entities:
+            self.all_check_entities, self.check_entities, self.vision_entities = (), (), ()
+
+        if log_enabled('VISION'):
+            for entity in vision_entities:
+                log("Creature %s is seeing %s %s", self.id, type(entity).__name__, entity.id, category='VISION')
+        if events.wants('VISION'):
+            for entity in vision_entities:
+                events.record(EVENT_TYPES['VISION'], self.id, entity.id, ENTITY_KINDS[type(entity).__name__])
+
+        chosen_entity = random.choice(vision_entities) if len(vision_entities) != 0 else None
+        if chosen_entity:
+            self.visible_entity = chosen_entity
+            self.react(chosen_entity, deltatime)
+            self.seeing = True
+        else:
+            self.seeing = False
+
+    def collide(self, range_search_box: list[BaseEntity]):
+        """
+        Eats the food and meets the creatures the creature is touching
+        :param range_search_box:
+        :return:
+        """
+        for entity in range_search_box:
+            if self.collision(entity) and isinstance(entity, Food) and not entity.eaten:
+                log("Creature %s is eating %s %s", self.id, type(entity).__name__, entity.id, category='CONSUME')
+                entity.eaten = True
+                self.energy += entity.energy * self.genes.plant_energy.value
+                if events.wants('CONSUME'):
+                    events.record(EVENT_TYPES['CONSUME'], self.id, entity.id, ENTITY_KINDS['Food'],
+                                  entity.energy * self.genes.plant_energy.value)
+                self.food_list.append(entity)
+                if random.randint(1, 200) == 1:
+                    self.birth()
+
+            elif self.collision(entity) and isinstance(entity, Creature):
+                log("Creature %s is colliding with %s %s", self.id, type(entity).__name__, entity.id, category='COLLIDE')
+                if events.wants('COLLIDE'):
+                    events.record(EVENT_TYPES['COLLIDE'], self.id, entity.id, ENTITY_KINDS['Creature'])
+                self.birth(entity)
+                angle = random.randint(90, 180)
+                self.direction += angle
+                self.energy -= self.genes.turning_energy.value * angle
+
+    def tick(self, deltatime: float, range_search_box: list[BaseEntity],
+             vision_masks: tuple[np.ndarray, np.ndarray] = None, debug: bool = False):
         """
         Runs all the processes of the creature, movement, vision, collision
         :param range_search_box:
         :param deltatime:
+        :param vision_masks: The in range and visible masks for range_search_box, if they were already worked out
+        :param debug: Whether to keep the entities that were checked and seen, for the debug lines
         :return:
         """
         self.food_list = []
+        self.previous_x, self.previous_y = self.x, self.y
 
         if not self.dead:
             self.energy -= self.genes.base_energy.value * deltatime
-
-            self.check_entities = []
-            self.all_check_entities = []
-            self.vision_entities = []
-
-            for entity in range_search_box:
-                self.all_check_entities.append(entity)
-                if self.vision(entity):
-                    log(f"[VISION] Creature {self.id} is seeing {type(entity).__name__} {entity.id}")
-                    self.vision_entities.append(entity)
-
-            chosen_entity = random.choice(self.vision_entities) if len(self.vision_entities) != 0 else None
-            if chosen_entity:
-                self.visible_entity = chosen_entity
-                self.react(chosen_entity, deltatime)
-                self.seeing = True
-            else:
-                self.seeing = False
-
+            self.sense(deltatime, range_search_box, vision_masks, debug)
             self.move(deltatime)
-
-            for entity in range_search_box:
-                if self.collision(entity) and isinstance(entity, Food) and not entity.eaten:
-                    log(f"[CONSUME] Creature {self.id} is eating {type(entity).__name__} {entity.id}")
-                    entity.eaten = True
-                    self.energy += entity.energy * self.genes.plant_energy.value
-                    self.food_list.append(entity)
-                    if random.randint(1, 200) == 1:
-                        self.birth()
-
-                elif self.collision(entity) and isinstance(entity, Creature):
-                    log(f"[COLLIDE] Creature {self.id} is colliding with {type(entity).__name__} {entity.id}")
-                    self.birth(entity)
-                    angle = random.randint(90, 180)
-                    self.direction += angle
-                    self.energy -= self.genes.turning_energy.value * angle
+            self.collide(range_search_box)
 
         if self.energy <= 0:
             self.dead = True
 
 
 class Food(BaseEntity):
+    __slots__ = ('energy', 'eaten')
+
     def __init__(self, x_position: float, y_position: float, image: pygame.Surface, world_bottomright: tuple[int, int],
                  energy: float, eaten: bool = False):
         super().__init__(x_position, y_position, 0.5, image, world_bottomright)
@@ -1,37 +1,127 @@
 import random
-from logs import log
+from array import array
+
+import numpy as np
+
+from logs import log, log_enabled, events, EVENT_TYPES
+
+# The largest value of a gene that doesn't set its own
+DEFAULT_MAX = 9999999999999999
+
+
+class GeneSchema:
+    # Schemas are shared by every genome with the same genes, so each one is only made once
+    schemas: dict[tuple, 'GeneSchema'] = {}
+
+    def __init__(self, genes: tuple[tuple, ...]):
+        """
+        Everything about a set of genes apart from their values: the order they are stored in, and each
+        gene's name, acronym, limits and type. It never changes once it is made.
+        :param genes: (attr, name, acronym, can_mutate, min, max, is_integer) for each gene, in order
+        """
+        self.genes = genes
+        self.attrs = tuple(gene[0] for gene in genes)
+        self.names = tuple(gene[1] for gene in genes)
+        self.acronyms = tuple(gene[2].upper() for gene in genes)
+        self.can_mutate = tuple(gene[3] for gene in genes)
+        self.mins = tuple(gene[4] for gene in genes)
+        self.maxs = tuple(gene[5] for gene in genes)
+        self.is_integer = tuple(gene[6] for gene in genes)
+        self.indexes = {attr: index for index, attr in enumerate(self.attrs)}
+
+        # Genes that are always whole numbers, which are given back as ints
+        self.whole = tuple(is_integer or not can_mutate for is_integer, can_mutate in zip(self.is_integer,
+                                                                                          self.can_mutate))
+
+        # The same details as arrays, for mutating every gene at once
+        self.mutable_mask = np.array(self.can_mutate, dtype=bool)
+        self.integer_mask = np.array(self.is_integer, dtype=bool)
+        self.min_values = np.array(self.mins, dtype=np.float64)
+        self.max_values = np.array(self.maxs, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.attrs)
+
+    @classmethod
+    def get(cls, genes: tuple[tuple, ...]) -> 'GeneSchema':
+        schema = cls.schemas.get(genes)
+        if schema is None:
+            schema = cls(genes)
+            cls.schemas[genes] = schema
+        return schema
+
+
+def log_mutation(entity_id: int, name: str, acronym: str, old_value: float, value: float):
+    if old_value == value:
+        log("Creature %s %s No Change (%s)", entity_id, name, value, category='MUTATION')
+    else:
+        log("Creature %s %s (%s -> %s)", entity_id, name, old_value, value, category='MUTATION')
+    # The gene is stored as its acronym, packed into the other ID
+    events.record(EVENT_TYPES['MUTATION'], entity_id, int.from_bytes(acronym.encode(), 'little'),
+                  first=old_value, second=value)
 
 
 class Gene:
-    def __init__(self, name: str, acronym: str, value: float, can_mutate: bool = True,
-                 min_value: float = 0, max_value: float = 9999999999999999, integer: bool = False):
-        self.name = name
-        self.acronym = acronym.upper()
-        self.value = value
-        self.can_mutate = can_mutate
-        self.min = min_value
-        self.max = max_value
-        self.is_type_integer = integer
-
-    def mutate(self, probability: float = 0.2, factor: float = 1):
+    __slots__ = ('schema', 'values', 'index', 'whole')
+
+    def __init__(self, schema: GeneSchema, values: array, index: int):
+        """
+        One gene of a genome. The value is kept in the genome's array, and everything else in its schema,
+        so a Gene only points at where they are
+        :param schema:
+        :param values:
+        :param index:
+        """
+        self.schema = schema
+        self.values = values
+        self.index = index
+        self.whole = schema.whole[index]
+
+    @property
+    def value(self) -> float:
+        value = self.values[self.index]
+        return int(value) if self.whole else value
+
+    @value.setter
+    def value(self, value: float):
+        self.values[self.index] = value
+
+    @property
+    def name(self) -> str:
+        return self.schema.names[self.index]
+
+    @property
+    def acronym(self) -> str:
+        return self.schema.acronyms[self.index]
+
+    @property
+    def can_mutate(self) -> bool:
+        return self.schema.can_mutate[self.index]
+
+    @property
+    def min(self) -> float:
+        return self.schema.mins[self.index]
+
+    @property
+    def max(self) -> float:
+        return self.schema.maxs[self.index]
+
+    @property
+    def is_type_integer(self) -> bool:
+        return self.schema.is_integer[self.index]
+
+    def mutate(self, probability: float = 0.2, factor: float = 1, entity_id: int = 0):
         if self.can_mutate:
             old_value = self.value
 
-            if random.choices(population=["mutate", "no mutate"], weights=[probability, 1 - probability])[0] == "mutate":
+            if random.random() < probability:
                 if self.is_type_integer:
                     self.value += round(random.uniform(-0.5 * factor, 0.5 * factor))
                 else:
                     self.value += random.uniform(-0.05 * factor, 0.05 * factor)
 
-            if self.value <= self.min:
-                self.value = self.min
-            if self.value >= self.max:
-                self.value = self.max
-
-            if old_value == self.value:
-                log(f"[MUTATION] {self.name} No Change ({self.value})")
-            else:
-                log(f"[MUTATION] {self.name} ({old_value} -> {self.value})")
+            self.value = min(max(self.value, self.min), self.max)
+            log_mutation(entity_id, self.name, self.acronym, old_value, self.value)
 
     def save_gene(self, variable_name: str) -> dict:
         return {'attr': variable_name,
@@ -79,72 +169,154 @@ class CreatureGenes:
     species: Gene
     generation: Gene
 
-    def __init__(self, genes_list: list[dict]):
+    # A slot for each gene above, which stays empty until the gene is first read (see __getattr__)
+    __slots__ = ('schema', 'values', *__annotations__)
+
+    def __init__(self, schema: GeneSchema, values: array):
         """
-        Iterates over the gene_list given. This is a list of dictionaries, which is present in the save files.
-        :param genes_list:
+        A genome is a schema, shared with every creature that has the same genes, and an array with one
+        value for each gene in the schema's order. Each gene can be read as an attribute, like genes.speed.value,
+        which points into the array.
+        :param schema:
+        :param values: array('d') of the gene values
         """
-        for gene in genes_list:
-            self.__setattr__(gene['attr'],
-                             Gene(gene['name'], gene['acronym'], gene['value'], gene['can_mutate'], gene['min'], gene['max'],
-                                  gene['is_integer']))
+        self.schema = schema
+        self.values = values
+
+    def __getattr__(self, attr: str) -> Gene:
+        """
+        Only called when a gene's slot is empty, so each Gene is made the first time it is read and kept
+        from then on. Genes the schema has but CreatureGenes doesn't list (like ones from a newer save)
+        have no slot, so they are made every time
+        :param attr:
+        :return:
+        """
+        index = self.schema.indexes.get(attr) if attr not in ('schema', 'values') else None
+        if index is None:
+            raise AttributeError(f"'CreatureGenes' object has no gene '{attr}'")
+
+        gene = Gene(self.schema, self.values, index)
+        if attr in self.__annotations__:
+            self.__setattr__(attr, gene)
+        return gene
+
+    def items(self) -> list[tuple[str, Gene]]:
+        """
+        Every gene with its attribute name, in order
+        :return:
+        """
+        return [(attr, getattr(self, attr)) for attr in self.schema.attrs]
+
+    def save(self) -> list[dict]:
+        """
+        The genes in the form they have in save files
+        :return:
+        """
+        return [gene.save_gene(attr) for attr, gene in self.items()]
 
     @classmethod
     def load(cls, genes_list: list[dict]):
-        return cls(genes_list)
+        """
+        Creates the genes from the list of dictionaries in a save file
+        :param genes_list:
+        :return:
+        """
+        schema = GeneSchema.get(tuple((gene['attr'], gene['name'], gene['acronym'], gene['can_mutate'], gene['min'],
+                                       gene['max'], gene['is_integer']) for gene in genes_list))
+        return cls(schema, array('d', [gene['value'] for gene in genes_list]))
 
     @classmethod
     def create(cls, species: int, generation: int):
-        genes_object = cls([])
-
-        # Genes affecting Creature Appearance (Phenotype)
-        genes_object.colour_red = Gene(name="Red Colour", acronym="CLR", value=random.randint(0, 255),
-                                       min_value=0, max_value=255, integer=True)
-        genes_object.colour_green = Gene(name="Green Colour", acronym="CLG", value=random.randint(0, 255),
-                                         min_value=0, max_value=255, integer=True)
-        genes_object.colour_blue = Gene(name="Blue Colour", acronym="CLB", value=random.randint(0, 255),
-                                        min_value=0, max_value=255, integer=True)
-        genes_object.radius = Gene(name="Creature Radius Size", acronym="SIZ", value=random.uniform(0.5, 7),
-                                   min_value=0.5)
-
-        # Genes affecting Creature movement
-        genes_object.speed = Gene(name="Speed", acronym="SPD", value=random.uniform(0, 50),
-                                  min_value=0)
-
-        # Genes affecting the Creature's Energy Consumption
-        genes_object.base_energy = Gene(name="Energy Consumed per Second", acronym="ENB", value=random.uniform(1, 100),
-                                        min_value=1)
-        genes_object.movement_energy = Gene(name="Energy Consumed for Movement", acronym="ENM", value=random.uniform(5, 100),
-                                            min_value=1)
-        genes_object.turning_energy = Gene(name="Energy Consumed for Turning", acronym="ENT", value=random.uniform(5, 100),
-                                           min_value=1)
-        genes_object.birth_energy = Gene(name="Energy Consumed for Birthing", acronym="ENI",
-                                         value=random.uniform(genes_object.movement_energy.value * 600,
-                                                              genes_object.movement_energy.value * 6000),
-                                         min_value=1)
-        genes_object.plant_energy = Gene(name="% of Energy Gained From Eating", acronym="ENP", value=random.uniform(0.5, 1),
-                                         min_value=0, max_value=1)
-
-        # Genes affecting Creature Behaviour
-        genes_object.vision_radius = Gene(name="Vision Radius", acronym="VIR",
-                                          value=random.uniform(genes_object.radius.value, genes_object.radius.value + 10))
-        genes_object.vision_angle = Gene(name="Vision Angle", acronym="VIA", value=random.randint(1, 180),
-                                         min_value=1, max_value=300)
-        genes_object.react_towards = Gene(name="Reaction Towards Entity", acronym="RTO", value=random.random(),
-                                          min_value=0, max_value=1)
-        genes_object.react_speed = Gene(name="Reaction Speed", acronym="RSP", value=random.uniform(30, 360),
-                                        min_value=0)
-
-        # Genes which offset the RTO based on what the creature is seeing
-        genes_object.food_offset = Gene(name="Reaction Food Offset", acronym="RFO", value=random.uniform(-0.5, 0.5),
-                                        min_value=-0.5, max_value=0.5)
-        genes_object.stranger_offset = Gene(name="Reaction Stranger Offset", acronym="RSO", value=random.uniform(-0.5, 0.5),
-                                            min_value=-0.5, max_value=0.5)
-        genes_object.known_offset = Gene(name="Reaction Known Offset", acronym="RKO", value=random.uniform(-0.5, 0.5),
-                                         min_value=-0.5, max_value=0.5)
-
-        # Data Genes (No mutation, affects Data)
-        genes_object.species = Gene(name="Species", acronym="SPE", value=species, can_mutate=False)
-        genes_object.generation = Gene(name="Generation", acronym="GEN", value=generation, can_mutate=False)
-
-        return genes_object
+        radius = random.uniform(0.5, 7)
+        movement_energy = random.uniform(5, 100)
+        genes = [
+            # Genes affecting Creature Appearance (Phenotype)
+            ('colour_red', "Red Colour", "CLR", random.randint(0, 255), True, 0, 255, True),
+            ('colour_green', "Green Colour", "CLG", random.randint(0, 255), True, 0, 255, True),
+            ('colour_blue', "Blue Colour", "CLB", random.randint(0, 255), True, 0, 255, True),
+            ('radius', "Creature Radius Size", "SIZ", radius, True, 0.5, DEFAULT_MAX, False),
+
+            # Genes affecting Creature movement
+            ('speed', "Speed", "SPD", random.uniform(0, 50), True, 0, DEFAULT_MAX, False),
+
+            # Genes affecting the Creature's Energy Consumption
+            ('base_energy', "Energy Consumed per Second", "ENB", random.uniform(1, 100), True, 1, DEFAULT_MAX, False),
+            ('movement_energy', "Energy Consumed for Movement", "ENM", movement_energy, True, 1, DEFAULT_MAX, False),
+            ('turning_energy', "Energy Consumed for Turning", "ENT", random.uniform(5, 100), True, 1, DEFAULT_MAX,
+             False),
+            ('birth_energy', "Energy Consumed for Birthing", "ENI",
+             random.uniform(movement_energy * 600, movement_energy * 6000), True, 1, DEFAULT_MAX, False),
+            ('plant_energy', "% of Energy Gained From Eating", "ENP", random.uniform(0.5, 1), True, 0, 1, False),
+
+            # Genes affecting Creature Behaviour
+            ('vision_radius', "Vision Radius", "VIR", random.uniform(radius, radius + 10), True, 0, DEFAULT_MAX, False),
+            ('vision_angle', "Vision Angle", "VIA", random.randint(1, 180), True, 1, 300, False),
+            ('react_towards', "Reaction Towards Entity", "RTO", random.random(), True, 0, 1, False),
+            ('react_speed', "Reaction Speed", "RSP", random.uniform(30, 360), True, 0, DEFAULT_MAX, False),
+
+            # Genes which offset the RTO based on what the creature is seeing
+            ('food_offset', "Reaction Food Offset", "RFO", random.uniform(-0.5, 0.5), True, -0.5, 0.5, False),
+            ('stranger_offset', "Reaction Stranger Offset", "RSO", random.uniform(-0.5, 0.5), True, -0.5, 0.5, False),
+            ('known_offset', "Reaction Known Offset", "RKO", random.uniform(-0.5, 0.5), True, -0.5, 0.5, False),
+
+            # Data Genes (No mutation, affects Data)
+            ('species', "Species", "SPE", species, False, 0, DEFAULT_MAX, False),
+            ('generation', "Generation", "GEN", generation, False, 0, DEFAULT_MAX, False),
+        ]
+
+        schema = GeneSchema.get(tuple((attr, name, acronym, can_mutate, min_value, max_value, integer)
+                                      for attr, name, acronym, value, can_mutate, min_value, max_value, integer
+                                      in genes))
+        return cls(schema, array('d', [gene[3] for gene in genes]))
+
+    def child(self, other: 'CreatureGenes' = None, probability: float = 0.2, factor: float = 1,
+              entity_id: int = 0) -> 'CreatureGenes':
+        """
+        Makes the genes of a child: a copy of these genes, or the average of these and the other parent's
+        (rounded down, the same as before), with every gene mutated at once
+        :param other: The other parent's genes, if there is one
+        :param probability: Chance of each gene mutating
+        :param factor:
+        :param entity_id: ID of the child, for the mutation logs
+        :return:
+        """
+        values = array('d', self.values)
+        if other is not None:
+            other_values = np.frombuffer(other.values)
+            if other.schema is not self.schema:
+                # The other parent's genes can be in a different order (from an older save), so they are matched by name
+                other_values = other_values[[other.schema.indexes[attr] for attr in self.schema.attrs]]
+            np.floor_divide(np.frombuffer(values) + other_values, 2, out=np.frombuffer(values))
+
+        genes = CreatureGenes(self.schema, values)
+        genes.mutate(probability, factor, entity_id)
+        return genes
+
+    def mutate(self, probability: float = 0.2, factor: float = 1, entity_id: int = 0):
+        """
+        Mutates every gene that can mutate, the same as Gene.mutate for each of them, in one go.
+        The random numbers come from the random module, so seeding it still gives the same simulation
+        :param probability:
+        :param factor:
+        :param entity_id: ID of the creature the genes belong to, for the mutation logs
+        :return:
+        """
+        schema = self.schema
+        values = np.frombuffer(self.values)
+        old_values = values.copy()
+
+        chances = np.array([random.random() for i in range(len(schema))])
+        offsets = np.array([random.uniform(-1, 1) for i in range(len(schema))])
+        steps = np.where(schema.integer_mask, np.round(offsets * 0.5 * factor), offsets * 0.05 * factor)
+
+        mutating = schema.mutable_mask & (chances < probability)
+        values += np.where(mutating, steps, 0)
+        np.clip(values, schema.min_values, schema.max_values, out=values, where=schema.mutable_mask)
+
+        if log_enabled('MUTATION') or events.wants('MUTATION'):
+            for index in schema.mutable_mask.nonzero()[0].tolist():
+                old_value, value = old_values[index].item(), self.values[index]
+                if schema.whole[index]:
+                    old_value, value = int(old_value), int(value)
+                log_mutation(entity_id, schema.names[index], schema.acronyms[index], old_value, value)
+
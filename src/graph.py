@@ -0,0 +1,183 @@
+import pygame
+
+
+class LiveGraph:
+    def __init__(self, width: int, height: int, colour: str, label: str,
+                 font_path: str = 'resources/pixel_digivolve.otf'):
+        """
+        Plots one series of the world's data straight onto a surface, without going through files.
+
+        Points are added as they arrive, and each pixel column of the plot keeps the smallest and largest
+        value of the points it covers. Once every column is used, neighbouring columns are merged in pairs and each
+        column covers twice as many points, so adding a point never means going through the old ones again.
+        The surface is only drawn again when new points have been added.
+        :param width: Width of the whole graph, including the labels
+        :param height:
+        :param colour: Colour of the line, as a hex string
+        :param label: Name of the series
+        :param font_path:
+        """
+        self.width = width
+        self.height = height
+        self.colour = pygame.Color(colour)
+        self.label = label
+
+        self.title_font = pygame.font.Font(font_path, 30)
+        self.axis_font = pygame.font.Font(font_path, 12)
+
+        # Where the plot is inside the surface, leaving room for the title and labels
+        self.plot_rect = pygame.Rect(70, 60, width - 100, height - 110)
+
+        self.times: list[float] = []
+        self.last_time = 0
+        self.count = 0
+        self.points_per_column = 1
+        self.column_minimums: list[float] = []
+        self.column_maximums: list[float] = []
+        self.minimum = None
+        self.maximum = None
+
+        self.surface = pygame.Surface((width, height))
+        self.dirty = True
+
+    def add(self, time: float, value: float):
+        """
+        Adds one point to the end of the series
+        :param time: Seconds since the simulation started
+        :param value:
+        :return:
+        """
+        if self.count % self.points_per_column == 0:
+            if len(self.column_minimums) == self.plot_rect.w:
+                self.merge_columns()
+
+        if self.count % self.points_per_column == 0:
+            self.column_minimums.append(value)
+            self.column_maximums.append(value)
+            self.times.append(time)
+        else:
+            self.column_minimums[-1] = min(self.column_minimums[-1], value)
+            self.column_maximums[-1] = max(self.column_maximums[-1], value)
+
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.last_time = time
+        self.count += 1
+        self.dirty = True
+
+    def merge_columns(self):
+        """
+        Halves the number of columns by merging each pair, so each column covers twice as many points
+        :return:
+        """
+        self.column_minimums = [min(self.column_minimums[i:i + 2]) for i in range(0, len(self.column_minimums), 2)]
+        self.column_maximums = [max(self.column_maximums[i:i + 2]) for i in range(0, len(self.column_maximums), 2)]
+        self.times = self.times[0::2]
+        self.points_per_column *= 2
+
+    def update(self, times: list[float], values: list[float]) -> bool:
+        """
+        Adds the points that are new since the last update
+        :param times: The world's time_data
+        :param values: The world's list for this series
+        :return: Whether any points were added
+        """
+        new_points = min(len(times), len(values)) - self.count
+        for time, value in zip(times[self.count:self.count + new_points], values[self.count:self.count + new_points]):
+            self.add(time, value)
+
+        return new_points > 0
+
+    def time_unit(self) -> tuple[str, float]:
+        """
+        Shows the x-axis in seconds, minutes or hours depending on how long the simulation has run
+        :return: The name of the unit and how many seconds are in it
+        """
+        if self.count > 3600:
+            return 'hours', 3600
+        elif self.count > 60:
+            return 'minutes', 60
+        return 'seconds', 1
+
+    def draw(self) -> pygame.Surface:
+        """
+        Gives the graph as a surface, only drawing it again if points were added since the last time
+        :return:
+        """
+        if not self.dirty:
+            return self.surface
+        self.dirty = False
+
+        text_colour = (202, 247, 183)
+        grid_colour = (39, 45, 53)
+        plot = self.plot_rect
+
+        self.surface.fill((0, 7, 18))
+        title = self.title_font.render(f'{self.label} over Time', False, text_colour)
+        self.surface.blit(title, ((self.width - title.get_width()) // 2, 10))
+
+        for i in range(5):
+            y = plot.bottom - plot.h * i // 4
+            pygame.draw.line(self.surface, grid_colour, (plot.left, y), (plot.right, y))
+            x = plot.left + plot.w * i // 4
+            pygame.draw.line(self.surface, grid_colour, (x, plot.top), (x, plot.bottom))
+        pygame.draw.rect(self.surface, text_colour, plot, width=1)
+
+        unit, unit_seconds = self.time_unit()
+        x_label = self.axis_font.render(f'Time ({unit})', False, text_colour)
+        self.surface.blit(x_label, (plot.centerx - x_label.get_width() // 2, plot.bottom + 25))
+        y_label = pygame.transform.rotate(self.axis_font.render(self.label, False, text_colour), 90)
+        self.surface.blit(y_label, (5, plot.centery - y_label.get_height() // 2))
+
+        if self.count == 0:
+            return self.surface
+
+        # Leave a little room above and below the line, the same as the margins on the old graphs
+        low, high = self.minimum, self.maximum
+        if low == high:
+            low, high = low - 1, high + 1
+        padding = (high - low) * 0.01
+        low, high = low - padding, high + padding
+
+        start, end = self.times[0], self.last_time
+        for i in range(5):
+            value = self.axis_font.render(f'{round(low + (high - low) * i / 4)}', False, text_colour)
+            self.surface.blit(value, (plot.left - value.get_width() - 5,
+                                      plot.bottom - plot.h * i // 4 - value.get_height() // 2))
+            time = self.axis_font.render(f'{round((start + (end - start) * i / 4) / unit_seconds, 1)}', False,
+                                         text_colour)
+            self.surface.blit(time, (plot.left + plot.w * i // 4 - time.get_width() // 2, plot.bottom + 5))
+
+        def y_position(value: float) -> float:
+            return plot.bottom - (value - low) / (high - low) * plot.h
+
+        # The area under the line is filled down to the bottom of the plot. When the series goes below 0,
+        # it is filled in amber down (or up) to 0 instead, and 0 is marked with a red line
+        negative = self.minimum < 0
+        if negative:
+            fill_colour = (255, 191, 0, 25)
+            fill_bottom = y_position(0) - plot.top
+        else:
+            fill_colour = (self.colour.r, self.colour.g, self.colour.b, 25)
+            fill_bottom = plot.h
+
+        # Spread the columns across the whole width of the plot, whatever size they have grown to
+        columns = len(self.column_minimums)
+        column_width = plot.w / max(columns, 1)
+        fill = pygame.Surface(plot.size, pygame.SRCALPHA)
+        line = []
+        for column, (minimum, maximum) in enumerate(zip(self.column_minimums, self.column_maximums)):
+            x = plot.left + column * column_width
+            top, bottom = y_position(maximum), y_position(minimum)
+            pygame.draw.line(self.surface, self.colour, (x, top), (x, bottom))
+            pygame.draw.line(fill, fill_colour, (x - plot.left, top - plot.top), (x - plot.left, fill_bottom))
+            line.append((x, top))
+
+        self.surface.blit(fill, plot.topleft)
+        if len(line) > 1:
+            pygame.draw.lines(self.surface, self.colour, False, line)
+        if negative:
+            zero = y_position(0)
+            pygame.draw.line(self.surface, (210, 43, 43), (plot.left, zero), (plot.right, zero))
+
+        return self.surface
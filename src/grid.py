@@ -0,0 +1,260 @@
+import heapq
+import math
+
+import numpy as np
+
+from logs import log
+from src.entity import BaseEntity
+from src.occupancy import OccupancyIndex
+
+from datetime import datetime
+
+
+class SpatialGrid:
+    def __init__(self, points: list, world_size: int, cell_size: float):
+        """
+        A uniform grid over the (square) world. Every cell is a bucket of the entities inside it,
+        so a range search only has to look at the cells that overlap the search box.
+        Has the same methods as the KDTree, so the World can use either one.
+
+        The cell size should be about the size of a search box. World uses the largest vision radius for it.
+        :param points:
+        :param world_size:
+        :param cell_size:
+        """
+        self.world_size = world_size
+        self.cell_size = max(cell_size, 1)
+        self.columns = max(math.ceil(world_size / self.cell_size), 1)
+
+        self.cells: list[dict[int, BaseEntity]] = [{} for i in range(self.columns * self.columns)]
+
+        # The cell and coordinates each entity was placed at
+        self.entities: dict[int, BaseEntity] = {}
+        self.entity_cells: dict[int, int] = {}
+        self.entity_points: dict[int, tuple[float, float]] = {}
+        self.occupancy = OccupancyIndex()
+
+        start = datetime.now()
+        for entity in points:
+            self.insert(entity)
+        log("Grid of size %s with %s cells created in %s", len(self), len(self.cells), datetime.now() - start)
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def cell_coordinates(self, point: tuple[float, float]) -> tuple[int, int]:
+        """
+        Gets the column and row of the cell the point falls in.
+        Points outside the world are put in the nearest cell along the border.
+        :param point:
+        :return:
+        """
+        column = min(max(int(point[0] // self.cell_size), 0), self.columns - 1)
+        row = min(max(int(point[1] // self.cell_size), 0), self.columns - 1)
+        return column, row
+
+    def cell_index(self, point: tuple[float, float]) -> int:
+        column, row = self.cell_coordinates(point)
+        return row * self.columns + column
+
+    def insert(self, entity: BaseEntity):
+        point = entity.get_coordinates()
+        index = self.cell_index(point)
+
+        self.cells[index][entity.id] = entity
+        self.entities[entity.id] = entity
+        self.entity_cells[entity.id] = index
+        self.entity_points[entity.id] = point
+        self.occupancy.add(point)
+
+    def delete(self, entity: BaseEntity):
+        index = self.entity_cells.pop(entity.id, None)
+        if index is not None:
+            del self.cells[index][entity.id]
+            del self.entities[entity.id]
+            self.occupancy.remove(self.entity_points.pop(entity.id))
+
+    def move(self, entity: BaseEntity):
+        """
+        Updates the position of an entity that is already in the grid.
+        The cells are only changed if the entity has crossed into a different cell.
+        :param entity:
+        :return:
+        """
+        old_index = self.entity_cells.get(entity.id)
+        if old_index is None:
+            self.insert(entity)
+            return
+
+        point = entity.get_coordinates()
+        old_point = self.entity_points[entity.id]
+        if point != old_point:
+            self.occupancy.remove(old_point)
+            self.occupancy.add(point)
+            self.entity_points[entity.id] = point
+
+        new_index = self.cell_index(point)
+        if new_index != old_index:
+            del self.cells[old_index][entity.id]
+            self.cells[new_index][entity.id] = entity
+            self.entity_cells[entity.id] = new_index
+
+    def find(self, point: tuple[float, float], spacing: float = 0) -> bool:
+        """
+        Checks if an entity is at the point, or closer to it than the spacing
+        :param point:
+        :param spacing:
+        :return:
+        """
+        return self.occupancy.near(point, spacing)
+
+    def range_search(self, point: tuple[float, float], topleft: tuple[float, float],
+                     bottomright: tuple[float, float], sort: bool = False, k: int = None):
+        """
+        Checks every entity in the cells that overlap the search box.
+        topleft, bottomright, sort and k work the same as in KDTree.range_search
+
+        :param point:
+        :param topleft:
+        :param bottomright:
+        :param sort:
+        :param k:
+        :return:
+        """
+        points_list = []
+        left, right = topleft[0], bottomright[0]
+        bottom, top = bottomright[1], topleft[1]
+
+        first_column, first_row = self.cell_coordinates((left, bottom))
+        last_column, last_row = self.cell_coordinates((right, top))
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                for entity_id, entity in self.cells[row * self.columns + column].items():
+                    entity_point = self.entity_points[entity_id]
+                    if left <= entity_point[0] <= right and bottom <= entity_point[1] <= top and entity_point != point:
+                        points_list.append(entity)
+
+        if k is not None:
+            return heapq.nsmallest(k, points_list, key=lambda pt: (pt.x - point[0])**2 + (pt.y - point[1])**2)
+        if sort:
+            points_list.sort(key=lambda pt: (pt.x - point[0])**2 + (pt.y - point[1])**2)
+        return points_list
+
+    def range_search_many(self, centres: np.ndarray, half_sizes: np.ndarray,
+                          sort: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Does a range search for many boxes at once, giving the result in the same form as KDTree.range_search_many.
+        Each box only checks a few cells, so they are searched one at a time.
+        :param centres: Array of shape (n, 2)
+        :param half_sizes: Array of shape (n,) or a single number
+        :param sort:
+        :return: indptr, ids
+        """
+        centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2)
+        half_sizes = np.broadcast_to(np.asarray(half_sizes, dtype=np.float64), (len(centres),))
+
+        indptr = [0]
+        ids = []
+        for (x, y), half_size in zip(centres.tolist(), half_sizes.tolist()):
+            found = self.range_search((x, y), (x - half_size, y + half_size), (x + half_size, y - half_size), sort)
+            ids.extend(entity.id for entity in found)
+            indptr.append(len(ids))
+
+        return np.array(indptr, dtype=np.int64), np.array(ids, dtype=np.int64)
+
+    def cell_gap(self, index: int, value: float) -> float:
+        """
+        How far the value is from a row or column of cells, on that axis. It is 0 if the value is inside it.
+        The rows and columns along the border also hold everything outside the world, so they reach forever past it.
+        :param index:
+        :param value:
+        :return:
+        """
+        lower = index * self.cell_size if index > 0 else -math.inf
+        upper = (index + 1) * self.cell_size if index < self.columns - 1 else math.inf
+        return max(lower - value, value - upper, 0)
+
+    def query_radius(self, point: tuple[float, float], radius: float, sort: bool = False, k: int = None):
+        """
+        Finds every entity within the radius of the point, apart from ones exactly at the point.
+        Only the cells that the circle overlaps are checked. sort and k work the same as in range_search.
+        :param point:
+        :param radius:
+        :param sort:
+        :param k:
+        :return:
+        """
+        found = []
+        limit = radius * radius
+        # A box this large already covers every cell, which also lets the radius be infinite
+        reach = min(radius, abs(point[0]) + abs(point[1]) + 2 * self.world_size)
+        first_column, first_row = self.cell_coordinates((point[0] - reach, point[1] - reach))
+        last_column, last_row = self.cell_coordinates((point[0] + reach, point[1] + reach))
+
+        for row in range(first_row, last_row + 1):
+            row_gap = self.cell_gap(row, point[1])
+            for column in range(first_column, last_column + 1):
+                if row_gap ** 2 + self.cell_gap(column, point[0]) ** 2 > limit:
+                    continue
+
+                for entity_id, entity in self.cells[row * self.columns + column].items():
+                    entity_point = self.entity_points[entity_id]
+                    distance = (entity_point[0] - point[0])**2 + (entity_point[1] - point[1])**2
+                    if distance <= limit and entity_point != point:
+                        found.append((distance, entity_id))
+
+        if k is not None:
+            found = heapq.nsmallest(k, found)
+        elif sort:
+            found.sort()
+        return [self.entities[entity_id] for distance, entity_id in found]
+
+    def query_knn(self, point: tuple[float, float], k: int, radius: float = math.inf):
+        """
+        Finds the k closest entities to the point (apart from ones exactly at the point), closest first.
+        The search starts with a circle the size of one cell and doubles it until it holds k entities.
+        Nothing outside the circle can be closer than the entities inside it.
+        :param point:
+        :param k:
+        :param radius: Entities further away than this are never returned
+        :return:
+        """
+        if k <= 0:
+            return []
+
+        search_radius = min(self.cell_size, radius)
+        while True:
+            found = self.query_radius(point, search_radius, k=k)
+            if len(found) == k or search_radius >= radius:
+                return found
+
+            # Once the circle's box covers every cell, the only thing left is to search out to the full radius
+            first_cell = self.cell_coordinates((point[0] - search_radius, point[1] - search_radius))
+            last_cell = self.cell_coordinates((point[0] + search_radius, point[1] + search_radius))
+            if first_cell == (0, 0) and last_cell == (self.columns - 1, self.columns - 1):
+                return self.query_radius(point, radius, k=k)
+
+            search_radius = min(search_radius * 2, radius)
+
+    def query_radius_many(self, centres: np.ndarray, radii: np.ndarray, sort: bool = False,
+                          k: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Does a radius search for many circles at once, giving the result in the same form as KDTree.query_radius_many.
+        :param centres: Array of shape (n, 2)
+        :param radii: Array of shape (n,) or a single number
+        :param sort:
+        :param k:
+        :return: indptr, ids
+        """
+        centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centres),))
+
+        indptr = [0]
+        ids = []
+        for (x, y), radius in zip(centres.tolist(), radii.tolist()):
+            found = self.query_radius((x, y), radius, sort, k)
+            ids.extend(entity.id for entity in found)
+            indptr.append(len(ids))
+
+        return np.array(indptr, dtype=np.int64), np.array(ids, dtype=np.int64)
@@ -0,0 +1,69 @@
+import math
+
+
+class OccupancyIndex:
+    def __init__(self, cell_size: float = 4):
+        """
+        Keeps track of which points are taken, so checking a point is a dictionary lookup instead of a search.
+        Points are also grouped into small square cells, so checking if anything is near a point
+        only has to look at the cells around it.
+        :param cell_size:
+        """
+        self.cell_size = cell_size
+
+        # How many entities are at each exact point, and the points inside each cell
+        self.points: dict[tuple[float, float], int] = {}
+        self.cells: dict[tuple[int, int], list[tuple[float, float]]] = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, point: tuple[float, float]) -> bool:
+        return point in self.points
+
+    def cell(self, point: tuple[float, float]) -> tuple[int, int]:
+        return int(point[0] // self.cell_size), int(point[1] // self.cell_size)
+
+    def add(self, point: tuple[float, float]):
+        self.points[point] = self.points.get(point, 0) + 1
+        self.cells.setdefault(self.cell(point), []).append(point)
+
+    def remove(self, point: tuple[float, float]):
+        count = self.points.get(point, 0)
+        if count == 0:
+            return
+
+        if count == 1:
+            del self.points[point]
+        else:
+            self.points[point] = count - 1
+
+        cell = self.cell(point)
+        self.cells[cell].remove(point)
+        if len(self.cells[cell]) == 0:
+            del self.cells[cell]
+
+    def clear(self):
+        self.points = {}
+        self.cells = {}
+
+    def near(self, point: tuple[float, float], spacing: float = 0) -> bool:
+        """
+        Checks if any point is closer than the spacing to the given point.
+        With no spacing it only checks if the exact point is taken.
+        :param point:
+        :param spacing:
+        :return:
+        """
+        if spacing <= 0:
+            return point in self.points
+
+        reach = math.ceil(spacing / self.cell_size)
+        column, row = self.cell(point)
+        for i in range(column - reach, column + reach + 1):
+            for j in range(row - reach, row + reach + 1):
+                for other in self.cells.get((i, j), ()):
+                    if (other[0] - point[0])**2 + (other[1] - point[1])**2 < spacing**2:
+                        return True
+
+        return False
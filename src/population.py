@@ -0,0 +1,286 @@
+import math
+
+import numpy as np
+import pygame
+
+from src.entity import Creature
+from src.genes import CreatureGenes
+
+
+class PopulationEngine:
+    # Every gene a creature has, in the order CreatureGenes lists them
+    GENE_NAMES = list(CreatureGenes.__annotations__)
+
+    def __init__(self, world_size: int, ids: np.ndarray, positions: np.ndarray, directions: np.ndarray,
+                 energy: np.ndarray, dead: np.ndarray, seeing: np.ndarray, memory_reaction: np.ndarray,
+                 genes: dict[str, np.ndarray], gene_details: dict[str, dict]):
+        """
+        Stores the whole population as columns of NumPy arrays instead of Creature objects, and runs
+        the parts of Creature.tick that don't need any other entity (energy drain, movement, bouncing off
+        the border and death) for every creature at once.
+        Vision, reactions, eating and births depend on the entities near each creature, so they stay in World.
+
+        Creature i is row i of every array. genes has one array per gene, and gene_details keeps
+        everything else about each gene (name, acronym, limits), which is the same for every creature.
+
+        A world using the engine (engine: 'numpy' in config.yml) reads its creatures into the arrays every step
+        and writes the result back, see World.engine_tick.
+        :param world_size:
+        :param ids:
+        :param positions: Array of shape (n, 2)
+        :param directions: In degrees
+        :param energy:
+        :param dead:
+        :param seeing:
+        :param memory_reaction:
+        :param genes:
+        :param gene_details:
+        """
+        self.world_size = world_size
+
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        self.directions = np.asarray(directions, dtype=np.float64)
+        self.energy = np.asarray(energy, dtype=np.float64)
+        self.dead = np.asarray(dead, dtype=bool)
+        self.seeing = np.asarray(seeing, dtype=bool)
+        self.memory_reaction = np.asarray(memory_reaction, dtype=np.int64)
+
+        self.genes = {name: np.asarray(values, dtype=np.float64) for name, values in genes.items()}
+        self.gene_details = gene_details
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, creatures: list[dict], world_size: int):
+        """
+        Creates the engine from the creatures in a save file
+        :param creatures: The 'creatures' list of a save file
+        :param world_size:
+        :return:
+        """
+        genes = {name: [] for name in cls.GENE_NAMES}
+        gene_details = {}
+
+        for creature in creatures:
+            for gene in creature['genes']:
+                genes[gene['attr']].append(gene['value'])
+                gene_details.setdefault(gene['attr'], {key: value for key, value in gene.items()
+                                                       if key not in ['attr', 'value']})
+
+        # Keep the gene order of the save, in case it has genes that aren't in CreatureGenes
+        if len(creatures) != 0:
+            genes = {gene['attr']: genes.get(gene['attr'], []) for gene in creatures[0]['genes']}
+
+        return cls(world_size,
+                   ids=[creature['id'] for creature in creatures],
+                   positions=[creature['position'] for creature in creatures],
+                   directions=[creature['direction'] for creature in creatures],
+                   energy=[creature['energy'] for creature in creatures],
+                   dead=[creature['dead'] for creature in creatures],
+                   seeing=[creature['seeing'] for creature in creatures],
+                   memory_reaction=[creature['memory_reaction'] for creature in creatures],
+                   genes=genes, gene_details=gene_details)
+
+    @classmethod
+    def from_creatures(cls, creatures: list[Creature], world_size: int):
+        """
+        Creates the engine from Creature objects
+        :param creatures:
+        :param world_size:
+        :return:
+        """
+        genes, gene_details = cls.gene_columns(creatures)
+        return cls(world_size,
+                   ids=[creature.id for creature in creatures],
+                   positions=[creature.get_coordinates() for creature in creatures],
+                   directions=[creature.direction for creature in creatures],
+                   energy=[creature.energy for creature in creatures],
+                   dead=[creature.dead for creature in creatures],
+                   seeing=[creature.seeing for creature in creatures],
+                   memory_reaction=[creature.memory_reaction for creature in creatures],
+                   genes=genes, gene_details=gene_details)
+
+    @staticmethod
+    def gene_columns(creatures: list[Creature]) -> tuple[dict[str, np.ndarray], dict[str, dict]]:
+        """
+        Every gene of the creatures as one column each, in the order of the first creature's schema
+        :param creatures:
+        :return: The columns, and the details of each gene
+        """
+        if len(creatures) == 0:
+            return {}, {}
+
+        schema = creatures[0].genes.schema
+        if all(creature.genes.schema is schema for creature in creatures):
+            # The value arrays are all the same length, so they can be joined into one matrix
+            rows = np.frombuffer(b''.join(creature.genes.values.tobytes() for creature in creatures))
+            rows = rows.reshape(len(creatures), len(schema))
+        else:
+            rows = np.array([[creature.genes.values[creature.genes.schema.indexes[attr]] for attr in schema.attrs]
+                             for creature in creatures], dtype=np.float64)
+
+        genes = {attr: rows[:, index].copy() for index, attr in enumerate(schema.attrs)}
+        gene_details = {attr: {'name': name, 'acronym': acronym, 'can_mutate': can_mutate, 'min': min_value,
+                               'max': max_value, 'is_integer': is_integer}
+                        for attr, name, acronym, can_mutate, min_value, max_value, is_integer
+                        in zip(schema.attrs, schema.names, schema.acronyms, schema.can_mutate, schema.mins,
+                               schema.maxs, schema.is_integer)}
+        return genes, gene_details
+
+    def read(self, creatures: list[Creature]):
+        """
+        Takes the current state of the creatures, which become the rows in the same order.
+        Genes never change the rules once a creature is born, so they are only gathered again when the
+        creatures aren't the same ones as last time
+        :param creatures:
+        :return:
+        """
+        ids = np.array([creature.id for creature in creatures], dtype=np.int64)
+        if not np.array_equal(ids, self.ids):
+            self.genes, self.gene_details = self.gene_columns(creatures)
+        self.ids = ids
+
+        self.positions = np.array([creature.get_coordinates() for creature in creatures],
+                                  dtype=np.float64).reshape(-1, 2)
+        self.directions = np.array([creature.direction for creature in creatures], dtype=np.float64)
+        self.energy = np.array([creature.energy for creature in creatures], dtype=np.float64)
+        self.dead = np.array([creature.dead for creature in creatures], dtype=bool)
+        self.seeing = np.array([creature.seeing for creature in creatures], dtype=bool)
+        self.memory_reaction = np.array([creature.memory_reaction for creature in creatures], dtype=np.int64)
+
+    def write(self, creatures: list[Creature]):
+        """
+        Gives the creatures read in by read() their new position, direction, energy and whether they died
+        :param creatures:
+        :return:
+        """
+        for creature, (x, y), direction, energy, dead in zip(creatures, self.positions.tolist(),
+                                                             self.directions.tolist(), self.energy.tolist(),
+                                                             self.dead.tolist()):
+            creature.x, creature.y = x, y
+            creature.direction = direction
+            creature.energy = energy
+            creature.dead = dead
+
+    def save_genes(self, index: int) -> list[dict]:
+        """
+        The genes of one creature, in the same form as Gene.save_gene
+        :param index:
+        :return:
+        """
+        save_genes = []
+        for gene_name, values in self.genes.items():
+            details = self.gene_details[gene_name]
+            value = values[index].item()
+            if details['is_integer'] or not details['can_mutate']:
+                value = int(value)
+
+            save_genes.append({'attr': gene_name, 'name': details['name'], 'acronym': details['acronym'],
+                               'value': value, 'can_mutate': details['can_mutate'], 'min': details['min'],
+                               'max': details['max'], 'is_integer': details['is_integer']})
+
+        return save_genes
+
+    def save(self) -> list[dict]:
+        """
+        Gives the creatures in the same form as the 'creatures' list of a save file
+        :return:
+        """
+        creatures = []
+        for index in range(len(self)):
+            creatures.append({
+                "id": int(self.ids[index]),
+                "energy": float(self.energy[index]),
+                "direction": float(self.directions[index]),
+                "dead": bool(self.dead[index]),
+                "seeing": bool(self.seeing[index]),
+                "memory_reaction": int(self.memory_reaction[index]),
+                "position": self.positions[index].tolist(),
+                "genes": self.save_genes(index)
+            })
+
+        return creatures
+
+    def to_creatures(self, image: pygame.Surface) -> list[Creature]:
+        """
+        Turns the population back into Creature objects. Like loading a save, they are given new IDs
+        :param image:
+        :return:
+        """
+        creatures = []
+        for creature in self.save():
+            creatures.append(Creature.load(creature['position'][0], creature['position'][1], image,
+                                           (self.world_size, self.world_size), CreatureGenes.load(creature['genes']),
+                                           creature['energy'], creature['direction'], creature['seeing'],
+                                           creature['memory_reaction'], creature['dead'], creature['id']))
+
+        return creatures
+
+    def tick(self, deltatime: float):
+        """
+        Runs the same rules as Creature.tick for every living creature at once, apart from the ones that
+        need other entities (vision, reactions and collisions)
+        :param deltatime:
+        :return:
+        """
+        alive = ~self.dead
+        self.drain(deltatime, alive)
+        self.move(deltatime, alive)
+        self.die()
+
+    def drain(self, deltatime: float, alive: np.ndarray):
+        """
+        Takes the energy every living creature uses each second just to stay alive
+        :param deltatime:
+        :param alive:
+        :return:
+        """
+        self.energy[alive] -= self.genes['base_energy'][alive] * deltatime
+
+    def move(self, deltatime: float, alive: np.ndarray):
+        """
+        Moves every living creature forward, the same as Creature.move.
+        Creatures that end up outside the border turn 90 degrees, which costs energy.
+        :param deltatime:
+        :param alive:
+        :return:
+        """
+        radians = self.directions[alive] / (180 / math.pi)
+        speeds = self.genes['speed'][alive] * deltatime
+        distances = np.stack([np.cos(radians) * speeds, np.sin(radians) * speeds], axis=1)
+
+        self.energy[alive] -= self.genes['movement_energy'][alive] * np.sqrt((distances ** 2).sum(axis=1))
+        self.positions[alive] += distances
+
+        x, y = self.positions[:, 0], self.positions[:, 1]
+        outside = alive & ~((0 <= x) & (x <= self.world_size) & (0 <= y) & (y <= self.world_size))
+        self.directions[outside] = (self.directions[outside] - 90) % 360
+        self.energy[outside] -= self.genes['turning_energy'][outside]
+
+    def die(self):
+        """
+        Every creature that has run out of energy dies
+        :return:
+        """
+        self.dead |= self.energy <= 0
+
+    def remove_dead(self) -> np.ndarray:
+        """
+        Removes the dead creatures from every array
+        :return: The IDs of the creatures that were removed
+        """
+        removed = self.ids[self.dead]
+        alive = ~self.dead
+
+        self.ids = self.ids[alive]
+        self.positions = self.positions[alive]
+        self.directions = self.directions[alive]
+        self.energy = self.energy[alive]
+        self.dead = self.dead[alive]
+        self.seeing = self.seeing[alive]
+        self.memory_reaction = self.memory_reaction[alive]
+        self.genes = {name: values[alive] for name, values in self.genes.items()}
+
+        return removed
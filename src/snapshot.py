@@ -0,0 +1,117 @@
+import numpy as np
+
+from src.genes import CreatureGenes
+
+
+class CreatureDetails:
+    __slots__ = ('id', 'energy', 'x', 'y', 'genes')
+
+    def __init__(self, entity_id: int, energy: float, x: float, y: float, genes: CreatureGenes):
+        """
+        The parts of a creature the stats panel shows, copied out of a snapshot so they can't change while
+        the panel is drawn
+        :param entity_id:
+        :param energy:
+        :param x:
+        :param y:
+        :param genes:
+        """
+        self.id = entity_id
+        self.energy = energy
+        self.x = x
+        self.y = y
+        self.genes = genes
+
+    def get_coordinates(self) -> tuple[float, float]:
+        return self.x, self.y
+
+
+class WorldSnapshot:
+    def __init__(self, world, alpha: float = 1):
+        """
+        A copy of everything needed to draw the world at one moment, so it can be drawn while the simulation
+        keeps stepping on another thread. The arrays are read only, and nothing in the snapshot changes after
+        it is made.
+
+        Creature i is row i of every creature array. The energy and genes of every creature are copied as well,
+        so the stats panel can show whichever one is chosen without reading the world.
+        :param world:
+        :param alpha: How far through the next step the simulation was, from FixedStepClock.alpha
+        """
+        self.world_id = id(world)
+        self.size = world.size
+        self.alpha = alpha
+        self.largest_radius = world.largest_radius
+        self.largest_speed = world.largest_speed
+        self.food_image = world.food_image
+
+        self.seconds = world.seconds
+        self.paused = world.paused
+        self.tick_speed = world.tick_speed
+        self.species_count = len(world.species_count)
+        # The summary is never changed once it is made, so it doesn't need copying
+        self.statistics = world.statistics.summary()
+
+        creatures = world.creatures
+        self.creature_image = world.creature_image
+        self.creature_ids = np.array([creature.id for creature in creatures], dtype=np.int64)
+        self.creature_positions = np.array([(creature.previous_x, creature.previous_y, creature.x, creature.y)
+                                            for creature in creatures], dtype=np.float64).reshape(-1, 4)
+        self.directions = np.array([creature.direction for creature in creatures], dtype=np.float64)
+        self.radii = np.array([creature.genes.radius.value for creature in creatures], dtype=np.float64)
+        self.colours = np.array([(creature.genes.colour_red.value, creature.genes.colour_green.value,
+                                  creature.genes.colour_blue.value) for creature in creatures],
+                                dtype=np.int64).reshape(-1, 3)
+        self.energies = np.array([creature.energy for creature in creatures], dtype=np.float64)
+        # Slicing copies the gene values. The schemas never change, so they are shared
+        self.gene_schemas = tuple(creature.genes.schema for creature in creatures)
+        self.gene_values = tuple(creature.genes.values[:] for creature in creatures)
+
+        self.food_version = world.food_version
+        self.food_ids = np.array([food.id for food in world.food], dtype=np.int64)
+        self.food_positions = np.array([food.get_coordinates() for food in world.food],
+                                       dtype=np.float64).reshape(-1, 2)
+
+        for array in [self.creature_ids, self.creature_positions, self.directions, self.radii, self.colours,
+                      self.energies, self.food_ids, self.food_positions]:
+            array.flags.writeable = False
+
+    @property
+    def creature_count(self) -> int:
+        return len(self.creature_ids)
+
+    @property
+    def food_count(self) -> int:
+        return len(self.food_ids)
+
+    def creature_details(self, index: int) -> CreatureDetails:
+        """
+        What the stats panel needs for creature index, with its own copy of the genes
+        :param index:
+        :return:
+        """
+        x, y = self.creature_positions[index, 2:].tolist()
+        genes = CreatureGenes(self.gene_schemas[index], self.gene_values[index][:])
+        return CreatureDetails(int(self.creature_ids[index]), float(self.energies[index]), x, y, genes)
+
+    def interpolated_positions(self) -> np.ndarray:
+        """
+        Where every creature is part way between its last two positions, the same as
+        BaseEntity.interpolated_coordinates
+        :return: Array of shape (n, 2)
+        """
+        previous, current = self.creature_positions[:, :2], self.creature_positions[:, 2:]
+        return previous + (current - previous) * self.alpha
+
+    @staticmethod
+    def inside(positions: np.ndarray, topleft: tuple[float, float], bottomright: tuple[float, float]) -> np.ndarray:
+        """
+        The indexes of the positions inside a box, given the same way as range_search
+        :param positions: Array of shape (n, 2)
+        :param topleft:
+        :param bottomright:
+        :return:
+        """
+        (left, top), (right, bottom) = topleft, bottomright
+        x, y = positions[:, 0], positions[:, 1]
+        return ((left <= x) & (x <= right) & (bottom <= y) & (y <= top)).nonzero()[0]
@@ -1,7 +1,104 @@
-from logs import log
-from src.genes import CreatureGenes, Gene
+import numpy as np
+
+from src.genes import CreatureGenes, GeneSchema
 
 
 class Species:
     def __init__(self):
-        ...
\ No newline at end of file
+        ...
+
+
+class SpeciesIndex:
+    # Genes that are data about the creature rather than part of it, so they are never compared
+    IGNORED_GENES = ('species', 'generation')
+    # Most numbers compared at once in classify_many
+    CHUNK_ELEMENTS = 1 << 14
+
+    def __init__(self, specimens: dict[int, CreatureGenes] = None, max_differences: int = 6):
+        """
+        Keeps the genes of every species' specimen as one row of a matrix, so a child can be compared
+        against all of them at once instead of one specimen and one gene at a time.
+
+        A child belongs to a species if at most max_differences of its genes differ from the specimen's by
+        half of the specimen's value or more. If it belongs to more than one, the oldest species is used,
+        the same as going through the specimens in order.
+        :param specimens: The world's specimens, by species ID
+        :param max_differences:
+        """
+        self.max_differences = max_differences
+        self.ids: list[int] = []
+        self.attrs: tuple[str, ...] = ()
+        self.matrix = np.empty((0, 0))
+        # Where the compared genes are in the value array of each schema
+        self.columns: dict[GeneSchema, np.ndarray] = {}
+
+        for specimen_id, genes in (specimens or {}).items():
+            self.add(specimen_id, genes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector(self, genes: CreatureGenes) -> np.ndarray:
+        """
+        The values of the compared genes, in the same order as the columns of the matrix
+        :param genes:
+        :return:
+        """
+        columns = self.columns.get(genes.schema)
+        if columns is None:
+            columns = np.array([genes.schema.indexes[attr] for attr in self.attrs], dtype=np.intp)
+            self.columns[genes.schema] = columns
+        return np.frombuffer(genes.values)[columns]
+
+    def add(self, specimen_id: int, genes: CreatureGenes):
+        """
+        Adds the specimen of a new species. The matrix doubles in size when it is full, so adding is cheap
+        :param specimen_id:
+        :param genes:
+        :return:
+        """
+        if len(self.ids) == 0:
+            self.attrs = tuple(attr for attr in genes.schema.attrs if attr not in self.IGNORED_GENES)
+            self.matrix = np.empty((4, len(self.attrs)))
+            self.columns = {}
+        elif len(self.ids) == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, np.empty_like(self.matrix)])
+
+        self.matrix[len(self.ids)] = self.vector(genes)
+        self.ids.append(specimen_id)
+
+    def classify_many(self, genes_list: list[CreatureGenes]) -> list[int | None]:
+        """
+        Finds the species of many children in one comparison
+        :param genes_list:
+        :return: The species ID of each child, or None if it doesn't belong to any species
+        """
+        if len(self.ids) == 0 or len(genes_list) == 0:
+            return [None] * len(genes_list)
+
+        specimens = self.matrix[:len(self.ids)]
+        thresholds = specimens / 2
+        children = np.array([self.vector(genes) for genes in genes_list])
+
+        # The children are compared in chunks, so the (children, specimens, genes) arrays stay small
+        chunk_size = max(1, self.CHUNK_ELEMENTS // specimens.size)
+        species = []
+        for start in range(0, len(children), chunk_size):
+            chunk = children[start:start + chunk_size]
+            differences = np.abs(specimens[None, :, :] - chunk[:, None, :]) >= thresholds
+            matches = np.count_nonzero(differences, axis=2) <= self.max_differences
+
+            # argmax gives the first specimen that matches, or 0 if none of them do
+            first = matches.argmax(axis=1)
+            species.extend(self.ids[index] if matched else None
+                           for index, matched in zip(first.tolist(), matches[np.arange(len(chunk)), first].tolist()))
+
+        return species
+
+    def classify(self, genes: CreatureGenes) -> int | None:
+        """
+        Finds the species of one child
+        :param genes:
+        :return: The species ID, or None if it doesn't belong to any species
+        """
+        return self.classify_many([genes])[0]
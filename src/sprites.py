@@ -0,0 +1,183 @@
+from collections import OrderedDict
+
+import pygame
+
+# Colours in the creature texture that are replaced with the creature's colour and pattern
+BODY_COLOUR = (104, 104, 104)
+PATTERN_COLOUR = (255, 255, 255)
+
+
+class SpriteCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, angle_buckets: int = 128):
+        """
+        Keeps the tinted, scaled and rotated images of creatures, so they are only made once
+        instead of every frame.
+        Images are tinted once per colour, scaled once per colour and size, and rotated once per angle bucket.
+        Angles are rounded to one of angle_buckets directions, so a creature turning slowly reuses the same image.
+
+        The least recently used images are removed once they take up more than max_bytes.
+        :param max_bytes:
+        :param angle_buckets:
+        """
+        self.max_bytes = max_bytes
+        self.angle_buckets = angle_buckets
+        self.bucket_size = 360 / angle_buckets
+
+        self.sprites: OrderedDict[tuple, pygame.Surface | list[pygame.Surface]] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    @staticmethod
+    def surface_bytes(sprite: pygame.Surface | list[pygame.Surface]) -> int:
+        if isinstance(sprite, list):
+            return sum(SpriteCache.surface_bytes(surface) for surface in sprite)
+        return sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+
+    def clear(self):
+        self.sprites.clear()
+        self.size_bytes = 0
+
+    def bucket(self, angle: float) -> int:
+        """
+        The angle bucket closest to an angle in degrees
+        :param angle:
+        :return:
+        """
+        return round(angle / self.bucket_size) % self.angle_buckets
+
+    def get(self, key: tuple) -> pygame.Surface | list[pygame.Surface] | None:
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+        return sprite
+
+    def add(self, key: tuple, sprite: pygame.Surface | list[pygame.Surface]):
+        self.sprites[key] = sprite
+        self.size_bytes += self.surface_bytes(sprite)
+
+        # Never remove the image that was just added, even if it is larger than the cap on its own
+        while self.size_bytes > self.max_bytes and len(self.sprites) > 1:
+            key, removed = self.sprites.popitem(last=False)
+            self.size_bytes -= self.surface_bytes(removed)
+
+    def tinted(self, image: pygame.Surface, colour: tuple[int, int, int]) -> pygame.Surface:
+        """
+        The image with its body coloured in, and its pattern in the opposite colour
+        :param image:
+        :param colour:
+        :return:
+        """
+        key = ('tinted', id(image), colour)
+        sprite = self.get(key)
+        if sprite is None:
+            sprite = image.copy()
+            coloured = pygame.PixelArray(sprite)
+            coloured.replace(BODY_COLOUR, colour)
+            coloured.replace(PATTERN_COLOUR, tuple(255 - value for value in colour))
+            del coloured
+            self.add(key, sprite)
+
+        return sprite
+
+    def scaled(self, image: pygame.Surface, colour: tuple[int, int, int], size: tuple[int, int]) -> pygame.Surface:
+        key = ('scaled', id(image), colour, size)
+        sprite = self.get(key)
+        if sprite is None:
+            sprite = pygame.transform.scale(self.tinted(image, colour), size)
+            self.add(key, sprite)
+
+        return sprite
+
+    def creature(self, image: pygame.Surface, colour: tuple[int, int, int], size: tuple[int, int],
+                 angle: float) -> pygame.Surface:
+        """
+        The image of a creature, tinted with its colour, scaled to its size on screen and rotated
+        to the closest angle bucket
+        :param image: The creature texture
+        :param colour:
+        :param size: Width and height on screen
+        :param angle: Rotation in degrees, the same as pygame.transform.rotate
+        :return:
+        """
+        bucket = self.bucket(angle)
+        key = ('rotated', id(image), colour, size, bucket)
+        sprite = self.get(key)
+        if sprite is None:
+            self.misses += 1
+            sprite = pygame.transform.rotate(self.scaled(image, colour, size), bucket * self.bucket_size)
+            self.add(key, sprite)
+        else:
+            self.hits += 1
+
+        return sprite
+
+    def food(self, image: pygame.Surface, size: tuple[int, int], variants: int) -> list[pygame.Surface]:
+        """
+        The food image scaled to its size on screen, rotated to each of a few evenly spaced angles.
+        Each pellet always uses the same one, so pellets don't change direction between frames
+        :param image: The food texture
+        :param size: Width and height on screen
+        :param variants: How many angles to make
+        :return:
+        """
+        key = ('food', id(image), size, variants)
+        sprites = self.get(key)
+        if sprites is None:
+            scaled = pygame.transform.scale(image, size)
+            sprites = [pygame.transform.rotate(scaled, variant * 360 / variants) for variant in range(variants)]
+            self.add(key, sprites)
+
+        return sprites
+
+
+class GlyphCache:
+    def __init__(self, font_path: str = 'freesansbold.ttf'):
+        """
+        Draws short labels from cached images of each character, instead of loading a font and rendering
+        the whole text every time. Fonts are loaded once per size, and each character once per size and colour.
+        Characters are placed one after another without kerning, which is fine for small labels.
+        :param font_path:
+        """
+        self.font_path = font_path
+        self.fonts: dict[int, pygame.Font] = {}
+        self.glyphs: dict[tuple[str, int, tuple[int, int, int]], pygame.Surface] = {}
+
+    def font(self, size: int) -> pygame.Font:
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.Font(self.font_path, size)
+            self.fonts[size] = font
+        return font
+
+    def glyph(self, character: str, size: int, colour: tuple[int, int, int]) -> pygame.Surface:
+        key = (character, size, colour)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = self.font(size).render(character, True, colour)
+            self.glyphs[key] = glyph
+        return glyph
+
+    def draw(self, surface: pygame.Surface, text: str, size: int, centre: tuple[float, float],
+             colour: tuple[int, int, int] = (255, 255, 255)):
+        """
+        Draws text centred on a point, with one batch of blits
+        :param surface:
+        :param text:
+        :param size:
+        :param centre:
+        :param colour:
+        :return:
+        """
+        glyphs = [self.glyph(character, size, colour) for character in text]
+        x = centre[0] - sum(glyph.get_width() for glyph in glyphs) / 2
+        y = centre[1] - self.font(size).get_height() / 2
+
+        blits = []
+        for glyph in glyphs:
+            blits.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(blits, doreturn=False)
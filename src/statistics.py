@@ -0,0 +1,230 @@
+import math
+from typing import Iterable
+
+import numpy as np
+
+from src.genes import CreatureGenes, GeneSchema
+
+
+class QuantileSketch:
+    # Anything closer to 0 than this counts as 0, and anything further than the largest counts as the largest
+    MIN_MAGNITUDE = 1e-6
+    MAX_MAGNITUDE = 1e12
+
+    def __init__(self, series: int = 1, relative_accuracy: float = 0.01):
+        """
+        Keeps how many values fall into each of a set of logarithmic buckets, instead of the values themselves.
+        A bucket holds the values between gamma^(k-1) and gamma^k, so any quantile it gives is within
+        relative_accuracy of the real one, however many values there are. Values can be removed as well as added,
+        which is what lets it follow a population as creatures die.
+
+        It follows several series at once, one row of counts each, and every update adds or removes one value
+        from each series. The buckets in a row are the negative buckets first (largest first), then 0, then the
+        positive buckets, so they are in the same order as the values they hold.
+        :param series: How many series of values there are
+        :param relative_accuracy:
+        """
+        self.series = series
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_exponent = math.floor(math.log(self.MIN_MAGNITUDE) / self.log_gamma)
+        self.max_exponent = math.ceil(math.log(self.MAX_MAGNITUDE) / self.log_gamma)
+        self.zero_index = self.max_exponent - self.min_exponent + 1
+
+        # The value in the middle of each bucket, in the sense that it is the same relative distance from both edges
+        exponents = np.arange(self.min_exponent, self.max_exponent + 1)
+        magnitudes = 2 * self.gamma ** exponents / (self.gamma + 1)
+        self.bucket_values = np.concatenate([-magnitudes[::-1], [0], magnitudes])
+
+        self.counts = np.zeros((series, len(self.bucket_values)), dtype=np.int64)
+        self.count = 0
+        self.totals = np.zeros(series)
+
+        # The number of values up to and including each bucket, only worked out again when
+        # it is wanted after the values have changed
+        self.dirty = True
+        self.cumulative_counts = np.zeros_like(self.counts)
+
+    def indexes(self, values: np.ndarray) -> np.ndarray:
+        """
+        The bucket each value falls into
+        :param values:
+        :return:
+        """
+        magnitudes = np.abs(values)
+        exponents = np.ceil(np.log(np.clip(magnitudes, self.MIN_MAGNITUDE, self.MAX_MAGNITUDE)) / self.log_gamma)
+        offsets = np.clip(exponents, self.min_exponent, self.max_exponent) - self.min_exponent + 1
+        indexes = self.zero_index + np.sign(values) * offsets
+        return np.where(magnitudes < self.MIN_MAGNITUDE, self.zero_index, indexes).astype(np.intp)
+
+    def update(self, values: np.ndarray, sign: int):
+        """
+        Adds (sign 1) or removes (sign -1) many values at once
+        :param values: Array of shape (n, series), or (n,) if there is one series
+        :param sign:
+        :return:
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), self.series)
+        if len(values) == 0:
+            return
+
+        rows = np.broadcast_to(np.arange(self.series), values.shape)
+        np.add.at(self.counts, (rows, self.indexes(values)), sign)
+        self.count += sign * len(values)
+        self.totals += sign * values.sum(axis=0)
+        self.dirty = True
+
+    def add(self, values: np.ndarray):
+        self.update(values, 1)
+
+    def remove(self, values: np.ndarray):
+        self.update(values, -1)
+
+    def cumulative(self) -> np.ndarray:
+        if self.dirty:
+            self.dirty = False
+            np.cumsum(self.counts, axis=1, out=self.cumulative_counts)
+        return self.cumulative_counts
+
+    def means(self) -> np.ndarray | None:
+        return self.totals / self.count if self.count > 0 else None
+
+    def quantiles(self, fractions: list[float]) -> np.ndarray | None:
+        """
+        The values that each fraction of the values are below, like sorting the values and taking
+        the one at index int(fraction * count), for every series
+        :param fractions: Each between 0 and 1
+        :return: Array of shape (series, len(fractions)), or None if there are no values
+        """
+        if self.count <= 0:
+            return None
+
+        targets = np.minimum((np.asarray(fractions) * self.count).astype(np.int64), self.count - 1)
+        buckets = np.array([np.searchsorted(row, targets, side='right') for row in self.cumulative()])
+        return self.bucket_values[buckets]
+
+    def mean(self, series: int = 0) -> float | None:
+        return float(self.totals[series] / self.count) if self.count > 0 else None
+
+    def quantile(self, fraction: float, series: int = 0) -> float | None:
+        if self.count <= 0:
+            return None
+
+        target = min(int(fraction * self.count), self.count - 1)
+        return float(self.bucket_values[np.searchsorted(self.cumulative()[series], target, side='right')])
+
+    def rank(self, value: float, series: int = 0) -> float:
+        """
+        The fraction of the values that are below value
+        :param value:
+        :param series:
+        :return:
+        """
+        if self.count <= 0:
+            return 0.0
+
+        # Values in the same bucket as this one count as half below it
+        bucket = int(self.indexes(np.array([value]))[0])
+        same = self.counts[series, bucket]
+        return float(self.cumulative()[series, bucket] - same / 2) / self.count
+
+    def histogram(self, bins: int = 10, series: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The values counted into equal width bins between the smallest and largest bucket used
+        :param bins:
+        :param series:
+        :return: The counts and the bin edges, the same as numpy.histogram
+        """
+        used = self.counts[series].nonzero()[0]
+        return np.histogram(self.bucket_values[used], bins=bins, weights=self.counts[series, used])
+
+
+class PopulationStatistics:
+    def __init__(self, creatures: Iterable = (), relative_accuracy: float = 0.01):
+        """
+        Follows the distribution of every gene across the population as creatures are born and die, so the
+        panel and the characteristics can compare a creature to everyone else without going through
+        the whole population each time.
+
+        Only genes that can mutate are followed. They never change once a creature is born, so the same
+        value that was added is the one that is removed. Species and generation are data, and can change.
+        :param creatures:
+        :param relative_accuracy: How close the quantiles are to the real ones, relative to their size
+        """
+        self.relative_accuracy = relative_accuracy
+        self.attrs: tuple[str, ...] = ()
+        self.sketch: QuantileSketch | None = None
+        # Where the followed genes are in the value array of each schema
+        self.columns: dict[GeneSchema, np.ndarray] = {}
+
+        # Goes up every time the population changes, so the summary is only worked out once per change
+        self.version = 0
+        self.summary_version = -1
+        self.cached_summary: dict[str, dict[str, float]] = {}
+
+        self.add_many(creatures)
+
+    def __len__(self):
+        return self.sketch.count if self.sketch is not None else 0
+
+    def update(self, genes_list: list[CreatureGenes], sign: int):
+        if len(genes_list) == 0:
+            return
+
+        if self.sketch is None:
+            schema = genes_list[0].schema
+            self.attrs = tuple(attr for index, attr in enumerate(schema.attrs) if schema.can_mutate[index])
+            self.sketch = QuantileSketch(len(self.attrs), self.relative_accuracy)
+
+        rows = []
+        for genes in genes_list:
+            columns = self.columns.get(genes.schema)
+            if columns is None:
+                columns = np.array([genes.schema.indexes[attr] for attr in self.attrs], dtype=np.intp)
+                self.columns[genes.schema] = columns
+            rows.append(np.frombuffer(genes.values)[columns])
+
+        self.sketch.update(np.array(rows), sign)
+        self.version += 1
+
+    def add_many(self, creatures: Iterable):
+        self.update([creature.genes for creature in creatures], 1)
+
+    def remove_many(self, creatures: Iterable):
+        self.update([creature.genes for creature in creatures], -1)
+
+    def mean(self, attr: str) -> float | None:
+        return self.sketch.mean(self.attrs.index(attr)) if self.sketch is not None else None
+
+    def quantile(self, attr: str, fraction: float) -> float | None:
+        return self.sketch.quantile(fraction, self.attrs.index(attr)) if self.sketch is not None else None
+
+    def rank(self, attr: str, value: float) -> float:
+        """
+        The fraction of the population with a smaller value of the gene
+        :param attr:
+        :param value:
+        :return:
+        """
+        return self.sketch.rank(value, self.attrs.index(attr)) if self.sketch is not None else 0.0
+
+    def histogram(self, attr: str, bins: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        return self.sketch.histogram(bins, self.attrs.index(attr))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        The count, mean and quartiles of every gene. It is only worked out again after the population changes,
+        so asking for it every frame costs nothing. The dictionary is never changed once it is given out,
+        so it can be kept in a snapshot
+        :return:
+        """
+        if self.summary_version != self.version:
+            self.summary_version = self.version
+            self.cached_summary = {}
+            if self.sketch is not None and self.sketch.count > 0:
+                means = self.sketch.means().tolist()
+                quartiles = self.sketch.quantiles([0.25, 0.5, 0.75]).tolist()
+                self.cached_summary = {attr: {'count': self.sketch.count, 'mean': mean,
+                                              'q1': q1, 'median': median, 'q3': q3}
+                                       for attr, mean, (q1, median, q3) in zip(self.attrs, means, quartiles)}
+        return self.cached_summary
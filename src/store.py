@@ -0,0 +1,69 @@
+from typing import Iterable, Iterator
+
+from src.entity import Creature, Food
+
+
+class EntityStore:
+    def __init__(self, entities: Iterable[Creature | Food] = ()):
+        """
+        Holds the creatures or food of a world in a list, with a dictionary from entity ID to its index in the list.
+        Removing an entity moves the last entity into its place, so it doesn't have to shift everything after it.
+        That means the order changes when entities are removed, so nothing should depend on it.
+
+        It can be used like a list for reading: iterating, len(), indexing and random.choice all work.
+        :param entities:
+        """
+        self.entities: list[Creature | Food] = []
+        self.indexes: dict[int, int] = {}
+
+        for entity in entities:
+            self.append(entity)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self) -> Iterator[Creature | Food]:
+        return iter(self.entities)
+
+    def __getitem__(self, index: int) -> Creature | Food:
+        return self.entities[index]
+
+    def __contains__(self, entity: Creature | Food) -> bool:
+        return entity.id in self.indexes
+
+    def __add__(self, other) -> list[Creature | Food]:
+        return self.entities + list(other)
+
+    def get(self, entity_id: int) -> Creature | Food | None:
+        index = self.indexes.get(entity_id)
+        return self.entities[index] if index is not None else None
+
+    def append(self, entity: Creature | Food):
+        self.indexes[entity.id] = len(self.entities)
+        self.entities.append(entity)
+
+    def extend(self, entities: Iterable[Creature | Food]):
+        for entity in entities:
+            self.append(entity)
+
+    def remove(self, entity: Creature | Food):
+        """
+        Removes an entity by moving the last entity into its place
+        :param entity:
+        :return:
+        """
+        index = self.indexes.pop(entity.id)
+        last = self.entities.pop()
+        if index != len(self.entities):
+            self.entities[index] = last
+            self.indexes[last.id] = index
+
+    def remove_many(self, entities: Iterable[Creature | Food]):
+        """
+        Removes every entity given, skipping any that were already removed
+        :param entities:
+        :return:
+        """
+        for entity in entities:
+            if entity.id in self.indexes:
+                self.remove(entity)
@@ -1,101 +1,632 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
 from logs import log
 from src.entity import BaseEntity
+from src.occupancy import OccupancyIndex
 
 from datetime import datetime
 
 
-class Node:
-    def __init__(self, data: BaseEntity, depth: int, left_node, right_node):
-        self.data = data
-        self.left_child = left_node
-        self.right_child = right_node
-        self.depth = depth
+class KDTree:
+    def __init__(self, points: list, depth: int = 0, rebalance_ratio: float = 0.25, depth_factor: float = 3):
+        """
+        A KD-Tree that can be updated when entities are added, removed or moved.
+        Removed nodes are only marked as deleted, and new nodes are added as leaves, so the tree
+        slowly gets worse. It is rebuilt once it crosses one of the thresholds:
 
-    def __repr__(self):
-        try:
-            left_data = self.left_child.data
-        except AttributeError:
-            left_data = None
+        rebalance_ratio is the fraction of nodes that can be marked as deleted.
+        depth_factor is how many times deeper than a balanced tree the deepest leaf can be.
 
-        try:
-            right_data = self.right_child.data
-        except AttributeError:
-            right_data = None
+        The nodes are not objects. Each node is an index into a set of arrays:
+        xs and ys are the coordinates the node was placed at, left and right are the indexes of its
+        children (-1 if there isn't one), and ids is the ID of the entity it holds.
+        Entities move after they are put in the tree, so the tree is searched using xs and ys
+        and not the entity's current coordinates.
 
-        return f"DEPTH {self.depth}   Left: {left_data} Data: {self.data} Right: {right_data}"
+        The arrays are typed arrays from the array module. They are contiguous like NumPy arrays, so NumPy
+        can use them without copying (see array_view), but reading one value at a time is much faster.
+        :param points:
+        :param depth:
+        :param rebalance_ratio:
+        :param depth_factor:
+        """
+        # Stacks used by searches. Each search takes one and gives it back when it is done,
+        # so searches don't share a stack and can run at the same time (or inside each other)
+        self.stack_pool: list[list[int]] = []
+        self.entities: dict[int, BaseEntity] = {}
+        self.entity_nodes: dict[int, int] = {}
+        # Where every entity was placed, for checking if a point is taken without searching the tree
+        self.occupancy = OccupancyIndex()
+        self.size = 0
+        self.root = -1
+        self.deleted_count = 0
+        self.max_depth = 0
+        self.start_depth = depth
+        self.rebalance_ratio = rebalance_ratio
+        self.depth_factor = depth_factor
+        self.rebuild_count = 0
 
+        start = datetime.now()
+        self.root = self.__create_tree(points, depth)
+        log("Tree of size %s created in %s", self.size, datetime.now() - start)
+
+    def __len__(self):
+        return self.size - self.deleted_count
+
+    def array_view(self, values: array) -> np.ndarray:
+        """
+        Gets a NumPy array that uses the same memory as one of the tree's arrays.
+        The tree can't add nodes while a view exists, so views should not be kept around.
+        :param values:
+        :return:
+        """
+        return np.frombuffer(values, dtype=values.typecode, count=self.size)
+
+    def __create_tree(self, entities: list[BaseEntity], depth: int = 0) -> int:
+        """
+        Builds a balanced tree in O(n log n), one depth at a time.
+        The entities are sorted once along each axis, and at every depth each sorted list is split around the
+        median of every subtree, which keeps both halves sorted. Every subtree on a depth is split at once.
+
+        Nodes are stored in pre-order, so the root is always node 0.
+        The tree is the same as sorting at every depth would make, including how equal coordinates are split.
+        :param entities:
+        :param depth:
+        :return: The index of the root node
+        """
+        count = len(entities)
+        self.size = count
+        self.entities = {entity.id: entity for entity in entities}
+        self.entity_nodes = {}
+
+        node_xs = np.zeros(count, dtype=np.float64)
+        node_ys = np.zeros(count, dtype=np.float64)
+        node_left = np.full(count, -1, dtype=np.int64)
+        node_right = np.full(count, -1, dtype=np.int64)
+        node_depths = np.zeros(count, dtype=np.int64)
+        node_ids = np.zeros(count, dtype=np.int64)
+
+        coordinates = np.array([entity.get_coordinates() for entity in entities], dtype=np.float64).reshape(count, 2)
+        x, y = coordinates[:, 0], coordinates[:, 1]
+        ids = np.fromiter((entity.id for entity in entities), dtype=np.int64, count=count)
+        indexes = np.arange(count)
+
+        # Sorting at every depth is stable, so equal coordinates keep the order from the depth above.
+        # The first sort keeps the order they were given in, and every sort after is tied by the other axis.
+        # np.lexsort sorts by the last key first
+        selection = np.lexsort((indexes, coordinates[:, depth % 2]))
+        orders = [np.lexsort((indexes, y, x)), np.lexsort((indexes, x, y))]
+
+        # Each subtree is a segment of the sorted lists, and starts at the pre-order position of its root
+        segment_starts = np.array([0] if count != 0 else [], dtype=np.int64)
+        segment_lengths = np.array([count] if count != 0 else [], dtype=np.int64)
+        sides = np.zeros(count, dtype=np.int64)
+        segments = np.zeros(count, dtype=np.int64)
+
+        while len(segment_lengths) != 0:
+            offsets = np.cumsum(segment_lengths) - segment_lengths
+            middles = segment_lengths // 2
+            medians = selection[offsets + middles]
+            left_lengths = middles
+            right_lengths = segment_lengths - middles - 1
+
+            node_xs[segment_starts] = x[medians]
+            node_ys[segment_starts] = y[medians]
+            node_ids[segment_starts] = ids[medians]
+            node_depths[segment_starts] = depth
+            node_left[segment_starts] = np.where(left_lengths > 0, segment_starts + 1, -1)
+            node_right[segment_starts] = np.where(right_lengths > 0, segment_starts + 1 + middles, -1)
+
+            # Mark each entity as being on the left (-1) or right (1) of its subtree's median
+            segment_of = np.repeat(np.arange(len(segment_lengths)), segment_lengths)
+            positions = np.arange(len(selection)) - offsets[segment_of]
+            sides[selection] = np.sign(positions - middles[segment_of])
+            segments[selection] = segment_of
+
+            # Every subtree becomes a left and a right subtree. Grouping by those while keeping the order
+            # leaves both lists sorted inside each new subtree
+            for axis in range(2):
+                remaining = orders[axis][sides[orders[axis]] != 0]
+                new_segments = 2 * segments[remaining] + (sides[remaining] > 0)
+                orders[axis] = remaining[np.argsort(new_segments, kind='stable')]
+
+            new_starts = np.stack([segment_starts + 1, segment_starts + 1 + middles], axis=1).ravel()
+            new_lengths = np.stack([left_lengths, right_lengths], axis=1).ravel()
+            segment_starts = new_starts[new_lengths > 0]
+            segment_lengths = new_lengths[new_lengths > 0]
+
+            depth += 1
+            selection = orders[depth % 2]
+
+        self.xs = array('d', node_xs.tobytes())
+        self.ys = array('d', node_ys.tobytes())
+        self.left = array('q', node_left.tobytes())
+        self.right = array('q', node_right.tobytes())
+        self.depths = array('q', node_depths.tobytes())
+        self.ids = array('q', node_ids.tobytes())
+        self.deleted = array('b', bytes(count))
+
+        self.max_depth = max(depth - 1, self.start_depth)
+        self.entity_nodes = dict(zip(node_ids.tolist(), range(count)))
+
+        self.occupancy.clear()
+        for point in coordinates.tolist():
+            self.occupancy.add(tuple(point))
+        return 0 if count != 0 else -1
+
+    def rebuild(self):
+        """
+        Builds the tree again from every entity that is still in it, using their current coordinates
+        :return:
+        """
+        entities = list(self.entities.values())
+
+        self.deleted_count = 0
+        self.rebuild_count += 1
 
-class KDTree:
-    def __init__(self, points: list, depth: int = 0):
-        self.points = []
-        self.nodes = []
-        self.queue = []
         start = datetime.now()
-        self.__create_tree(points, depth)
-        log(f"Tree of size {len(self.nodes)} created in {datetime.now() - start}")
+        self.root = self.__create_tree(entities, self.start_depth)
+        log("Tree of size %s rebalanced in %s", self.size, datetime.now() - start)
 
-    def __create_tree(self, entities: list[BaseEntity], depth: int = 0):
-        axis = depth % 2
-        if len(entities) != 0:
-            entities.sort(key=lambda i: (i.x if axis == 0 else i.y))
-            middle_value = len(entities) // 2
-            median = entities[middle_value]
+    def needs_rebalance(self) -> bool:
+        """
+        Checks if the tree has degraded enough from the insertions and deletions to be rebuilt
+        :return:
+        """
+        if self.deleted_count > self.rebalance_ratio * self.size:
+            return True
 
-            left = self.__create_tree(entities[0:middle_value], depth + 1)
-            right = self.__create_tree(entities[middle_value + 1:], depth + 1)
+        balanced_depth = math.log2(len(self) + 1)
+        return self.max_depth - self.start_depth > self.depth_factor * balanced_depth + 1
 
-            node = Node(median, depth, left, right)
-            self.nodes.insert(0, node)
-            self.points.append(median.get_coordinates())
-            return node
+    def insert(self, entity: BaseEntity):
+        """
+        Adds an entity to the tree as a new leaf node.
+        Points smaller than the node on the axis go to the left, everything else goes to the right.
+        :param entity:
+        :return:
+        """
+        point = entity.get_coordinates()
+        parent = -1
+        current_node = self.root
+        depth = self.start_depth
 
-    def find(self, point: tuple[float, float]) -> bool | BaseEntity:
+        while current_node != -1:
+            parent = current_node
+            node_value = self.xs[current_node] if depth % 2 == 0 else self.ys[current_node]
+            if point[depth % 2] < node_value:
+                current_node = self.left[current_node]
+            else:
+                current_node = self.right[current_node]
+            depth += 1
+
+        node = self.size
+        self.size += 1
+        self.xs.append(point[0])
+        self.ys.append(point[1])
+        self.ids.append(entity.id)
+        self.depths.append(depth)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.deleted.append(False)
+
+        if parent == -1:
+            self.root = node
+        elif point[(depth - 1) % 2] < (self.xs[parent] if (depth - 1) % 2 == 0 else self.ys[parent]):
+            self.left[parent] = node
+        else:
+            self.right[parent] = node
+
+        self.entities[entity.id] = entity
+        self.entity_nodes[entity.id] = node
+        self.occupancy.add(point)
+        self.max_depth = max(self.max_depth, depth)
+
+        if self.needs_rebalance():
+            self.rebuild()
+
+    def delete(self, entity: BaseEntity):
+        """
+        Marks the entity's node as deleted. The node stays in the tree to keep the structure
+        intact, but it is never returned by a search again.
+        :param entity:
+        :return:
         """
-        Checks through the points list to see if the point exists in the tree
+        node = self.entity_nodes.pop(entity.id, None)
+        if node is not None:
+            self.entities.pop(entity.id)
+            self.deleted[node] = True
+            self.deleted_count += 1
+            self.occupancy.remove((self.xs[node], self.ys[node]))
+
+            if self.needs_rebalance():
+                self.rebuild()
+
+    def move(self, entity: BaseEntity):
+        """
+        Updates the position of an entity that is already in the tree.
+        Entities that have not moved since they were placed are left alone.
+        :param entity:
+        :return:
+        """
+        node = self.entity_nodes.get(entity.id)
+        if node is None:
+            self.insert(entity)
+        elif self.xs[node] != entity.x or self.ys[node] != entity.y:
+            self.delete(entity)
+            self.insert(entity)
+
+    def __search_box(self, bounds: tuple[tuple[float, float], tuple[float, float]],
+                     exclude: tuple[float, float] = None) -> list[int]:
+        """
+        Goes down the tree using a stack, and discards any subtrees that can't be inside the box.
+        The left subtree only has coordinates smaller or equal to the node, so it can only be inside the box
+        if the node is past the box's lower bound, and the right subtree only if the node is before the upper bound.
+
+        :param bounds: The lower and upper bounds of the box on each axis
+        :param exclude: Coordinates to leave out of the result, normally the point the search is for
+        :return: The indexes of the nodes inside the box
+        """
+        # Another thread can take the last pooled stack between checking and popping, so just try to pop one
+        try:
+            stack = self.stack_pool.pop()
+        except IndexError:
+            stack = []
+        found_nodes = []
+        (x_lower, x_upper), (y_lower, y_upper) = bounds
+        xs, ys, left, right, depths, deleted = self.xs, self.ys, self.left, self.right, self.depths, self.deleted
+
+        try:
+            if self.root != -1:
+                stack.append(self.root)
+
+            while len(stack) != 0:
+                current_node = stack.pop()
+                x = xs[current_node]
+                y = ys[current_node]
+
+                if depths[current_node] % 2 == 0:
+                    value, lower, upper = x, x_lower, x_upper
+                else:
+                    value, lower, upper = y, y_lower, y_upper
+
+                if lower <= value and left[current_node] != -1:
+                    stack.append(left[current_node])
+                if value <= upper and right[current_node] != -1:
+                    stack.append(right[current_node])
+
+                if x_lower <= x <= x_upper and y_lower <= y <= y_upper and not deleted[current_node] and \
+                        (x, y) != exclude:
+                    found_nodes.append(current_node)
+        finally:
+            stack.clear()
+            self.stack_pool.append(stack)
+
+        return found_nodes
+
+    def find(self, point: tuple[float, float], spacing: float = 0) -> bool:
+        """
+        Checks if an entity is at the point, or closer to it than the spacing.
+        Uses the occupancy index, so it doesn't have to go down the tree.
         :param point:
+        :param spacing:
         :return:
         """
-        return point in self.points
+        return self.occupancy.near(point, spacing)
 
     def range_search(self, point: tuple[float, float], topleft: tuple[float, float],
-                     bottomright: tuple[float, float]):
+                     bottomright: tuple[float, float], sort: bool = False, k: int = None):
         """
-        Performs a Breadth First Search and discards any subtrees that the point can't fall into.
+        Finds every entity inside the search box, apart from ones exactly at the point.
         topleft and bottomright are the coordinates of the search box.
+        Only node indexes are collected during the search, and they are turned into entities at the end.
+
+        The entities are in no particular order, unless sort is True, which sorts them by distance from the point.
+        If k is given, only the k closest entities are returned (sorted), without sorting all of them.
 
         :param point:
         :param topleft:
         :param bottomright:
+        :param sort:
+        :param k:
         :return:
         """
-        points_list = []
-        self.queue.append(self.nodes[0])
+        found_nodes = self.__search_box(((topleft[0], bottomright[0]), (bottomright[1], topleft[1])), point)
+        points_list = [self.entities[self.ids[node]] for node in found_nodes]
 
-        while len(self.queue) != 0:
-            current_node: Node = self.queue.pop(0)
-            depth = current_node.depth
-            axis = depth % 2
-            opposite = (depth + 1) % 2
+        if k is not None:
+            return heapq.nsmallest(k, points_list, key=lambda pt: (pt.x - point[0])**2 + (pt.y - point[1])**2)
+        if sort:
+            points_list.sort(key=lambda pt: (pt.x - point[0])**2 + (pt.y - point[1])**2)
+        return points_list
 
-            lb = topleft[axis] if axis == 0 else bottomright[axis]
-            ub = bottomright[axis] if axis == 0 else topleft[axis]
+    def __search_radius(self, point: tuple[float, float], radius: float) -> list[tuple[float, int]]:
+        """
+        Goes down the tree like __search_box, but uses the distance from the point to each subtree's region.
+        Every stack entry keeps how far the region is from the point on each axis. Only the far child of a node
+        gets further away, on the node's axis, so the region is skipped once it is further away than the radius.
+        This skips the corners of the box around the circle, which __search_box would visit.
 
-            if lb <= current_node.data.get_coordinates()[axis] <= ub:
-                if current_node.left_child is not None:
-                    self.queue.append(current_node.left_child)
-                if current_node.right_child is not None:
-                    self.queue.append(current_node.right_child)
+        :param point:
+        :param radius:
+        :return: The squared distance and index of every node inside the circle
+        """
+        try:
+            stack = self.stack_pool.pop()
+        except IndexError:
+            stack = []
+        found_nodes = []
+        point_x, point_y = point
+        limit = radius * radius
+        xs, ys, left, right, depths, deleted = self.xs, self.ys, self.left, self.right, self.depths, self.deleted
 
-                lb = topleft[opposite] if opposite == 0 else bottomright[opposite]
-                ub = bottomright[opposite] if opposite == 0 else topleft[opposite]
+        try:
+            if self.root != -1:
+                stack.append((self.root, 0.0, 0.0))
 
-                if lb <= current_node.data.get_coordinates()[opposite] <= ub and current_node.data.get_coordinates() != point:
-                    points_list.append(current_node.data)
+            while len(stack) != 0:
+                current_node, gap_x, gap_y = stack.pop()
+                x = xs[current_node]
+                y = ys[current_node]
+
+                distance = (x - point_x)**2 + (y - point_y)**2
+                if distance <= limit and not deleted[current_node] and (x != point_x or y != point_y):
+                    found_nodes.append((distance, current_node))
+
+                if depths[current_node] % 2 == 0:
+                    offset = point_x - x
+                    far_gap_x, far_gap_y = offset * offset, gap_y
+                else:
+                    offset = point_y - y
+                    far_gap_x, far_gap_y = gap_x, offset * offset
+
+                # The left subtree holds smaller or equal coordinates, so it is on the near side
+                # if the point is before the node, and the right subtree if it is after
+                if offset < 0:
+                    near_child, far_child = left[current_node], right[current_node]
+                else:
+                    near_child, far_child = right[current_node], left[current_node]
+
+                if far_child != -1 and far_gap_x + far_gap_y <= limit:
+                    stack.append((far_child, far_gap_x, far_gap_y))
+                if near_child != -1:
+                    stack.append((near_child, gap_x, gap_y))
+        finally:
+            stack.clear()
+            self.stack_pool.append(stack)
+
+        return found_nodes
+
+    def query_radius(self, point: tuple[float, float], radius: float, sort: bool = False, k: int = None):
+        """
+        Finds every entity within the radius of the point, apart from ones exactly at the point.
+        sort and k work the same as in range_search.
+        :param point:
+        :param radius:
+        :param sort:
+        :param k:
+        :return:
+        """
+        found_nodes = self.__search_radius(point, radius)
+
+        if k is not None:
+            found_nodes = heapq.nsmallest(k, found_nodes)
+        elif sort:
+            found_nodes.sort()
+        return [self.entities[self.ids[node]] for distance, node in found_nodes]
+
+    def query_knn(self, point: tuple[float, float], k: int, radius: float = math.inf):
+        """
+        Finds the k closest entities to the point (apart from ones exactly at the point), closest first.
+        The closest subtrees are searched first, and once k entities are found, every region further away
+        than the k-th closest entity is skipped.
+        :param point:
+        :param k:
+        :param radius: Entities further away than this are never returned
+        :return:
+        """
+        if k <= 0 or self.root == -1:
+            return []
+
+        point_x, point_y = point
+        xs, ys, left, right, depths, deleted = self.xs, self.ys, self.left, self.right, self.depths, self.deleted
+
+        # Regions are taken out closest first. closest keeps the k closest nodes found,
+        # as a max-heap using negative distances
+        regions = [(0.0, 0.0, 0.0, self.root)]
+        closest: list[tuple[float, int]] = []
+        limit = radius * radius
+
+        while len(regions) != 0:
+            region_distance, gap_x, gap_y, current_node = heapq.heappop(regions)
+            if region_distance > limit:
+                break
+
+            x = xs[current_node]
+            y = ys[current_node]
+            distance = (x - point_x)**2 + (y - point_y)**2
+            if distance <= limit and not deleted[current_node] and (x != point_x or y != point_y):
+                heapq.heappush(closest, (-distance, current_node))
+                if len(closest) > k:
+                    heapq.heappop(closest)
+                if len(closest) == k:
+                    limit = -closest[0][0]
+
+            if depths[current_node] % 2 == 0:
+                offset = point_x - x
+                far_entry = (offset * offset + gap_y, offset * offset, gap_y)
             else:
-                if point[axis] < current_node.data.get_coordinates()[axis] and current_node.left_child is not None:
-                    self.queue.append(current_node.left_child)
-                elif point[axis] > current_node.data.get_coordinates()[axis] and current_node.right_child is not None:
-                    self.queue.append(current_node.right_child)
+                offset = point_y - y
+                far_entry = (offset * offset + gap_x, gap_x, offset * offset)
 
-        points_list.sort(key=lambda pt: (pt.x - point[0])**2 + (pt.y - point[1])**2)
-        return points_list
+            if offset < 0:
+                near_child, far_child = left[current_node], right[current_node]
+            else:
+                near_child, far_child = right[current_node], left[current_node]
+
+            if near_child != -1:
+                heapq.heappush(regions, (region_distance, gap_x, gap_y, near_child))
+            if far_child != -1 and far_entry[0] <= limit:
+                heapq.heappush(regions, (*far_entry, far_child))
+
+        closest.sort(reverse=True)
+        return [self.entities[self.ids[node]] for distance, node in closest]
+
+    def range_search_many(self, centres: np.ndarray, half_sizes: np.ndarray,
+                          sort: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Does a range search for many boxes at once. Box i is centred on centres[i] and
+        reaches half_sizes[i] out on each side, the same box that range_search takes.
+
+        Instead of going down the tree once per box, every (box, node) pair on the same depth is
+        checked in one go, and only the pairs whose subtree can overlap the box carry on to the next depth.
+
+        The result is in compressed sparse row form: the IDs of the entities found in box i are
+        ids[indptr[i]:indptr[i + 1]]. Like range_search, they are only sorted by distance from the centre if sort is True.
+        :param centres: Array of shape (n, 2)
+        :param half_sizes: Array of shape (n,) or a single number
+        :param sort:
+        :return: indptr, ids
+        """
+        centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2)
+        query_count = len(centres)
+        half_sizes = np.broadcast_to(np.asarray(half_sizes, dtype=np.float64), (query_count,))
+
+        if self.root == -1 or query_count == 0:
+            return np.zeros(query_count + 1, dtype=np.int64), np.array([], dtype=np.int64)
+
+        xs, ys = self.array_view(self.xs), self.array_view(self.ys)
+        left, right = self.array_view(self.left), self.array_view(self.right)
+        depths, deleted = self.array_view(self.depths), self.array_view(self.deleted)
+
+        # Lower and upper bounds of each box, on each axis
+        lower = centres - half_sizes[:, None]
+        upper = centres + half_sizes[:, None]
+
+        queries = np.arange(query_count)
+        nodes = np.full(query_count, self.root, dtype=np.int64)
+        found_queries = []
+        found_nodes = []
+
+        while len(nodes) != 0:
+            node_xs = xs[nodes]
+            node_ys = ys[nodes]
+            axis = depths[nodes] % 2
+
+            inside = ((lower[queries, 0] <= node_xs) & (node_xs <= upper[queries, 0]) &
+                      (lower[queries, 1] <= node_ys) & (node_ys <= upper[queries, 1]) &
+                      (deleted[nodes] == 0) &
+                      ~((node_xs == centres[queries, 0]) & (node_ys == centres[queries, 1])))
+            found_queries.append(queries[inside])
+            found_nodes.append(nodes[inside])
+
+            # The left subtree only has coordinates smaller or equal to the node, so it can only overlap
+            # the box if the node is past the box's lower bound. The right subtree is the opposite
+            values = np.where(axis == 0, node_xs, node_ys)
+            go_left = lower[queries, axis] <= values
+            go_right = values <= upper[queries, axis]
+
+            nodes = np.concatenate([left[nodes[go_left]], right[nodes[go_right]]])
+            queries = np.concatenate([queries[go_left], queries[go_right]])
+            queries = queries[nodes != -1]
+            nodes = nodes[nodes != -1]
+
+        found_queries = np.concatenate(found_queries)
+        found_nodes = np.concatenate(found_nodes)
+
+        if sort:
+            distances = (xs[found_nodes] - centres[found_queries, 0])**2 + (ys[found_nodes] - centres[found_queries, 1])**2
+            order = np.lexsort((distances, found_queries))
+        else:
+            order = np.argsort(found_queries, kind='stable')
+
+        indptr = np.zeros(query_count + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(found_queries, minlength=query_count))
+        return indptr, self.array_view(self.ids)[found_nodes[order]]
+
+    def query_radius_many(self, centres: np.ndarray, radii: np.ndarray, sort: bool = False,
+                          k: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Does a radius search for many circles at once, in the same way as range_search_many.
+        Each (circle, node) pair keeps how far the node's region is from the centre on each axis,
+        so regions outside the circle are dropped even if they are inside its box.
+
+        If k is given, only the k closest entities to each centre are kept, closest first.
+        :param centres: Array of shape (n, 2)
+        :param radii: Array of shape (n,) or a single number
+        :param sort:
+        :param k:
+        :return: indptr, ids
+        """
+        centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2)
+        query_count = len(centres)
+        limits = np.broadcast_to(np.asarray(radii, dtype=np.float64), (query_count,)) ** 2
+
+        if self.root == -1 or query_count == 0:
+            return np.zeros(query_count + 1, dtype=np.int64), np.array([], dtype=np.int64)
+
+        xs, ys = self.array_view(self.xs), self.array_view(self.ys)
+        left, right = self.array_view(self.left), self.array_view(self.right)
+        depths, deleted = self.array_view(self.depths), self.array_view(self.deleted)
+
+        queries = np.arange(query_count)
+        nodes = np.full(query_count, self.root, dtype=np.int64)
+        gaps = np.zeros((query_count, 2), dtype=np.float64)
+        found_queries = []
+        found_nodes = []
+        found_distances = []
+
+        while len(nodes) != 0:
+            node_points = np.stack([xs[nodes], ys[nodes]], axis=1)
+            offsets = centres[queries] - node_points
+            distances = (offsets ** 2).sum(axis=1)
+
+            inside = (distances <= limits[queries]) & (deleted[nodes] == 0) & (distances != 0)
+            found_queries.append(queries[inside])
+            found_nodes.append(nodes[inside])
+            found_distances.append(distances[inside])
+
+            # The near child has the same gaps as the node. The far child is further away on the node's axis
+            axis = depths[nodes] % 2
+            rows = np.arange(len(nodes))
+            axis_offsets = offsets[rows, axis]
+            far_gaps = gaps.copy()
+            far_gaps[rows, axis] = axis_offsets ** 2
+            keep_far = far_gaps.sum(axis=1) <= limits[queries]
+
+            near_children = np.where(axis_offsets < 0, left[nodes], right[nodes])
+            far_children = np.where(axis_offsets < 0, right[nodes], left[nodes])
+
+            nodes = np.concatenate([near_children, far_children[keep_far]])
+            queries = np.concatenate([queries, queries[keep_far]])
+            gaps = np.concatenate([gaps, far_gaps[keep_far]])
+            queries = queries[nodes != -1]
+            gaps = gaps[nodes != -1]
+            nodes = nodes[nodes != -1]
+
+        found_queries = np.concatenate(found_queries)
+        found_nodes = np.concatenate(found_nodes)
+        found_distances = np.concatenate(found_distances)
+
+        if sort or k is not None:
+            order = np.lexsort((found_distances, found_queries))
+        else:
+            order = np.argsort(found_queries, kind='stable')
+        found_queries = found_queries[order]
+        found_nodes = found_nodes[order]
+
+        counts = np.bincount(found_queries, minlength=query_count)
+        if k is not None:
+            # Each query's results are sorted, so the first k of every query are its closest
+            starts = np.cumsum(counts) - counts
+            ranks = np.arange(len(found_queries)) - starts[found_queries]
+            found_nodes = found_nodes[ranks < k]
+            counts = np.minimum(counts, k)
+
+        indptr = np.zeros(query_count + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(counts)
+        return indptr, self.array_view(self.ids)[found_nodes]
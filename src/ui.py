@@ -2,11 +2,18 @@ import time
 
 import pygame
 from src.entity import Creature
+from src.snapshot import CreatureDetails
+from src.characteristics import generate_characteristics
 
 
 class TextDisplay:
+    # Fonts by size, so each one is only loaded from disk once
+    fonts: dict[int, pygame.font.Font] = {}
+
     def __init__(self, text: str, colour: tuple[int, int, int], size: int):
-        self.font = pygame.font.Font('resources/pixel_digivolve.otf', size)
+        if size not in TextDisplay.fonts:
+            TextDisplay.fonts[size] = pygame.font.Font('resources/pixel_digivolve.otf', size)
+        self.font = TextDisplay.fonts[size]
         self.text = self.font.render(text, False, colour)
         self.rect = pygame.Rect(0, 0, self.text.get_width(), self.text.get_height())
 
@@ -102,13 +109,18 @@ class SmallContentDisplay:
 
 
 class LargeContentDisplay:
+    # Background images by name, so they are only loaded from disk once. They are never drawn on
+    images: dict[str, pygame.Surface] = {}
+
     def __init__(self, title_text: str, content: str, long: bool = False):
         if long:
             image = 'longcontentdisplay2'
         else:
             image = 'largecontentdisplay'
 
-        self.image = pygame.image.load(f'resources/screens/components/{image}.png')
+        if image not in LargeContentDisplay.images:
+            LargeContentDisplay.images[image] = pygame.image.load(f'resources/screens/components/{image}.png')
+        self.image = LargeContentDisplay.images[image]
         self.rect = pygame.Rect(0, 0, self.image.get_width(), self.image.get_height())
 
         self.title = TextDisplay(title_text, (73, 82, 69), 35)
@@ -150,30 +162,64 @@ class SaveSlotDisplay(LargeContentDisplay):
 
 
 class CreatureCharacteristicsDisplay(LargeContentDisplay):
-    def __init__(self, creature: Creature):
-        display_content = (f"ID: {creature.id}\n"
-                           f"Species ID: {creature.genes.species.value}\n"
-                           f"Generation: {creature.genes.generation.value}\n"
-                           f"Energy: {round(creature.energy)} e\n"
-                           f"Position: [{round(creature.get_coordinates()[0])}, {round(creature.get_coordinates()[1])}]\n\n"
-                           f"---------- GENES ---------\n"
-                           f"Colour: [{creature.genes.colour_red.value}, {creature.genes.colour_green.value}, "
-                           f"{creature.genes.colour_blue.value}]\n"
-                           f"Size: {creature.genes.radius.get_value()*2} px\n"
-                           f"Speed: {creature.genes.speed.get_value()} px/s\n"
-                           f"Vision Radius: {creature.genes.vision_radius.get_value()} px\n"
-                           f"Vision Angle: {creature.genes.vision_angle.get_value()} °\n"
-                           f"Reaction Speed: {creature.genes.react_speed.get_value()} °/s\n\n\n"
-                           f"--- ENERGY CONSUMPTION ---\n"
-                           f"Base: {creature.genes.base_energy.get_value()} e/s\n"
-                           f"Movement: {creature.genes.movement_energy.get_value()} e/px\n"
-                           f"Turning: {creature.genes.turning_energy.get_value()} e/°\n"
-                           f"Birthing: {round(creature.genes.birth_energy.value)} e\n"
-                           f"Food: {creature.genes.plant_energy.get_value()*100}% of Plant food\n\n\n"
-                           f"-- REACTION PROBABILITIES --\n"
-                           f"Towards Something: {creature.genes.react_towards.get_value()}\n"
-                           f"Towards Food: {creature.genes.react_towards.get_value() + creature.genes.food_offset.get_value()}\n"
-                           f"Towards Stranger: {creature.genes.react_towards.get_value() + creature.genes.stranger_offset.get_value()}\n"
-                           f"Towards Same Species: {creature.genes.react_towards.get_value() + creature.genes.known_offset.get_value()}")
-
-        super().__init__("Creature Stats", display_content, long=True)
+    # Where the energy and position are in the content, the only lines that change while the creature is shown
+    LIVE_LINES = (3, 4)
+
+    def __init__(self, creature: Creature | CreatureDetails, summary: dict[str, dict[str, float]] = None):
+        """
+        Everything but the energy and position only depends on the creature's genes and the summary,
+        so it is only made once. update() keeps the energy and position lines up to date.
+        :param creature: A creature, or its details from a snapshot
+        :param summary: PopulationStatistics.summary(), to show how the creature compares to the population
+        """
+        self.creature_id = creature.id
+        self.summary = summary
+        super().__init__("Creature Stats", self.content(creature, summary), long=True)
+        self.live_text = self.live_content(creature)
+
+    def update(self, creature: Creature | CreatureDetails):
+        """
+        Draws the energy and position lines again, if they have changed
+        :param creature: The same creature the display was made for
+        :return:
+        """
+        live_text = self.live_content(creature)
+        for index, line, old_line in zip(self.LIVE_LINES, live_text, self.live_text):
+            if line != old_line:
+                self.content[index] = TextDisplay(line, (102, 122, 103), 20)
+        self.live_text = live_text
+
+    @staticmethod
+    def live_content(creature: Creature | CreatureDetails) -> list[str]:
+        x, y = creature.get_coordinates()
+        return [f"Energy: {round(creature.energy)} e", f"Position: [{round(x)}, {round(y)}]"]
+
+    @staticmethod
+    def content(creature: Creature | CreatureDetails, summary: dict[str, dict[str, float]] = None) -> str:
+        traits = generate_characteristics(creature, summary or {})
+        speed_trait = f" ({traits['speed']})" if 'speed' in traits else ""
+        energy, position = CreatureCharacteristicsDisplay.live_content(creature)
+        return (f"ID: {creature.id}\n"
+                f"Species ID: {creature.genes.species.value}\n"
+                f"Generation: {creature.genes.generation.value}\n"
+                f"{energy}\n"
+                f"{position}\n\n"
+                f"---------- GENES ---------\n"
+                f"Colour: [{creature.genes.colour_red.value}, {creature.genes.colour_green.value}, "
+                f"{creature.genes.colour_blue.value}]\n"
+                f"Size: {creature.genes.radius.get_value()*2} px\n"
+                f"Speed: {creature.genes.speed.get_value()} px/s{speed_trait}\n"
+                f"Vision Radius: {creature.genes.vision_radius.get_value()} px\n"
+                f"Vision Angle: {creature.genes.vision_angle.get_value()} °\n"
+                f"Reaction Speed: {creature.genes.react_speed.get_value()} °/s ({traits['accuracy']})\n\n\n"
+                f"--- ENERGY CONSUMPTION ---\n"
+                f"Base: {creature.genes.base_energy.get_value()} e/s\n"
+                f"Movement: {creature.genes.movement_energy.get_value()} e/px\n"
+                f"Turning: {creature.genes.turning_energy.get_value()} e/°\n"
+                f"Birthing: {round(creature.genes.birth_energy.value)} e\n"
+                f"Food: {creature.genes.plant_energy.get_value()*100}% of Plant food\n\n\n"
+                f"-- REACTION PROBABILITIES --\n"
+                f"Towards Something: {creature.genes.react_towards.get_value()}\n"
+                f"Towards Food: {creature.genes.react_towards.get_value() + creature.genes.food_offset.get_value()}\n"
+                f"Towards Stranger: {creature.genes.react_towards.get_value() + creature.genes.stranger_offset.get_value()}\n"
+                f"Towards Same Species: {creature.genes.react_towards.get_value() + creature.genes.known_offset.get_value()}")
@@ -0,0 +1,71 @@
+import threading
+import time
+from time import monotonic
+
+from src.clock import FixedStepClock
+from src.snapshot import WorldSnapshot
+from src.world import World
+
+
+class SimulationWorker:
+    def __init__(self, world: World, clock: FixedStepClock):
+        """
+        Runs the simulation on its own thread, so drawing never takes time away from it.
+        The screen draws from snapshots of the world instead of the world itself.
+
+        There are two snapshots: the one being drawn, and the newest one. Whenever the screen takes the newest
+        snapshot, the worker is asked to make the next one after its current steps. The worker never waits for
+        drawing, and a snapshot is never changed once it is made, so the screen can take as long as it likes with it.
+
+        Anything else that reads the world while the worker is running (saving, graphs) should hold lock.
+        :param world:
+        :param clock: Decides how many steps to take, the same as when the simulation runs with the screen
+        """
+        self.world = world
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.snapshot = WorldSnapshot(world, clock.alpha)
+        self.snapshot_wanted = threading.Event()
+        self.steps = 0
+
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def take_snapshot(self) -> WorldSnapshot:
+        """
+        Gives the newest snapshot, and asks for the next one
+        :return:
+        """
+        snapshot = self.snapshot
+        self.snapshot_wanted.set()
+        return snapshot
+
+    def run(self):
+        last_time = monotonic()
+        while not self.stopped:
+            now = monotonic()
+            frame_seconds = now - last_time
+            last_time = now
+
+            with self.lock:
+                steps = 0
+                if not self.world.paused:
+                    steps = self.clock.run(self.world.step, frame_seconds, self.world.tick_speed)
+                    self.steps += steps
+
+                if self.snapshot_wanted.is_set():
+                    self.snapshot_wanted.clear()
+                    self.snapshot = WorldSnapshot(self.world, self.clock.alpha)
+
+            # Wait for the next step to be owed instead of spinning, which would also hold up the screen
+            if steps == 0:
+                time.sleep(self.clock.timestep / max(self.world.tick_speed, 1))
+
+    def stop(self):
+        self.stopped = True
+        if self.thread.is_alive():
+            self.thread.join()
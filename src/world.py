@@ -1,40 +1,66 @@
+import heapq
+import json
 import math
 
+import numpy as np
 import pygame
 
+from logs import events
 from src.entity import Creature, Food
 from src.genes import CreatureGenes
 from src.tree import KDTree
-from src.characteristics import generate_characteristics
+from src.grid import SpatialGrid
+from src.snapshot import WorldSnapshot, CreatureDetails
+from src.sprites import SpriteCache, GlyphCache
+from src.store import EntityStore
+from src.species import SpeciesIndex
+from src.statistics import PopulationStatistics
+from src.population import PopulationEngine
+from src.config import load_config
 from src.ui import CreatureCharacteristicsDisplay
 
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 import random
 
 
 class World:
-    def __init__(self, creature_image: pygame.Surface, food_image: pygame.Surface, world_size: int,
+    def __init__(self, creature_image: pygame.Surface | None, food_image: pygame.Surface | None, world_size: int,
                  creatures: list[Creature], foods: list[Food], largest_radius: float, tick_speed: int,
                  food_spawn_rate: int, seconds: float, delta_seconds: float, food_seconds: float, paused: bool,
                  creature_count: list, food_count: list, cum_increase_count: list, increase_count: list, time_data: list,
-                 specimens: dict[int, CreatureGenes], species_id: int):
+                 specimens: dict[int, CreatureGenes], species_id: int, spatial_index: str = None,
+                 engine: str = None):
         self.creature_image = creature_image
         self.food_image = food_image
 
         self.size = world_size
 
-        self.creatures = creatures
+        self.creatures = EntityStore(creatures)
         self.specimens = specimens
+        self.species_index = SpeciesIndex(specimens)
+        self.statistics = PopulationStatistics(self.creatures)
         self.species_id = species_id
         self.species_count = {}
-        self.food = foods
-        self.tree: KDTree = KDTree([])
-        self.largest_radius = largest_radius
-
+        self.food = EntityStore(foods)
+        # Goes up every time food is eaten or spawned, so anything drawn from the food knows when to redraw
+        self.food_version = 0
+        # The largest radius of any creature so far, which collisions are searched for. It only goes up
+        self.largest_radius = max([largest_radius] + [creature.radius for creature in creatures])
+
+        config = load_config()
+        self.spatial_index_type = spatial_index or config.get('spatial_index', {}).get('type', 'kdtree')
+        self.tree: KDTree | SpatialGrid = self.create_spatial_index()
+        self.neighbour_limit = config.get('spatial_index', {}).get('neighbour_limit')
+        self.engine_type = engine or config.get('simulation', {}).get('engine', 'objects')
+        self.engine = self.create_engine()
+        self.largest_speed = 0
+
+        self.food_spacing = config.get('food', {}).get('spacing', 0)
         self.food_spawnrate = food_spawn_rate
         self.food_second_split = 1 / food_spawn_rate
         self.tick_speed = tick_speed
+        self.max_tick_speed = config.get('simulation', {}).get('max_tick_speed', 64)
 
         self.min_food_energy = 1000
         self.max_food_energy = 100000
@@ -55,14 +81,20 @@ class World:
         self.increase = 0
 
         self.paused = paused
+        # Creatures only keep the entities they checked and saw, for the debug lines, while this is on
+        self.debug = False
 
     @classmethod
-    def load(cls, save_dict: dict, creature_image: pygame.Surface, food_image: pygame.Surface):
+    def load(cls, save_dict: dict, creature_image: pygame.Surface | None, food_image: pygame.Surface | None):
         """
         This method is used when loading from a save file. It takes all the data from the file
         and pushes it to __init__
+        The images are only used for drawing, so they can be None when running without a display.
         :return:
         """
+        # Event logs count ticks from the start of each world, including the entities it is made with
+        events.tick = 0
+
         creatures_list = []
         for creature in save_dict['creatures']:
             genes = CreatureGenes.load(creature['genes'])
@@ -78,7 +110,8 @@ class World:
                                        food['energy'], food['eaten']))
 
         species_dict = {}
-        for id, specimen in save_dict['specimens'].items():
+        # Older saves and presets were made before specimens were saved
+        for id, specimen in save_dict.get('specimens', {}).items():
             species_dict[id] = CreatureGenes.load(specimen)
 
         world_data = save_dict['world']
@@ -97,13 +130,15 @@ class World:
                    species_dict, world_data.get('species_id', 1))
 
     @classmethod
-    def create(cls, size: int, creature_image: pygame.Surface, food_image: pygame.Surface,
+    def create(cls, size: int, creature_image: pygame.Surface | None, food_image: pygame.Surface | None,
                food_spawn_rate: int,
                start_species: int = 4, start_creatures: int = 10, start_food: int = 500):
         """
         This method is used when creating a new world, normally when starting a new simulation.
         :return:
         """
+        # Event logs count ticks from the start of each world, including the entities it is made with
+        events.tick = 0
 
         creatures_list: list[Creature] = []
         specimens_dict: dict[int, CreatureGenes] = {}
@@ -143,70 +178,296 @@ class World:
                    seconds=0, food_seconds=0, paused=False, creature_count=[len(creatures_list)], food_count=[len(food_list)],
                    cum_increase_count=[0], increase_count=[0], time_data=[0], specimens=specimens_dict, species_id=species_id)
 
+    @classmethod
+    def from_preset(cls, preset: str, creature_image: pygame.Surface | None, food_image: pygame.Surface | None):
+        """
+        Creates the world for a preset, in the same way as choosing it from the menu.
+        The 'random' preset creates a new random world, and every other preset is loaded from the presets folder.
+        :param preset:
+        :param creature_image:
+        :param food_image:
+        :return:
+        """
+        if preset == 'random':
+            return cls.create(size=1500, start_species=10, start_creatures=100, start_food=5000,
+                              food_spawn_rate=40, creature_image=creature_image, food_image=food_image)
+
+        with open(f'presets/{preset}.json', 'r') as preset_file:
+            save_dict = json.load(preset_file)
+        return cls.load(save_dict, creature_image, food_image)
+
+    def save(self, preset: str | None) -> dict:
+        """
+        Gives everything about the world in the form of a save file. World.load does the opposite
+        :param preset:
+        :return:
+        """
+        save_dict = {
+            "save_data": {
+                "time": str(datetime.today()),
+                "preset": preset
+            },
+            "world": {
+                "size": self.size,
+                "largest_radius": self.largest_radius,
+                "food_spawn_rate": self.food_spawnrate,
+                "tick_speed": self.tick_speed,
+                "seconds": self.seconds,
+                "delta_seconds": self.delta_second,
+                "food_seconds": self.food_second,
+                "paused": self.paused,
+                "species_id": self.species_id
+            },
+            "specimens": {},
+            "creatures": [],
+            "food": [],
+            "data": {'creature_count': self.creature_count,
+                     'food_count': self.food_count,
+                     'cumulative_increase_count': self.cumulative_increase_count,
+                     'increase_count': self.increase_count,
+                     'death_count': self.cumulative_increase_count,
+                     'time': self.time_data}
+        }
+
+        for creature in self.creatures:
+            save_dict['creatures'].append({
+                "id": creature.id,
+                "energy": creature.energy,
+                "direction": creature.direction,
+                "dead": creature.dead,
+                "seeing": creature.seeing,
+                "memory_reaction": creature.memory_reaction,
+                "position": [creature.x, creature.y],
+                "genes": creature.genes.save()
+            })
+
+        for food in self.food:
+            save_dict['food'].append({
+                "id": food.id,
+                "eaten": food.eaten,
+                "energy": food.energy,
+                "position": [food.x, food.y]
+            })
+
+        for specimen_id, specimen in self.specimens.items():
+            save_dict['specimens'][specimen_id] = specimen.save()
+
+        return save_dict
+
+    def create_engine(self) -> PopulationEngine | None:
+        """
+        Makes the engine the creatures are stepped with, from the engine type in config.yml.
+        'objects' steps each Creature with Creature.tick, and 'numpy' uses a PopulationEngine
+        :return: The engine, or None for 'objects'
+        """
+        if self.engine_type == 'objects':
+            return None
+        elif self.engine_type == 'numpy':
+            return PopulationEngine.from_creatures(list(self.creatures), self.size)
+
+        raise ValueError(f"Unknown engine type '{self.engine_type}'. Choose 'objects' or 'numpy'")
+
+    def create_spatial_index(self) -> KDTree | SpatialGrid:
+        """
+        Creates the structure used to find the entities near each creature, chosen in config.yml.
+        The grid's cells are the size of the largest search box, so a search only checks the cells around it.
+        :return:
+        """
+        entities = self.creatures + self.food
+
+        if self.spatial_index_type == 'kdtree':
+            return KDTree(entities)
+        elif self.spatial_index_type == 'grid':
+            largest_vision = max([creature.genes.vision_radius.value for creature in self.creatures], default=0)
+            return SpatialGrid(entities, self.size, 2 * largest_vision + self.largest_radius)
+
+        raise ValueError(f"Unknown spatial index type '{self.spatial_index_type}'. Choose 'kdtree' or 'grid'")
+
     def tick_world(self, deltatime: float):
+        """
+        Runs tick_speed steps of the simulation, each deltatime seconds long
+        :param deltatime:
+        :return:
+        """
         for i in range(self.tick_speed):
-            self.seconds += deltatime
-            self.delta_second += deltatime
-            self.food_second += deltatime
+            self.step(deltatime)
 
-            self.tree = KDTree(self.creatures + self.food)
-            self.species_count = {}
+    def step(self, deltatime: float):
+        """
+        Moves the whole simulation forward by deltatime seconds
+        :param deltatime:
+        :return:
+        """
+        self.seconds += deltatime
+        self.delta_second += deltatime
+        self.food_second += deltatime
+        events.tick += 1
 
+        self.species_count = {}
+        eaten_food = []
+        dead_creatures = []
+        births = []
+        range_searches = self.range_search_creatures(deltatime)
+
+        if self.engine is None:
             for creature in self.creatures:
-                coordinates = creature.get_coordinates()
-                boxsize = 2 * creature.genes.vision_radius.value + self.largest_radius
-                creature_check = self.tree.range_search(coordinates,
-                                                        (coordinates[0] - boxsize, coordinates[1] + boxsize),
-                                                        (coordinates[0] + boxsize, coordinates[1] - boxsize))
-                creature.tick(deltatime, creature_check)
-
-                specimen_id = creature.genes.species.value
-                self.species_count[specimen_id] = self.species_count.get(specimen_id, 0) + 1
-
-                for food in creature.food_list:
-                    self.food.remove(food)
-
-                if creature.dead:
-                    self.cumulative_increase -= 1
-                    self.increase -= 1
-                    self.creatures.remove(creature)
-
-                if self.delta_second >= 1:
-                    creature.visible_entity = None
-
-                if creature.child is not None:
-                    self.cumulative_increase += 1
-                    self.increase += 1
-                    if self.check_for_new_species(creature.child.genes):
-                        creature.child.genes.species.value = self.species_id
-                        self.species_id += 1
-                    self.creatures.append(creature.child)
-                    creature.child = None
+                creature_check, vision_masks = range_searches[creature.id]
+                creature.tick(deltatime, creature_check, vision_masks, self.debug)
+        else:
+            self.engine_tick(deltatime, range_searches)
+
+        # Nothing is added to or removed from the world during the pass. Births and deaths are collected,
+        # and applied together afterwards
+        for creature in self.creatures:
+            specimen_id = creature.genes.species.value
+            self.species_count[specimen_id] = self.species_count.get(specimen_id, 0) + 1
+
+            eaten_food.extend(creature.food_list)
+
+            if creature.dead:
+                self.cumulative_increase -= 1
+                self.increase -= 1
+                dead_creatures.append(creature)
 
             if self.delta_second >= 1:
-                self.delta_second = 0
+                creature.visible_entity = None
+
+            # Children born outside the border die straight away, so they are never added
+            if creature.child is not None and not creature.child.dead:
+                self.cumulative_increase += 1
+                self.increase += 1
+                births.append(creature.child)
+            creature.child = None
+
+        self.assign_species(births)
+
+        self.food.remove_many(eaten_food)
+        self.creatures.remove_many(dead_creatures)
+        self.creatures.extend(births)
+        self.largest_radius = max([self.largest_radius] + [child.radius for child in births])
+        self.statistics.remove_many(dead_creatures)
+        self.statistics.add_many(births)
+        removed_entities = eaten_food + dead_creatures
+        if len(eaten_food) != 0:
+            self.food_version += 1
+
+        # Only the entities that changed are updated in the tree (or grid), instead of building it again every tick.
+        # Moving a creature that is not in the tree yet (a newborn) inserts it
+        for entity in removed_entities:
+            self.tree.delete(entity)
+        for creature in self.creatures:
+            self.tree.move(creature)
+
+        if self.delta_second >= 1:
+            self.delta_second = 0
+
+            self.time_data.append(self.seconds)
+            self.creature_count.append(len(self.creatures))
+            self.food_count.append(len(self.food))
+            self.cumulative_increase_count.append(self.cumulative_increase)
+            self.increase_count.append(self.increase)
+
+            self.increase = 0
+
+        if self.food_second >= self.food_second_split:
+            self.spawn_food()
+            self.food_second -= self.food_second_split
+
+    def engine_tick(self, deltatime: float, range_searches: dict[int, tuple]):
+        """
+        Runs Creature.tick for every creature, with the parts that don't need other entities (energy drain,
+        movement, bouncing off the border and death) done for the whole population at once by the engine.
+        Every creature senses first, then the whole population moves, then every creature collides,
+        so unlike going through Creature.tick one at a time, each creature collides with where
+        the others are after the step
+        :param deltatime:
+        :param range_searches: From range_search_creatures
+        :return:
+        """
+        creatures = list(self.creatures)
+        for creature in creatures:
+            creature.food_list = []
+            creature.previous_x, creature.previous_y = creature.x, creature.y
+            if not creature.dead:
+                creature_check, vision_masks = range_searches[creature.id]
+                creature.sense(deltatime, creature_check, vision_masks, self.debug)
+
+        engine = self.engine
+        engine.read(creatures)
+        alive = ~engine.dead
+        engine.drain(deltatime, alive)
+        engine.move(deltatime, alive)
+        engine.write(creatures)
+
+        for creature, moved in zip(creatures, alive.tolist()):
+            if moved:
+                creature.collide(range_searches[creature.id][0])
+
+        # Eating and colliding change the energy, so it is read again before checking who died
+        engine.energy = np.array([creature.energy for creature in creatures], dtype=np.float64)
+        engine.die()
+        for creature, dead in zip(creatures, engine.dead.tolist()):
+            creature.dead = dead
+
+    def search_radius(self, creature: Creature, deltatime: float) -> float:
+        """
+        How far away an entity can be and still matter to the creature this tick.
+        The creature sees up to its vision radius, and collides with anything closer than its radius plus the
+        largest radius. Both the creature and the other creatures move during the tick, so it also
+        reaches as far as the creature and the fastest creature can move.
+        :param creature:
+        :param deltatime:
+        :return:
+        """
+        reach = max(creature.genes.vision_radius.value, creature.radius + self.largest_radius)
+        return reach + (creature.genes.speed.value + self.largest_speed) * deltatime
+
+    def range_search_creatures(self, deltatime: float) -> dict[int, list]:
+        """
+        Finds the entities within every creature's search radius with one batched radius search,
+        instead of searching the tree once per creature.
+        If neighbour_limit is set in config.yml, each creature only gets that many of the closest entities.
+        :param deltatime:
+        :return: Dictionary of creature ID to the entities within its search radius, and which of them it can see
+        """
+        self.largest_speed = max([creature.genes.speed.value for creature in self.creatures], default=0)
 
-                self.time_data.append(self.seconds)
-                self.creature_count.append(len(self.creatures))
-                self.food_count.append(len(self.food))
-                self.cumulative_increase_count.append(self.cumulative_increase)
-                self.increase_count.append(self.increase)
+        centres = np.array([creature.get_coordinates() for creature in self.creatures], dtype=np.float64)
+        radii = np.array([self.search_radius(creature, deltatime) for creature in self.creatures], dtype=np.float64)
 
-                self.increase = 0
+        indptr, ids = self.tree.query_radius_many(centres, radii, k=self.neighbour_limit)
+        entities = [self.tree.entities[entity_id] for entity_id in ids.tolist()]
 
-            if self.food_second >= self.food_second_split:
-                self.spawn_food()
-                self.food_second -= self.food_second_split
+        # Vision for every (creature, entity) pair is checked at once
+        queries = np.repeat(np.arange(len(self.creatures)), np.diff(indptr))
+        positions = np.array([entity.get_coordinates() for entity in entities], dtype=np.float64).reshape(-1, 2)
+        directions = np.radians([creature.direction for creature in self.creatures])
+        facing = np.stack([np.cos(directions), np.sin(directions)], axis=1).reshape(-1, 2)
+        vision_radii = np.array([creature.genes.vision_radius.value for creature in self.creatures], dtype=np.float64)
+        half_angles = np.array([creature.genes.vision_angle.value // 2 for creature in self.creatures], dtype=np.float64)
+        in_range, visible = Creature.vision_masks(positions - centres.reshape(-1, 2)[queries], facing[queries],
+                                                  vision_radii[queries], half_angles[queries])
+
+        indptr = indptr.tolist()
+        range_searches = {}
+        for index, creature in enumerate(self.creatures):
+            start, end = indptr[index], indptr[index + 1]
+            range_searches[creature.id] = (entities[start:end], (in_range[start:end], visible[start:end]))
+
+        return range_searches
 
     def spawn_food(self):
+        self.food_version += 1
         food = random.choice(self.food) if len(self.food) != 0 else None
 
         if food is None:
-            self.food.append(Food.create(random.randint(0, self.size - 1),
-                                         random.randint(0, self.size - 1),
-                                         self.food_image,
-                                         (self.size, self.size),
-                                         self.min_food_energy, self.max_food_energy))
+            new_food = Food.create(random.randint(0, self.size - 1),
+                                   random.randint(0, self.size - 1),
+                                   self.food_image,
+                                   (self.size, self.size),
+                                   self.min_food_energy, self.max_food_energy)
+            self.food.append(new_food)
+            self.tree.insert(new_food)
         else:
             spawned = False
             while not spawned:
@@ -218,38 +479,40 @@ class World:
                                        (self.size, self.size),
                                        self.min_food_energy, self.max_food_energy)
 
-                if not self.tree.find(temporary_coordinates) and new_food.within_border():
+                if not self.tree.find(temporary_coordinates, self.food_spacing) and new_food.within_border():
                     spawned = True
                     self.food.append(new_food)
+                    self.tree.insert(new_food)
                 else:
                     food = random.choice(self.food)
 
     def change_tick_speed(self, direction: int):
-        if 0 < self.tick_speed + direction <= 10:
+        if 0 < self.tick_speed + direction <= self.max_tick_speed:
             self.tick_speed += direction
 
     def check_for_new_species(self, genes: CreatureGenes):
-        assigned_species = None
-        for specimen_id, specimen in self.specimens.items():
-            # specimen = self.specimens[int(genes.species.value)]
-            different_count = 0
-
-            for gene_name, gene in vars(genes).items():
-                if gene_name not in ['species', 'generation']:
-                    specimen_gene = specimen.__getattribute__(gene_name)
-                    if abs(specimen_gene.value - gene.value) >= specimen_gene.value/2:
-                        print(gene_name, specimen_gene.value, gene.value, abs(specimen_gene.value - gene.value), specimen_gene.value/2)
-                        different_count += 1
-
-            if different_count <= 6:
-                assigned_species = specimen_id
-                break
+        assigned_species = self.species_index.classify(genes)
 
         if assigned_species is None:
             genes.species.value = self.species_id
             self.specimens[self.species_id] = genes
+            self.species_index.add(self.species_id, genes)
             return True
 
+    def assign_species(self, children: list[Creature]):
+        """
+        Checks which children don't belong to any species, all in one comparison, and makes them new species.
+        A child that didn't match is checked again on its own, since a child before it may have just made
+        a species it belongs to
+        :param children:
+        :return:
+        """
+        species = self.species_index.classify_many([child.genes for child in children])
+        for child, assigned_species in zip(children, species):
+            if assigned_species is None and self.check_for_new_species(child.genes):
+                child.genes.species.value = self.species_id
+                self.species_id += 1
+
 
 class Camera:
     def __init__(self, screen: pygame.Surface):
@@ -260,60 +523,72 @@ class Camera:
         self.centre_y = self.screen.get_height() // 2
         self.x_offset = 0
         self.y_offset = 0
-        self.font = pygame.Font('freesansbold.ttf', 25)
         self.creature_id_to_display = 0
+        self.displayed_characteristics: CreatureCharacteristicsDisplay | None = None
         self.mouse_down = False
 
-    def draw_world(self, world: World, debug: bool = False):
-        # Draw Background Colour
-        pygame.draw.rect(surface=self.screen,
-                         color=[0, 10, 27],
-                         rect=[[0, 0], [self.screen.get_width(), self.screen.get_height()]])
+        config = load_config().get('drawing', {})
+        self.sprite_cache = SpriteCache(max_bytes=config.get('sprite_cache_mb', 64) * 1024 * 1024,
+                                        angle_buckets=config.get('angle_buckets', 128))
+        self.food_variants = config.get('food_variants', 8)
+        self.glyph_cache = GlyphCache()
+        self.debug_overlay_limit = config.get('debug_overlay_limit', 50)
 
-        # Draw Border
+        # The background, border and food, drawn once and reused until the food or the view changes
+        self.food_layer: pygame.Surface | None = None
+        self.food_layer_key = None
+
+    def draw_world(self, world: World, debug: bool = False, alpha: float = 1, timestep: float = 0):
+        """
+        Draws the world. Creatures are drawn part way between their last two positions,
+        so movement looks smooth even when the simulation steps at a different rate to the frames
+        :param world:
+        :param debug:
+        :param alpha: How far through the next step the simulation is, from FixedStepClock.alpha
+        :param timestep: Length of the last step in seconds, from FixedStepClock.timestep
+        :return:
+        """
         world_rect = pygame.Rect(0, 0, world.size, world.size)
         world_rect.height *= self.zoom_level
         world_rect.width *= self.zoom_level
         world_rect.centerx = self.centre_x + self.x_offset
         world_rect.centery = self.centre_y + self.y_offset
 
-        pygame.draw.rect(surface=self.screen, color=[0, 10 * 0.7, 27 * 0.7], rect=world_rect)
+        self.screen.blit(self.draw_food_layer(world, world_rect), (0, 0))
 
         scale = 1 / self.zoom_level
 
-        # Draw Food
-        for food in world.food:
-            # Move the Body Part Rect to the correct position
-            drawing_rect = pygame.Rect(food.x, food.y, 1, 1)
-            drawing_rect.x = world_rect.x + round(drawing_rect.x / scale)
-            drawing_rect.y = world_rect.y + round(drawing_rect.y / scale)
-            drawing_rect.width *= self.zoom_level
-            drawing_rect.height *= self.zoom_level
-
-            if -2 < drawing_rect.x < self.screen.get_width() and -2 < drawing_rect.y < self.screen.get_height():
-                copy_image = food.image.copy()
-                copy_image = pygame.transform.scale(copy_image, (drawing_rect.w, drawing_rect.h))
-                rotated_image = pygame.transform.rotate(copy_image, random.randint(0, 360))
-                food_rect = rotated_image.get_rect(center=drawing_rect.center)
-                self.screen.blit(rotated_image, food_rect)
-
-                # pygame.draw.rect(surface=self.screen, rect=drawing_rect, color=[170, 255, 170])
+        # Only the creatures near the screen are drawn. The tree has where each creature is after the last step,
+        # but it is drawn part way back to where it was before it, so the margin also covers the furthest
+        # any creature can move in one step
+        margin = 2 * world.largest_radius + world.largest_speed * timestep
+        visible_creatures = [entity for entity in self.visible_entities(world, world_rect, margin)
+                             if isinstance(entity, Creature)]
+
+        # In debug mode, only the creatures closest to the centre of the screen get the debug lines and labels
+        overlay_ids = set()
+        if debug:
+            centre_x = (self.centre_x - world_rect.x) / self.zoom_level
+            centre_y = (self.centre_y - world_rect.y) / self.zoom_level
+            closest = heapq.nsmallest(self.debug_overlay_limit, visible_creatures,
+                                      key=lambda creature: (creature.x - centre_x)**2 + (creature.y - centre_y)**2)
+            overlay_ids = {creature.id for creature in closest}
+
+        # The chosen creature is still displayed when it is off the screen
+        displayed = world.creatures.get(self.creature_id_to_display)
 
-        display = None
         # Draw Creatures
-        for creature in world.creatures:
+        for creature in visible_creatures:
             colour_to_draw = (int(creature.genes.colour_red.value),
                               int(creature.genes.colour_green.value),
                               int(creature.genes.colour_blue.value))
-            pattern = (int(255 - creature.genes.colour_red.value),
-                       int(255 - creature.genes.colour_green.value),
-                       int(255 - creature.genes.colour_blue.value))
 
             # Move the Body Part Rect to the correct position
             # This is important as the position values I give is the top left point of the rectangle,
             # but the point that is stored is the centre point, so I must adjust for that
-            rect_left = creature.x - creature.genes.radius.value
-            rect_top = creature.y - creature.genes.radius.value
+            creature_x, creature_y = creature.interpolated_coordinates(alpha)
+            rect_left = creature_x - creature.genes.radius.value
+            rect_top = creature_y - creature.genes.radius.value
             drawing_rect = pygame.Rect(rect_left, rect_top, creature.genes.radius.value * 2,
                                        creature.genes.radius.value * 2)
             drawing_rect.x = world_rect.x + round(drawing_rect.x / scale)
@@ -325,30 +600,24 @@ class Camera:
 
             # Display creature Characteristics if the user is hovering over the creature
             if self.check_for_mouse_hover(drawing_rect):
-                display = CreatureCharacteristicsDisplay(creature)
+                displayed = creature
 
             if self.check_for_press(drawing_rect):
                 self.creature_id_to_display = creature.id
 
             if self.creature_id_to_display == creature.id:
-                display = CreatureCharacteristicsDisplay(creature)
+                displayed = creature
 
             # Don't draw if the creature is off the screen. Saves program from processing useless things
             if bound < drawing_rect.x < self.screen.get_width() and bound < drawing_rect.y < self.screen.get_height():
-                copy_image = creature.image.copy()
-                coloured = pygame.PixelArray(copy_image)
-                coloured.replace((104, 104, 104), colour_to_draw)
-                coloured.replace((255, 255, 255), pattern)
-                del coloured
-
-                copy_image = pygame.transform.scale(copy_image, (drawing_rect.w, drawing_rect.h))
-                rotated_image = pygame.transform.rotate(copy_image, -(creature.direction + 90))
+                rotated_image = self.sprite_cache.creature(creature.image, colour_to_draw,
+                                                           (drawing_rect.w, drawing_rect.h), -(creature.direction + 90))
 
                 # Sets the center of the image to be aligned with the center position
                 creature_rect = rotated_image.get_rect(center=drawing_rect.center)
                 self.screen.blit(rotated_image, creature_rect)
 
-                if debug:
+                if creature.id in overlay_ids:
                     # Draw all the vision lines to see what entities the creature is checking against
                     for entity in creature.all_check_entities:
                         rect_left = entity.x - entity.radius
@@ -402,8 +671,7 @@ class Camera:
 
                     # Display the Range Search area for the creature's vision and collision detection
                     pygame.draw.circle(surface=self.screen, center=drawing_rect.center,
-                                       radius=(
-                                                      2 * creature.genes.vision_radius.value + world.largest_radius) * self.zoom_level,
+                                       radius=world.search_radius(creature, timestep) * self.zoom_level,
                                        color=(220, 20, 60), width=1)
 
                     # Display the creature's vision radius
@@ -444,30 +712,168 @@ class Camera:
                                          start_pos=drawing_rect.center, end_pos=drawing_rect2.center)
 
                     # Display the direction the creature is facing towards
-                    self.font = pygame.Font('freesansbold.ttf', 2 * self.zoom_level)
-                    text = self.font.render(f'{creature.direction}*', color=(255, 255, 255), antialias=True)
-                    text_rect = text.get_rect()
-                    text_rect.center = (drawing_rect.center[0], drawing_rect.y + 10 * self.zoom_level)
-                    self.screen.blit(text, text_rect)
+                    self.glyph_cache.draw(self.screen, f'{round(creature.direction)}*', 2 * self.zoom_level,
+                                          (drawing_rect.center[0], drawing_rect.y + 10 * self.zoom_level))
 
                     # Display the previous reaction of the creature towards an entity
                     if creature.reaction is not None:
-                        self.font = pygame.Font('freesansbold.ttf', 2 * self.zoom_level)
-                        text = self.font.render(f'{creature.reaction}', color=(255, 255, 255), antialias=True)
-                        text_rect = text.get_rect()
-                        text_rect.center = (drawing_rect.center[0], drawing_rect.y + 12 * self.zoom_level)
-                        self.screen.blit(text, text_rect)
+                        self.glyph_cache.draw(self.screen, f'{creature.reaction}', 2 * self.zoom_level,
+                                              (drawing_rect.center[0], drawing_rect.y + 12 * self.zoom_level))
 
                     # Display the Energy of the creature
-                    self.font = pygame.Font('freesansbold.ttf', 2 * self.zoom_level)
-                    text = self.font.render(f'{round(creature.energy)}E', color=(255, 255, 255), antialias=True)
-                    text_rect = text.get_rect()
-                    text_rect.center = (drawing_rect.center[0], drawing_rect.y + 14 * self.zoom_level)
-                    self.screen.blit(text, text_rect)
+                    self.glyph_cache.draw(self.screen, f'{round(creature.energy)}E', 2 * self.zoom_level,
+                                          (drawing_rect.center[0], drawing_rect.y + 14 * self.zoom_level))
 
-        if display:
+        if displayed is not None:
+            display = self.characteristics_display(displayed, world.statistics.summary())
             display.draw(self.screen, (self.screen.get_width() - display.rect.w - 15), 15)
 
+    def characteristics_display(self, creature: Creature | CreatureDetails,
+                                summary: dict[str, dict[str, float]]) -> CreatureCharacteristicsDisplay:
+        """
+        Gives the stats panel for a creature. A new one is only made when the creature or the summary changes
+        (the summary is a new dictionary each time the population changes). Otherwise only its energy
+        and position lines are updated
+        :param creature:
+        :param summary: PopulationStatistics.summary() of the population the creature is in
+        :return:
+        """
+        display = self.displayed_characteristics
+        if display is None or display.creature_id != creature.id or display.summary is not summary:
+            self.displayed_characteristics = CreatureCharacteristicsDisplay(creature, summary)
+        else:
+            display.update(creature)
+        return self.displayed_characteristics
+
+    def draw_food_layer(self, world: World | WorldSnapshot, world_rect: pygame.Rect) -> pygame.Surface:
+        """
+        Gives the background, border and food as one image. It is only drawn again when food is eaten or spawned,
+        or the camera moves or zooms, so most frames only have to copy it to the screen
+        :param world: The world, or a snapshot of it
+        :param world_rect: Where the world is on the screen
+        :return:
+        """
+        world_id = world.world_id if isinstance(world, WorldSnapshot) else id(world)
+        key = (world_id, world.food_version, self.zoom_level, world_rect.topleft, self.screen.get_size())
+        if self.food_layer is not None and self.food_layer_key == key:
+            return self.food_layer
+
+        if self.food_layer is None or self.food_layer.get_size() != self.screen.get_size():
+            self.food_layer = pygame.Surface(self.screen.get_size())
+        self.food_layer_key = key
+
+        # Draw Background Colour
+        self.food_layer.fill([0, 10, 27])
+
+        # Draw Border
+        pygame.draw.rect(surface=self.food_layer, color=[0, 10 * 0.7, 27 * 0.7], rect=world_rect)
+
+        # Draw Food
+        # Each pellet is drawn with one of a few rotated images, picked by its ID so it never changes
+        variants = self.sprite_cache.food(world.food_image, (self.zoom_level, self.zoom_level), self.food_variants)
+        offsets = [(self.zoom_level / 2 - variant.get_width() / 2, self.zoom_level / 2 - variant.get_height() / 2)
+                   for variant in variants]
+        width, height = self.screen.get_size()
+
+        blits = []
+        for food_id, food_x, food_y in self.visible_food(world, world_rect):
+            x = world_rect.x + round(food_x * self.zoom_level)
+            y = world_rect.y + round(food_y * self.zoom_level)
+
+            if -2 < x < width and -2 < y < height:
+                variant = food_id % len(variants)
+                blits.append((variants[variant], (x + offsets[variant][0], y + offsets[variant][1])))
+
+        self.food_layer.blits(blits, doreturn=False)
+        return self.food_layer
+
+    def visible_food(self, world: World | WorldSnapshot, world_rect: pygame.Rect) -> list[tuple[int, float, float]]:
+        """
+        The ID and position of every piece of food on the screen
+        :param world: The world, or a snapshot of it
+        :param world_rect:
+        :return:
+        """
+        if isinstance(world, WorldSnapshot):
+            topleft, bottomright = self.viewport(world_rect, 1)
+            indexes = world.inside(world.food_positions, topleft, bottomright)
+            return list(zip(world.food_ids[indexes].tolist(), *world.food_positions[indexes].T.tolist()))
+
+        return [(food.id, food.x, food.y) for food in self.visible_entities(world, world_rect, 1)
+                if isinstance(food, Food)]
+
+    def draw_snapshot(self, snapshot: WorldSnapshot):
+        """
+        Draws a snapshot of the world, made by SimulationWorker. It is drawn the same way as draw_world,
+        apart from the debug lines, which need the entities each creature checked
+        :param snapshot:
+        :return:
+        """
+        world_rect = pygame.Rect(0, 0, snapshot.size, snapshot.size)
+        world_rect.height *= self.zoom_level
+        world_rect.width *= self.zoom_level
+        world_rect.centerx = self.centre_x + self.x_offset
+        world_rect.centery = self.centre_y + self.y_offset
+
+        self.screen.blit(self.draw_food_layer(snapshot, world_rect), (0, 0))
+
+        positions = snapshot.interpolated_positions()
+        topleft, bottomright = self.viewport(world_rect, 2 * snapshot.largest_radius)
+        visible = snapshot.inside(positions, topleft, bottomright)
+
+        displayed = None
+        if self.creature_id_to_display != 0:
+            chosen = (snapshot.creature_ids == self.creature_id_to_display).nonzero()[0]
+            if len(chosen) != 0:
+                displayed = int(chosen[0])
+
+        for index, (creature_x, creature_y), radius, colour, direction in zip(
+                visible.tolist(), positions[visible].tolist(), snapshot.radii[visible].tolist(),
+                snapshot.colours[visible].tolist(), snapshot.directions[visible].tolist()):
+            drawing_rect = pygame.Rect(world_rect.x + round((creature_x - radius) * self.zoom_level),
+                                       world_rect.y + round((creature_y - radius) * self.zoom_level),
+                                       radius * 2 * self.zoom_level, radius * 2 * self.zoom_level)
+
+            # Display creature Characteristics if the user is hovering over the creature
+            if self.check_for_mouse_hover(drawing_rect):
+                displayed = index
+
+            if self.check_for_press(drawing_rect):
+                self.creature_id_to_display = int(snapshot.creature_ids[index])
+
+            rotated_image = self.sprite_cache.creature(snapshot.creature_image, tuple(colour),
+                                                       (drawing_rect.w, drawing_rect.h), -(direction + 90))
+            self.screen.blit(rotated_image, rotated_image.get_rect(center=drawing_rect.center))
+
+        if displayed is not None:
+            display = self.characteristics_display(snapshot.creature_details(displayed), snapshot.statistics)
+            display.draw(self.screen, (self.screen.get_width() - display.rect.w - 15), 15)
+
+    def viewport(self, world_rect: pygame.Rect, margin: float = 0) -> tuple[tuple[float, float], tuple[float, float]]:
+        """
+        The part of the world that is on the screen, as the topleft and bottomright corners used by range_search
+        :param world_rect: Where the world is on the screen
+        :param margin: Extra distance to include on every side, in world pixels
+        :return:
+        """
+        left = -world_rect.x / self.zoom_level - margin
+        right = (self.screen.get_width() - world_rect.x) / self.zoom_level + margin
+        bottom = -world_rect.y / self.zoom_level - margin
+        top = (self.screen.get_height() - world_rect.y) / self.zoom_level + margin
+        return (left, top), (right, bottom)
+
+    def visible_entities(self, world: World, world_rect: pygame.Rect, margin: float = 0) -> list[Creature | Food]:
+        """
+        Asks the world's spatial index for the entities on the screen, so drawing doesn't have to go through
+        every entity in the world
+        :param world:
+        :param world_rect:
+        :param margin:
+        :return:
+        """
+        topleft, bottomright = self.viewport(world_rect, margin)
+        return world.tree.range_search(None, topleft, bottomright)
+
     def move(self, deltatime):
         self.centre_x = self.screen.get_width() // 2
         self.centre_y = self.screen.get_height() // 2
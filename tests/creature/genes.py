@@ -0,0 +1,77 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.genes import CreatureGenes
+
+# Run from the project root with: python -m tests.creature.genes
+
+
+def test_49():
+    # Genes from a save file should be saved the same way they were loaded, and children
+    # should stay inside each gene's limits, with whole number genes still whole
+    random.seed(49)
+    with open('presets/loneisland.json') as file:
+        save_dict = json.load(file)
+
+    print("Running Test 49")
+    saved = [creature['genes'] for creature in save_dict['creatures']]
+    round_trip = all(CreatureGenes.load(genes).save() == genes for genes in saved)
+
+    outside_limits = 0
+    not_whole = 0
+    averaged = 0
+    reordered_same = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        parents = [CreatureGenes.create(species=1, generation=1) for i in range(200)]
+        for genes, other in zip(parents, reversed(parents)):
+            child = genes.child(other, probability=0)
+            # Averages are rounded down, so some end up below the gene's minimum and are moved back up to it
+            averages = [(getattr(genes, attr).value + getattr(other, attr).value) // 2
+                        for attr, gene in child.items()]
+            averaged += all(gene.value == (min(max(average, gene.min), gene.max) if gene.can_mutate else average)
+                            for (attr, gene), average in zip(child.items(), averages))
+            # A parent loaded with its genes in another order should give the same child
+            reordered = CreatureGenes.load(list(reversed(other.save())))
+            reordered_same += genes.child(reordered, probability=0).values == child.values
+            for i in range(20):
+                child = child.child(factor=50)
+            for attr, gene in child.items():
+                outside_limits += gene.can_mutate and not gene.min <= gene.value <= gene.max
+                not_whole += gene.is_type_integer and not isinstance(gene.value, int)
+
+    print(f"Same after loading and saving: {round_trip}   Averaged without mutating: {averaged}/{len(parents)}   "
+          f"Same with genes in another order: {reordered_same}/{len(parents)}   "
+          f"Genes outside their limits: {outside_limits}   Integer genes that aren't whole: {not_whole}")
+
+
+def test_50():
+    # Making 20000 children's genes by deep copying the parent's, against building them from the value array
+    random.seed(50)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parents = [CreatureGenes.create(species=1, generation=1) for i in range(100)]
+
+    print("\n\n\nRunning Test 50")
+    start = monotonic()
+    for i in range(20000):
+        genes = copy.deepcopy(parents[i % 100])
+    copy_time = monotonic() - start
+
+    start = monotonic()
+    for i in range(20000):
+        genes = parents[i % 100].child(parents[-i % 100])
+    child_time = monotonic() - start
+
+    print(f"Deep copy: {copy_time:.4f}s   Child with mutation: {child_time:.4f}s")
+
+
+if __name__ == "__main__":
+    test_49()
+    test_50()
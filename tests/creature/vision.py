@@ -0,0 +1,142 @@
+import contextlib
+import io
+import math
+import os
+import random
+from time import monotonic
+
+import numpy as np
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.entity import Creature
+from src.world import World
+
+# Run from the project root with: python -m tests.creature.vision
+
+
+def trigonometry_vision(creature: Creature, x: float, y: float) -> bool:
+    # The old way of checking vision, one entity at a time using the bearing to it
+    vector = (x - creature.x, y - creature.y)
+    if math.sqrt(vector[0] ** 2 + vector[1] ** 2) < creature.genes.vision_radius.value:
+        bearing = Creature.map_angle(-1 * math.degrees(math.atan2(-1 * vector[1], vector[0])))
+        left_boundary = Creature.map_angle(creature.direction - creature.genes.vision_angle.value // 2)
+        right_boundary = Creature.map_angle(creature.direction + creature.genes.vision_angle.value // 2)
+
+        if left_boundary < right_boundary and left_boundary <= bearing <= right_boundary:
+            return True
+        elif (left_boundary > right_boundary) and (left_boundary <= bearing <= 360 or 0 <= bearing <= right_boundary):
+            return True
+
+    return False
+
+
+def test_26(display: bool = False):
+    # The vision mask should see the same entities as the old trigonometry, apart from ones right on the edge
+    random.seed(26)
+    image = pygame.Surface((1, 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        creatures = [Creature.create(random.uniform(0, 100), random.uniform(0, 100), image, (100, 100), 1)
+                     for i in range(300)]
+
+    print("Running Test 26")
+    mismatches = []
+    for creature in creatures:
+        creature.direction = random.uniform(-360, 720)
+        positions = np.array([(creature.x + random.uniform(-20, 20), creature.y + random.uniform(-20, 20))
+                              for i in range(50)])
+        in_range, visible = creature.vision_mask(positions)
+
+        for (x, y), seen in zip(positions.tolist(), visible.tolist()):
+            if seen != trigonometry_vision(creature, x, y):
+                mismatches.append((creature, x, y))
+
+    print(f"Mismatched entities: {len(mismatches)} / {len(creatures) * 50}")
+    if display:
+        for creature, x, y in mismatches:
+            print(creature, x, y)
+
+
+def test_27():
+    # Vision for every creature in a crowded world, one entity at a time against every pair at once
+    random.seed(27)
+    image = pygame.Surface((1, 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.create(600, image, image, 1, start_species=10, start_creatures=3000, start_food=20000)
+        range_searches = world.range_search_creatures(1 / 120)
+
+    print("\n\n\nRunning Test 27")
+    start = monotonic()
+    seen = 0
+    for creature in world.creatures:
+        for entity in range_searches[creature.id][0]:
+            seen += trigonometry_vision(creature, entity.x, entity.y)
+    trigonometry_time = monotonic() - start
+
+    # The same pairs, laid out the way World.range_search_creatures gives them to vision_masks
+    pairs = [(creature, entity) for creature in world.creatures for entity in range_searches[creature.id][0]]
+    vectors = np.array([(entity.x - creature.x, entity.y - creature.y) for creature, entity in pairs])
+    facing = np.array([(math.cos(creature.direction_radians()), math.sin(creature.direction_radians()))
+                       for creature, entity in pairs])
+    vision_radii = np.array([creature.genes.vision_radius.value for creature, entity in pairs])
+    half_angles = np.array([creature.genes.vision_angle.value // 2 for creature, entity in pairs])
+
+    start = monotonic()
+    in_range, visible = Creature.vision_masks(vectors, facing, vision_radii, half_angles)
+    batched_time = monotonic() - start
+
+    print(f"Pairs: {len(pairs)}   Trigonometry: {trigonometry_time:.4f}s ({seen} seen)   "
+          f"Batched: {batched_time:.4f}s ({int(visible.sum())} seen)")
+
+
+def test_60():
+    # The world checks vision for every creature at the start of the step, but creatures earlier in the pass
+    # have already moved by the time a creature reacts. Checking each creature's vision just before it reacts
+    # should only disagree about entities that moved this step, and only because of that move,
+    # which is never more than the fastest creature's speed times the step length
+    random.seed(60)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.create(1000, None, None, 1, start_species=10, start_creatures=2000, start_food=5000)
+
+    print("\n\n\nRunning Test 60")
+    tick = Creature.tick
+    start_positions = {}
+    visible_pairs = 0
+    different = 0
+    unexplained = 0
+    furthest = 0
+
+    def checked_tick(creature, deltatime, range_search_box, vision_masks=None, debug=False):
+        nonlocal visible_pairs, different, unexplained, furthest
+        if not creature.dead and len(range_search_box) != 0:
+            positions = np.array([entity.get_coordinates() for entity in range_search_box])
+            starts = np.array([start_positions.get(entity.id, entity.get_coordinates())
+                               for entity in range_search_box])
+            visible = creature.vision_mask(positions)[1]
+            visible_pairs += int(visible.sum())
+            different += int((visible != vision_masks[1]).sum())
+            unexplained += int((creature.vision_mask(starts)[1] != vision_masks[1]).sum())
+            furthest = max(furthest, float(np.hypot(*(positions - starts).T).max()))
+        tick(creature, deltatime, range_search_box, vision_masks, debug)
+
+    Creature.tick = checked_tick
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for step in range(120):
+                start_positions = {creature.id: creature.get_coordinates() for creature in world.creatures}
+                world.step(1 / 120)
+    finally:
+        Creature.tick = tick
+
+    print(f"Visible pairs: {visible_pairs}   Judged differently: {different} "
+          f"({different / max(visible_pairs, 1):.2%})   Not explained by moving this step: {unexplained}   "
+          f"Furthest move: {furthest:.3f} px (at most {world.largest_speed / 120:.3f} px)")
+
+
+if __name__ == "__main__":
+    test_26(True)
+    test_27()
+    test_60()
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from src.world import World, Camera
+
+# Run from the project root with: python -m tests.drawing.culling
+
+
+def place_camera(camera: Camera, world: World, zoom: int, point: tuple[float, float] = None) -> pygame.Rect:
+    # Zooms in on a point, or a random part of the world, and gives where the world is on the screen
+    if point is None:
+        point = (random.uniform(0, world.size), random.uniform(0, world.size))
+    camera.zoom_level = zoom
+    camera.x_offset = (world.size / 2 - point[0]) * zoom
+    camera.y_offset = (world.size / 2 - point[1]) * zoom
+
+    world_rect = pygame.Rect(0, 0, world.size * zoom, world.size * zoom)
+    world_rect.center = (camera.centre_x + camera.x_offset, camera.centre_y + camera.y_offset)
+    return world_rect
+
+
+def test_39():
+    # The entities from the spatial index should be exactly the ones inside the viewport, for both index types
+    random.seed(39)
+    pygame.init()
+    camera = Camera(pygame.Surface((1200, 800)))
+
+    print("Running Test 39")
+    for spatial_index in ['kdtree', 'grid']:
+        with contextlib.redirect_stdout(io.StringIO()):
+            world = World.create(3000, None, None, 1, start_species=10, start_creatures=300, start_food=20000)
+            world = World(None, None, world.size, world.creatures, world.food, world.largest_radius, 1,
+                          world.food_spawnrate, 0, 0, 0, False, [], [], [], [], [], world.specimens,
+                          world.species_id, spatial_index)
+
+        mismatches = 0
+        for i in range(50):
+            world_rect = place_camera(camera, world, random.choice([1, 3, 9, 21]))
+            (left, top), (right, bottom) = camera.viewport(world_rect, 5)
+            expected = sorted(entity.id for entity in world.creatures + world.food
+                              if left <= entity.x <= right and bottom <= entity.y <= top)
+            found = sorted(entity.id for entity in camera.visible_entities(world, world_rect, 5))
+            mismatches += found != expected
+
+        print(f"{spatial_index:<7} Mismatched viewports: {mismatches} / 50")
+
+
+def test_40():
+    # Drawing a zoomed in view of a large world, which should only cost as much as what is on the screen
+    random.seed(40)
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    creature_image = pygame.image.load('resources/textures/creature3.png')
+    food_image = pygame.image.load('resources/textures/food1.png')
+    camera = Camera(screen)
+
+    print("\n\n\nRunning Test 40")
+    for creatures in [1000, 10000]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            world = World.create(10000, creature_image, food_image, 1, start_species=10, start_creatures=creatures,
+                                 start_food=20000)
+
+        world_rect = place_camera(camera, world, 9, world.creatures[0].get_coordinates())
+        on_screen = len(camera.visible_entities(world, world_rect))
+
+        start = monotonic()
+        for frame in range(20):
+            camera.draw_world(world)
+        draw_time = monotonic() - start
+
+        # Only working out where every creature is on the screen, which is what drawing used to start with
+        start = monotonic()
+        for frame in range(20):
+            for creature in world.creatures:
+                creature_x, creature_y = creature.interpolated_coordinates(1)
+                drawing_rect = pygame.Rect(world_rect.x + round(creature_x * camera.zoom_level),
+                                           world_rect.y + round(creature_y * camera.zoom_level), 1, 1)
+            for food in world.food:
+                drawing_rect = pygame.Rect(world_rect.x + round(food.x * camera.zoom_level),
+                                           world_rect.y + round(food.y * camera.zoom_level), 1, 1)
+        every_entity_time = monotonic() - start
+
+        print(f"Creatures: {len(world.creatures):<6} Entities on screen: {on_screen:<4} "
+              f"Drawing: {draw_time / 20:.4f}s per frame   Checking every entity: {every_entity_time / 20:.4f}s per frame")
+
+
+if __name__ == "__main__":
+    test_39()
+    test_40()
@@ -0,0 +1,80 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from src.sprites import GlyphCache
+from src.world import World, Camera
+
+# Run from the project root with: python -m tests.drawing.debug
+
+
+def test_43():
+    # Debug labels for 1000 creatures, loading the font and rendering every label against the glyph cache
+    random.seed(43)
+    pygame.init()
+    screen = pygame.Surface((1200, 800))
+    glyph_cache = GlyphCache()
+    labels = [(f'{random.randint(0, 359)}*', f'{random.randint(0, 3)}', f'{random.randint(0, 100000)}E')
+              for i in range(1000)]
+
+    print("Running Test 43")
+    start = monotonic()
+    for label in labels:
+        for line, text in enumerate(label):
+            font = pygame.Font('freesansbold.ttf', 10)
+            rendered = font.render(text, color=(255, 255, 255), antialias=True)
+            screen.blit(rendered, rendered.get_rect(center=(600, 400 + 10 * line)))
+    font_time = monotonic() - start
+
+    start = monotonic()
+    for label in labels:
+        for line, text in enumerate(label):
+            glyph_cache.draw(screen, text, 10, (600, 400 + 10 * line))
+    glyph_time = monotonic() - start
+
+    print(f"Loading fonts: {font_time:.4f}s   Glyph cache: {glyph_time:.4f}s   "
+          f"Fonts loaded: {len(glyph_cache.fonts)}   Glyphs: {len(glyph_cache.glyphs)}")
+
+
+def test_44():
+    # A debug frame with 3000 creatures on the screen, which should only draw the overlay limit
+    random.seed(44)
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    creature_image = pygame.image.load('resources/textures/creature3.png')
+    food_image = pygame.image.load('resources/textures/food1.png')
+    camera = Camera(screen)
+
+    print("\n\n\nRunning Test 44")
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.create(700, creature_image, food_image, 1, start_species=10, start_creatures=3000,
+                             start_food=5000)
+        world.debug = True
+        world.step(1 / 120)
+
+    start = monotonic()
+    for frame in range(10):
+        camera.draw_world(world)
+    normal_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(10):
+        camera.draw_world(world, debug=True)
+    debug_time = monotonic() - start
+
+    print(f"Creatures: {len(world.creatures)}   Overlay limit: {camera.debug_overlay_limit}   "
+          f"Normal: {normal_time / 10:.4f}s per frame   Debug: {debug_time / 10:.4f}s per frame")
+
+
+if __name__ == "__main__":
+    test_43()
+    test_44()
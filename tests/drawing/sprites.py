@@ -0,0 +1,134 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.sprites import SpriteCache
+from src.world import World, Camera
+
+# Run from the project root with: python -m tests.drawing.sprites
+
+
+def draw_uncached(image: pygame.Surface, colour: tuple[int, int, int], size: tuple[int, int],
+                  angle: float) -> pygame.Surface:
+    # The old way of drawing a creature, making a new image every time
+    copy_image = image.copy()
+    coloured = pygame.PixelArray(copy_image)
+    coloured.replace((104, 104, 104), colour)
+    coloured.replace((255, 255, 255), tuple(255 - value for value in colour))
+    del coloured
+
+    copy_image = pygame.transform.scale(copy_image, size)
+    return pygame.transform.rotate(copy_image, angle)
+
+
+def test_36():
+    # Cached sprites should look the same as drawing from scratch at the bucket angle,
+    # and the cache should stay under its memory cap
+    random.seed(36)
+    image = pygame.image.load('resources/textures/creature3.png')
+    cache = SpriteCache(max_bytes=256 * 1024, angle_buckets=64)
+
+    print("Running Test 36")
+    mismatches = 0
+    for i in range(500):
+        colour = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+        size = (random.choice([6, 10, 20, 40]),) * 2
+        angle = random.uniform(-360, 360)
+
+        sprite = cache.creature(image, colour, size, angle)
+        expected = draw_uncached(image, colour, size, cache.bucket(angle) * cache.bucket_size)
+        if pygame.image.tobytes(sprite, 'RGBA') != pygame.image.tobytes(expected, 'RGBA'):
+            mismatches += 1
+
+    print(f"Mismatched sprites: {mismatches} / 500   Cached: {len(cache)}   "
+          f"Memory: {cache.size_bytes} / {cache.max_bytes} bytes")
+
+
+def test_37():
+    # Drawing 3000 creatures from 10 species for 20 frames, with and without the cache
+    random.seed(37)
+    image = pygame.image.load('resources/textures/creature3.png')
+    colours = [(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)) for i in range(10)]
+    creatures = [(random.choice(colours), random.uniform(0, 360)) for i in range(3000)]
+    screen = pygame.Surface((800, 800))
+    cache = SpriteCache()
+
+    print("\n\n\nRunning Test 37")
+    start = monotonic()
+    for frame in range(20):
+        for colour, direction in creatures:
+            screen.blit(draw_uncached(image, colour, (10, 10), -(direction + frame + 90)), (400, 400))
+    uncached_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(20):
+        for colour, direction in creatures:
+            screen.blit(cache.creature(image, colour, (10, 10), -(direction + frame + 90)), (400, 400))
+    cached_time = monotonic() - start
+
+    print(f"Uncached: {uncached_time / 20:.4f}s per frame   Cached: {cached_time / 20:.4f}s per frame   "
+          f"Hits: {cache.hits}   Misses: {cache.misses}")
+
+
+def old_food_drawing(camera: Camera, world: World, world_rect: pygame.Rect):
+    # The old way of drawing food, with a new random rotation for every pellet
+    for food in world.food:
+        drawing_rect = pygame.Rect(world_rect.x + round(food.x * camera.zoom_level),
+                                   world_rect.y + round(food.y * camera.zoom_level), camera.zoom_level, camera.zoom_level)
+        if -2 < drawing_rect.x < camera.screen.get_width() and -2 < drawing_rect.y < camera.screen.get_height():
+            copy_image = pygame.transform.scale(food.image.copy(), (drawing_rect.w, drawing_rect.h))
+            rotated_image = pygame.transform.rotate(copy_image, random.randint(0, 360))
+            camera.screen.blit(rotated_image, rotated_image.get_rect(center=drawing_rect.center))
+
+
+def test_38():
+    # The food layer should look the same every frame until food is eaten or spawned, and should
+    # only be drawn again when that happens
+    random.seed(38)
+    pygame.init()
+    food_image = pygame.image.load('resources/textures/food1.png')
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', None, food_image)
+    # Large enough to see the whole world, so new food is always on screen
+    camera = Camera(pygame.Surface((1600, 1600)))
+    world_rect = pygame.Rect(0, 0, world.size * camera.zoom_level, world.size * camera.zoom_level)
+    world_rect.center = (camera.centre_x, camera.centre_y)
+
+    print("\n\n\nRunning Test 38")
+    first = pygame.image.tobytes(camera.draw_food_layer(world, world_rect), 'RGB')
+    second = pygame.image.tobytes(camera.draw_food_layer(world, world_rect), 'RGB')
+    world.spawn_food()
+    third = pygame.image.tobytes(camera.draw_food_layer(world, world_rect), 'RGB')
+    print(f"Same between frames: {first == second}   Changed after spawning food: {first != third}")
+
+    start = monotonic()
+    for frame in range(20):
+        old_food_drawing(camera, world, world_rect)
+    old_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(20):
+        world.food_version += 1
+        camera.draw_food_layer(world, world_rect)
+    redraw_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(20):
+        camera.screen.blit(camera.draw_food_layer(world, world_rect), (0, 0))
+    cached_time = monotonic() - start
+
+    print(f"Food: {len(world.food)}   Old: {old_time / 20:.4f}s per frame   "
+          f"Redrawn layer: {redraw_time / 20:.4f}s per frame   Cached layer: {cached_time / 20:.4f}s per frame")
+
+
+if __name__ == "__main__":
+    test_36()
+    test_37()
+    test_38()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import os
+import random
+import time
+from time import monotonic
+
+import numpy as np
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from simbiosis.headless import TIMESTEP
+from src.clock import FixedStepClock
+from src.worker import SimulationWorker
+from src.world import World, Camera
+
+# Run from the project root with: python -m tests.drawing.threaded
+
+
+def load_images() -> tuple[pygame.Surface, pygame.Surface]:
+    return pygame.image.load('resources/textures/creature3.png'), pygame.image.load('resources/textures/food1.png')
+
+
+def test_41():
+    # A snapshot should never change while the simulation keeps stepping, and newer snapshots should keep coming
+    random.seed(41)
+    pygame.init()
+    creature_image, food_image = load_images()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', creature_image, food_image)
+
+    clock = FixedStepClock(TIMESTEP, 240, frame_budget=1 / 120)
+    clock.fast = True
+    worker = SimulationWorker(world, clock)
+
+    print("Running Test 41")
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker.start()
+        first = worker.take_snapshot()
+        positions = first.creature_positions.copy()
+        details = first.creature_details(0)
+        panel = (details.id, details.energy, details.get_coordinates(), details.genes.save())
+        time.sleep(0.5)
+        second = worker.take_snapshot()
+        time.sleep(0.1)
+        third = worker.take_snapshot()
+        worker.stop()
+
+    print(f"Steps: {worker.steps}   First snapshot unchanged: {np.array_equal(positions, first.creature_positions)}   "
+          f"Read only: {not first.creature_positions.flags.writeable}   "
+          f"Newer snapshots: {first.seconds < second.seconds < third.seconds}")
+
+    # The creature itself has kept using energy (or died) since, but the panel should show it as it was
+    details = first.creature_details(0)
+    creature = world.creatures.get(details.id)
+    print(f"Panel details unchanged: "
+          f"{panel == (details.id, details.energy, details.get_coordinates(), details.genes.save())}   "
+          f"Creature changed since: {creature is None or creature.energy != details.energy}")
+
+
+def test_42():
+    # Steps run in 3 seconds at full speed when every frame is drawn in between,
+    # against the simulation thread with the screen drawn 30 times a second
+    random.seed(42)
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    creature_image, food_image = load_images()
+    camera = Camera(screen)
+
+    print("\n\n\nRunning Test 42")
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', creature_image, food_image)
+        clock = FixedStepClock(TIMESTEP, 240, frame_budget=1 / 120)
+        clock.fast = True
+        frames = 0
+        start = monotonic()
+        while monotonic() - start < 3:
+            clock.run(world.step, 1 / 120)
+            camera.draw_world(world, alpha=clock.alpha, timestep=clock.timestep)
+            frames += 1
+        same_thread_steps = clock.steps
+
+        random.seed(42)
+        world = World.from_preset('random', creature_image, food_image)
+        clock = FixedStepClock(TIMESTEP, 240, frame_budget=1 / 120)
+        clock.fast = True
+        worker = SimulationWorker(world, clock)
+        frame_clock = pygame.time.Clock()
+        threaded_frames = 0
+        worker.start()
+        start = monotonic()
+        while monotonic() - start < 3:
+            frame_clock.tick(30)
+            camera.draw_snapshot(worker.take_snapshot())
+            threaded_frames += 1
+        worker.stop()
+
+    print(f"Same thread: {same_thread_steps} steps, {frames} frames   "
+          f"Threaded: {worker.steps} steps, {threaded_frames} frames")
+
+
+if __name__ == "__main__":
+    test_41()
+    test_42()
@@ -0,0 +1,92 @@
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.graph import LiveGraph
+
+# Run from the project root with: python -m tests.graph.live
+
+
+def test_45():
+    # Every column should keep the smallest and largest of the points it covers,
+    # and the graph should only be drawn again when points are added
+    random.seed(45)
+    pygame.init()
+    graph = LiveGraph(600, 400, '#6495ED', 'Number of Creatures')
+    times = list(range(20000))
+    values = [random.randint(0, 1000) for i in times]
+
+    print("Running Test 45")
+    mismatches = 0
+    for end in [1, 300, 471, 4000, 20000]:
+        graph.update(times[:end], values[:end])
+        size = graph.points_per_column
+        for column, (minimum, maximum) in enumerate(zip(graph.column_minimums, graph.column_maximums)):
+            covered = values[column * size:min((column + 1) * size, end)]
+            mismatches += (minimum, maximum) != (min(covered), max(covered))
+        mismatches += len(graph.column_minimums) != -(-end // size) or len(graph.column_minimums) > graph.plot_rect.w
+
+    surface = graph.draw()
+    redrawn = graph.dirty
+    no_new_points = not graph.update(times, values)
+    print(f"Mismatched columns: {mismatches}   Points per column: {graph.points_per_column}   "
+          f"Columns: {len(graph.column_minimums)}   Same surface: {graph.draw() is surface}   "
+          f"Clean after drawing: {not redrawn}   No new points: {no_new_points}")
+
+
+def test_46():
+    # One new point a frame for 10 hours of data, against loading the old graph image every frame
+    random.seed(46)
+    pygame.init()
+    graph = LiveGraph(1200, 700, '#6495ED', 'Number of Creatures')
+    times = list(range(36000))
+    values = [random.randint(0, 1000) for i in times]
+
+    print("\n\n\nRunning Test 46")
+    start = monotonic()
+    for time, value in zip(times, values):
+        graph.add(time, value)
+    add_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(100):
+        graph.add(times[-1] + frame, random.randint(0, 1000))
+        graph.draw()
+    draw_time = monotonic() - start
+
+    start = monotonic()
+    for frame in range(100):
+        pygame.image.load('resources/graphs/creature_count.png')
+    load_time = monotonic() - start
+
+    print(f"Adding {len(times)} points: {add_time:.4f}s   Drawing with a new point: {draw_time / 100:.4f}s per frame   "
+          f"Loading the old image: {load_time / 100:.4f}s per frame")
+
+
+def test_57():
+    # A series that goes below 0, like the population increase, should get a red line at 0 and an amber fill
+    # between the line and 0. One that stays above 0 should get neither
+    pygame.init()
+    print("\n\n\nRunning Test 57")
+    for values in [[50 - i for i in range(100)], [i for i in range(100)]]:
+        graph = LiveGraph(600, 400, '#6495ED', 'Increase in Creatures')
+        graph.update(list(range(len(values))), values)
+        surface = graph.draw()
+
+        plot = graph.plot_rect
+        colours = {tuple(surface.get_at((x, y)))[:3] for x in range(plot.left + 1, plot.right - 1)
+                   for y in range(plot.top + 1, plot.bottom - 1)}
+        # The line is blue, so only the amber fill (and the red line) have more red than blue in them
+        amber = any(red > blue for red, green, blue in colours - {(210, 43, 43)})
+        print(f"Lowest: {min(values):<4} Zero line: {(210, 43, 43) in colours}   Amber fill: {amber}")
+
+
+if __name__ == "__main__":
+    test_45()
+    test_46()
+    test_57()
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import json
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.world import World
+from src.grid import SpatialGrid
+from src.tree import KDTree
+
+# Run from the project root with: python -m tests.grid.range_search
+
+PRESETS = ['debug', 'loneisland', 'vision_testing']
+TICKS = 200
+DELTATIME = 1 / 120
+
+
+def load_world(preset: str, spatial_index: str) -> World:
+    image = pygame.Surface((1, 1))
+    save_dict = json.load(open(f'presets/{preset}.json', 'r'))
+    world = World.load(save_dict, image, image)
+    world.spatial_index_type = spatial_index
+    world.tree = world.create_spatial_index()
+    world.tick_speed = 1
+    world.paused = False
+    return world
+
+
+def run_world(preset: str, spatial_index: str) -> float:
+    random.seed(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = load_world(preset, spatial_index)
+
+        start = monotonic()
+        for i in range(TICKS):
+            world.tick_world(DELTATIME)
+        end = monotonic()
+
+    return end - start
+
+
+def test_14(display: bool = False):
+    # The grid should find exactly the same entities as the KD-Tree
+    test_points = []
+    random.seed(3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = load_world('debug', 'kdtree')
+        tree = KDTree(world.creatures + world.food)
+        grid = SpatialGrid(world.creatures + world.food, world.size, 30)
+
+    print("Running Test 14")
+    for i in range(500):
+        entity = random.choice(world.food)
+        test_points.append(entity.get_coordinates())
+
+    mismatches = 0
+    start = monotonic()
+    for point in test_points:
+        boxsize = random.randint(5, 60)
+        topleft = (point[0] - boxsize, point[1] + boxsize)
+        bottomright = (point[0] + boxsize, point[1] - boxsize)
+
+        tree_search = {entity.id for entity in tree.range_search(point, topleft, bottomright)}
+        grid_search = {entity.id for entity in grid.range_search(point, topleft, bottomright)}
+        if tree_search != grid_search:
+            mismatches += 1
+            if display:
+                print(point, boxsize, tree_search ^ grid_search)
+    end = monotonic()
+
+    print(f"Time Elapsed: {end - start}")
+    print(f"Mismatched searches: {mismatches}")
+
+
+def test_15():
+    print("\n\n\nRunning Test 15 (KD-Tree vs Grid)")
+    for preset in PRESETS:
+        tree_time = run_world(preset, 'kdtree')
+        grid_time = run_world(preset, 'grid')
+
+        print(f"{preset:<16} KD-Tree: {tree_time:.3f}s   Grid: {grid_time:.3f}s   "
+              f"Speedup: x{tree_time / grid_time:.2f}")
+
+
+if __name__ == "__main__":
+    test_14(True)
+    test_15()
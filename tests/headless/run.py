@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import random
+
+from simbiosis.headless import run, TIMESTEP
+from src.clock import FixedStepClock
+from src.world import World
+
+# Run from the project root with: python -m tests.headless.run
+
+
+def save_without_time(world) -> dict:
+    # Entity IDs keep counting up between runs in the same process, so they are left out too
+    save_dict = world.save('loneisland')
+    del save_dict['save_data']['time']
+    for entity in save_dict['creatures'] + save_dict['food']:
+        del entity['id']
+    return save_dict
+
+
+def test_30():
+    # Two headless runs with the same seed should end with exactly the same world
+    print("Running Test 30")
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = monotonic()
+        first = save_without_time(run('loneisland', 5, seed=30))
+        elapsed = monotonic() - start
+        second = save_without_time(run('loneisland', 5, seed=30))
+        different_seed = save_without_time(run('loneisland', 5, seed=31))
+
+    print(f"5 simulated seconds in {elapsed:.2f}s")
+    print(f"Same seed gives the same world: {first == second}")
+    print(f"Different seed gives a different world: {first != different_seed}")
+
+
+def test_31():
+    # Stepping through the clock with uneven frame times, like the game does, should end with the same world
+    # as the headless runner, as long as the same number of steps are taken
+    print("\n\n\nRunning Test 31")
+    frame_random = random.Random(31)
+    clock = FixedStepClock(TIMESTEP, 240)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        random.seed(31)
+        world = World.from_preset('loneisland', None, None)
+        world.tick_speed = 4
+        while clock.steps < round(5 / TIMESTEP):
+            clock.max_steps_per_frame = round(5 / TIMESTEP) - clock.steps
+            clock.run(world.step, frame_random.uniform(0.001, 0.05), world.tick_speed)
+
+        headless = save_without_time(run('loneisland', 5, seed=31))
+
+    game = save_without_time(world)
+    game['world']['tick_speed'] = headless['world']['tick_speed']
+    print(f"Steps: {clock.steps}   Same as headless: {game == headless}   Alpha: {clock.alpha:.3f}")
+
+
+if __name__ == "__main__":
+    test_30()
+    test_31()
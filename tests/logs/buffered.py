@@ -0,0 +1,65 @@
+import os
+import tempfile
+from datetime import datetime
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from logs import Logger, DEBUG, INFO
+
+# Run from the project root with: python -m tests.logs.buffered
+
+
+class Unformattable:
+    # Fails if it is ever turned into a string, to check that skipped messages are never formatted
+    def __str__(self):
+        raise AssertionError("A message that should have been skipped was formatted")
+
+
+def test_32():
+    # Wanted messages should end up in the file, and unwanted ones should never be formatted.
+    # The thread is woken when the buffer is half full, so few (if any) should be dropped
+    print("Running Test 32")
+    path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    logger = Logger(path, level=INFO, categories={'VISION': False})
+
+    start = monotonic()
+    for i in range(200000):
+        logger.log("Creature %s is eating %s %s", i, 'Food', i + 1, category='CONSUME')
+        logger.log("Creature %s is seeing %s", i, Unformattable(), category='VISION')
+        logger.log("Tree detail %s", Unformattable(), level=DEBUG)
+    log_time = monotonic() - start
+    logger.close()
+
+    lines = open(path).read().splitlines()
+    print(f"600000 log calls in {log_time:.3f}s   Lines written: {len(lines)}   Dropped: {logger.dropped}")
+    print(f"Last line: {lines[-1]}")
+
+    # The old log() formatted and wrote every message straight away
+    old_file = open(os.path.join(tempfile.mkdtemp(), 'old_log.txt'), 'w')
+    start = monotonic()
+    for i in range(200000):
+        old_file.write(f"[{datetime.now()}] [CONSUME] Creature {i} is eating Food {i + 1}\n")
+    print(f"200000 old style writes (without printing) in {monotonic() - start:.3f}s")
+    old_file.close()
+
+
+def test_33():
+    # A small buffer that fills up faster than it is emptied should drop the oldest messages
+    print("\n\n\nRunning Test 33")
+    path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    logger = Logger(path, buffer_size=1000, drain_interval=10)
+
+    for i in range(5000):
+        logger.log("Message %s", i)
+    logger.close()
+
+    lines = open(path).read().splitlines()
+    print(f"Lines written: {len(lines) - 1}   Dropped: {logger.dropped}")
+    print(f"First message kept: {lines[0]}")
+
+
+if __name__ == "__main__":
+    test_32()
+    test_33()
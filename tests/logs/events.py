@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+import tempfile
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import logs
+from logs import EventLog, EVENT_TYPES, ENTITY_KINDS, EVENT_RECORD, EVENT_HEADER
+from simbiosis.headless import run
+from simbiosis.logdecode import read_events, format_event, gene_names, main as decode
+
+# Run from the project root with: python -m tests.logs.events
+
+
+def test_34():
+    # Events should come back out of the files in order. Only the newest 3 files are kept,
+    # so the first 40 ticks should be gone
+    print("Running Test 34")
+    folder = tempfile.mkdtemp()
+    event_log = EventLog(folder, ['VISION', 'MUTATION', 'ENTITY'],
+                         max_file_size=EVENT_HEADER.size + 40 * EVENT_RECORD.size, max_files=3, buffer_size=1000)
+
+    for tick in range(150):
+        event_log.tick = tick
+        event_log.record(EVENT_TYPES['VISION'], tick, tick + 1, ENTITY_KINDS['Food'])
+        event_log.record(EVENT_TYPES['CONSUME'], tick, tick + 1, ENTITY_KINDS['Food'])
+    event_log.record(EVENT_TYPES['MUTATION'], 151, int.from_bytes(b'SPD', 'little'), first=10.5, second=11)
+    event_log.record(EVENT_TYPES['ENTITY'], 151, other_kind=ENTITY_KINDS['Creature'])
+    event_log.close()
+
+    records = [record for path in event_log.paths for record in read_events(path)]
+    print(f"Files: {len(event_log.paths)}   Records: {len(records)}   "
+          f"Ticks in order: {[record[2] for record in records[:110]] == list(range(40, 150))}")
+
+    names = gene_names()
+    for record in records[-3:]:
+        print(format_event(record, names))
+
+    output = os.path.join(folder, 'events.csv')
+    decode(list(event_log.paths) + ['--csv', '--category', 'MUTATION', '--output', output])
+    print(open(output).read().strip())
+
+
+def test_35():
+    # A run with vision traced as text, against the same run traced as binary events, and with nothing traced.
+    # The text is formatted and written on the logger's thread, so the time to write what is left is included
+    print("\n\n\nRunning Test 35")
+    folder = tempfile.mkdtemp()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = monotonic()
+        run('random', 2, seed=35)
+        plain_time = monotonic() - start
+
+        logs.logger.categories['VISION'] = True
+        start = monotonic()
+        run('random', 2, seed=35)
+        logs.logger.drain()
+        text_time = monotonic() - start
+        logs.logger.categories['VISION'] = False
+
+        event_types = logs.events.event_types
+        logs.events.folder = folder
+        logs.events.event_types = {EVENT_TYPES['VISION']}
+        start = monotonic()
+        run('random', 2, seed=35)
+        logs.events.close()
+        event_time = monotonic() - start
+        logs.events.event_types = event_types
+
+    size = sum(os.path.getsize(path) for path in logs.events.paths)
+    records = sum(1 for path in logs.events.paths for record in read_events(path))
+    print(f"Nothing traced: {plain_time:.2f}s   Text: {text_time:.2f}s (+{text_time - plain_time:.2f}s)   "
+          f"Binary events: {event_time:.2f}s (+{event_time - plain_time:.2f}s, {records} events, {size} bytes)")
+
+
+def test_56():
+    # Mutations should be recorded against the child that was born with them, and a second world's
+    # events should count ticks from 0 again
+    print("\n\n\nRunning Test 56")
+    event_types = logs.events.event_types
+    logs.events.event_types = {EVENT_TYPES['MUTATION'], EVENT_TYPES['ENTITY']}
+
+    for world_number in range(2):
+        folder = tempfile.mkdtemp()
+        logs.events.folder = folder
+        logs.events.paths.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run('random', 10, seed=56)
+        logs.events.close()
+
+        records = [record for path in logs.events.paths for record in read_events(path)]
+        creatures = {record[3] for record in records
+                     if record[0] == EVENT_TYPES['ENTITY'] and record[1] == ENTITY_KINDS['Creature']}
+        mutated = {record[3] for record in records if record[0] == EVENT_TYPES['MUTATION']}
+        print(f"World {world_number + 1}   First tick: {records[0][2]}   Children mutated: {len(mutated)}   "
+              f"All mutations belong to a creature: {mutated <= creatures and 0 not in mutated}")
+
+    logs.events.event_types = event_types
+
+
+if __name__ == "__main__":
+    test_34()
+    test_35()
+    test_56()
@@ -0,0 +1,162 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+import numpy as np
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.entity import Creature
+from src.population import PopulationEngine
+from src.world import World
+
+# Run from the project root with: python -m tests.population.engine
+
+WORLD_SIZE = 400
+DELTATIME = 1 / 120
+
+
+def create_creatures(count: int) -> list[Creature]:
+    image = pygame.Surface((1, 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [Creature.create(random.uniform(0, WORLD_SIZE), random.uniform(0, WORLD_SIZE), image,
+                                (WORLD_SIZE, WORLD_SIZE), random.randint(1, 5)) for i in range(count)]
+
+
+def test_28(display: bool = False):
+    # With nothing around them, the engine should move, drain and kill creatures the same as Creature.tick
+    random.seed(28)
+    creatures = create_creatures(500)
+    engine = PopulationEngine.from_creatures(creatures, WORLD_SIZE)
+
+    print("Running Test 28")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(600):
+            for creature in creatures:
+                creature.tick(DELTATIME, [])
+            engine.tick(DELTATIME)
+
+    positions = np.array([creature.get_coordinates() for creature in creatures])
+    mismatches = [i for i, creature in enumerate(creatures)
+                  if not np.allclose(positions[i], engine.positions[i]) or
+                  not np.isclose(creature.energy, engine.energy[i]) or
+                  not np.isclose(creature.direction, engine.directions[i]) or creature.dead != engine.dead[i]]
+    print(f"Dead creatures: {int(engine.dead.sum())}   Mismatched creatures: {len(mismatches)}")
+    if display:
+        for i in mismatches:
+            print(creatures[i], engine.positions[i], engine.energy[i], creatures[i].energy)
+
+    # Saving and loading again should give back the same population
+    loaded = PopulationEngine.load(engine.save(), WORLD_SIZE)
+    same = all(np.array_equal(getattr(engine, column), getattr(loaded, column))
+               for column in ['ids', 'positions', 'directions', 'energy', 'dead', 'seeing', 'memory_reaction'])
+    same &= all(np.array_equal(engine.genes[name], loaded.genes[name]) for name in engine.genes)
+    print(f"Same after saving and loading: {same}")
+
+    # Creatures made from the save should have the same state as the engine
+    image = pygame.Surface((1, 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        back = PopulationEngine.from_creatures(engine.to_creatures(image), WORLD_SIZE)
+    same = all(np.array_equal(getattr(engine, column), getattr(back, column))
+               for column in ['positions', 'directions', 'energy', 'dead', 'seeing', 'memory_reaction'])
+    same &= all(np.array_equal(engine.genes[name], back.genes[name]) for name in engine.genes)
+    print(f"Same after turning back into creatures: {same}")
+
+    removed = engine.remove_dead()
+    print(f"Removed: {len(removed)}   Left: {len(engine)}")
+
+
+def test_29():
+    # Time for one tick with Creature objects and with the engine, for growing populations
+    random.seed(29)
+    creatures = create_creatures(10000)
+    base = PopulationEngine.from_creatures(creatures, WORLD_SIZE)
+
+    print("\n\n\nRunning Test 29")
+    for count in [1000, 10000, 100000, 1000000]:
+        # Bigger populations are copies of the same creatures
+        rows = np.arange(count) % len(creatures)
+        engine = PopulationEngine(WORLD_SIZE, np.arange(count), base.positions[rows], base.directions[rows],
+                                  base.energy[rows], base.dead[rows], base.seeing[rows], base.memory_reaction[rows],
+                                  {name: values[rows] for name, values in base.genes.items()}, base.gene_details)
+
+        start = monotonic()
+        for i in range(10):
+            engine.tick(DELTATIME)
+        engine_time = (monotonic() - start) / 10
+
+        objects = ""
+        if count <= len(creatures):
+            start = monotonic()
+            for creature in creatures[:count]:
+                creature.tick(DELTATIME, [])
+            objects = f"   Objects: {monotonic() - start:.5f}s"
+
+        print(f"{count:<8} Engine: {engine_time:.5f}s{objects}")
+
+
+def create_world(creatures: list[Creature], engine: str, food: int = 0) -> World:
+    with contextlib.redirect_stdout(io.StringIO()):
+        specimens = {creature.genes.species.value: creature.genes for creature in creatures}
+        foods = World.create(WORLD_SIZE, None, None, 1, start_species=1, start_creatures=0, start_food=food).food
+        world = World(None, None, WORLD_SIZE, creatures, list(foods), max(creature.radius for creature in creatures),
+                      1, 1 / 3600, 0, 0, 0, False, [], [], [], [], [], specimens, 6, engine=engine)
+    world.paused = False
+    return world
+
+
+def test_61():
+    # A world stepped with the engine should match the same world stepped one creature at a time.
+    # When nothing meets anything the two should be the same, deaths and border bounces included
+    random.seed(61)
+    with contextlib.redirect_stdout(io.StringIO()):
+        creatures = create_creatures(200)
+        for creature in creatures:
+            creature.genes.vision_radius.value = 0
+            creature.genes.radius.value = creature.radius = 0
+    saved = [(creature.get_coordinates(), creature.genes, creature.energy, creature.direction)
+             for creature in creatures]
+
+    def copies() -> list[Creature]:
+        image = pygame.Surface((1, 1))
+        return [Creature(x, y, image, (WORLD_SIZE, WORLD_SIZE), genes, energy, direction, [], False, 0, False)
+                for (x, y), genes, energy, direction in saved]
+
+    print("\n\n\nRunning Test 61")
+    worlds = [create_world(copies(), 'objects'), create_world(copies(), 'numpy')]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for world in worlds:
+            random.seed(61)
+            for step in range(1200):
+                world.step(DELTATIME)
+
+    states = [sorted((creature.genes.values.tobytes(), creature.x, creature.y, creature.energy, creature.direction)
+                     for creature in world.creatures) for world in worlds]
+    same = len(states[0]) == len(states[1]) and all(
+        one[0] == other[0] and np.allclose(one[1:], other[1:]) for one, other in zip(*states))
+    print(f"Creatures left: {len(worlds[0].creatures)} and {len(worlds[1].creatures)}   Same: {same}")
+
+    # With food to eat and other creatures to meet, every creature moves before any of them collide, so the
+    # worlds drift apart, but the population should still behave the same way
+    for engine in ['objects', 'numpy']:
+        random.seed(62)
+        world = create_world(create_creatures(400), engine, food=4000)
+        start = monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for step in range(1200):
+                world.step(DELTATIME)
+        step_time = (monotonic() - start) / 1200
+        energy = sum(creature.energy for creature in world.creatures) / max(len(world.creatures), 1)
+        print(f"{engine:<8} Creatures: {len(world.creatures):<4} Food: {len(world.food):<5} "
+              f"Average energy: {energy:.0f}   Step: {step_time:.5f}s")
+
+
+if __name__ == "__main__":
+    test_28(True)
+    test_29()
+    test_61()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import json
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import pygame
+
+from src.world import World
+from src.tree import KDTree
+
+# Run from the project root with: python -m tests.tree.incremental
+
+# cool_creatures was saved before genes stored their attribute names, so it can't be loaded
+PRESETS = ['debug', 'loneisland', 'vision_testing']
+TICKS = 200
+DELTATIME = 1 / 120
+
+
+def load_world(preset: str) -> World:
+    image = pygame.Surface((1, 1))
+    save_dict = json.load(open(f'presets/{preset}.json', 'r'))
+    world = World.load(save_dict, image, image)
+    world.tick_speed = 1
+    world.paused = False
+    return world
+
+
+def run_world(preset: str, rebuild: bool) -> float:
+    random.seed(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = load_world(preset)
+
+        start = monotonic()
+        for i in range(TICKS):
+            if rebuild:
+                # The old behaviour, building a brand-new tree before every tick
+                world.tree = KDTree(world.creatures + world.food)
+            world.tick_world(DELTATIME)
+        end = monotonic()
+
+    return end - start
+
+
+def test_12():
+    print("Running Test 12 (rebuild every tick vs incremental updates)")
+    for preset in PRESETS:
+        rebuild_time = run_world(preset, rebuild=True)
+        incremental_time = run_world(preset, rebuild=False)
+
+        print(f"{preset:<16} Rebuild: {rebuild_time:.3f}s   Incremental: {incremental_time:.3f}s   "
+              f"Speedup: x{rebuild_time / incremental_time:.2f}")
+
+
+def test_13(display_tree: bool = False):
+    # Checks that the incremental tree returns the same entities as a freshly built tree after many updates
+    random.seed(2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = load_world('debug')
+        for i in range(TICKS):
+            world.tick_world(DELTATIME)
+        fresh_tree = KDTree(world.creatures + world.food)
+
+    print("\n\n\nRunning Test 13")
+    print(f"Rebuilds during the run: {world.tree.rebuild_count}")
+    mismatches = 0
+    for creature in world.creatures:
+        coordinates = creature.get_coordinates()
+        boxsize = 2 * creature.genes.vision_radius.value + world.largest_radius
+        topleft = (coordinates[0] - boxsize, coordinates[1] + boxsize)
+        bottomright = (coordinates[0] + boxsize, coordinates[1] - boxsize)
+
+        incremental = {entity.id for entity in world.tree.range_search(coordinates, topleft, bottomright)}
+        fresh = {entity.id for entity in fresh_tree.range_search(coordinates, topleft, bottomright)}
+        if incremental != fresh:
+            mismatches += 1
+            if display_tree:
+                print(creature, incremental ^ fresh)
+
+    print(f"Mismatched searches: {mismatches}")
+
+
+if __name__ == "__main__":
+    test_12()
+    test_13(True)
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.grid import SpatialGrid
+from tests.tree.presorted_build import Point
+from tests.tree.range_search_many import build_tree
+
+# Run from the project root with: python -m tests.tree.occupancy
+
+
+def brute_force(entities: list[Point], point: tuple[float, float], spacing: float) -> bool:
+    if spacing <= 0:
+        return any(entity.get_coordinates() == point for entity in entities)
+    return any((entity.x - point[0])**2 + (entity.y - point[1])**2 < spacing**2 for entity in entities)
+
+
+def test_22(display: bool = False):
+    # find should match checking every entity, after entities are moved and deleted
+    random.seed(22)
+    tree, entities = build_tree(2000, 400)
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = SpatialGrid(list(entities), 400, 40)
+
+        for entity in random.sample(entities, 300):
+            entities.remove(entity)
+            tree.delete(entity)
+            grid.delete(entity)
+        for entity in random.sample(entities, 300):
+            entity.x, entity.y = random.uniform(0, 400), random.uniform(0, 400)
+            tree.move(entity)
+            grid.move(entity)
+
+    checks = [(random.choice(entities).get_coordinates(), random.choice([0, 0, 1.5, 6])) for i in range(300)]
+    checks += [((random.uniform(0, 400), random.uniform(0, 400)), random.choice([0, 1.5, 6])) for i in range(300)]
+
+    print("Running Test 22")
+    mismatches = [(point, spacing) for point, spacing in checks
+                  if not tree.find(point, spacing) == grid.find(point, spacing) == brute_force(entities, point, spacing)]
+    print(f"Mismatched checks: {len(mismatches)}")
+    if display:
+        for point, spacing in mismatches:
+            print(point, spacing, tree.find(point, spacing), grid.find(point, spacing))
+
+
+def test_23():
+    # Time for checking points in a world with 50000 entities
+    random.seed(23)
+    tree, entities = build_tree(50000, 2000)
+    points = [random.choice(entities).get_coordinates() for i in range(10000)]
+    points += [(random.uniform(0, 2000), random.uniform(0, 2000)) for i in range(10000)]
+
+    print("\n\n\nRunning Test 23")
+    start = monotonic()
+    found = sum(tree.find(point) for point in points)
+    exact_time = monotonic() - start
+
+    start = monotonic()
+    near = sum(tree.find(point, 5) for point in points)
+    spacing_time = monotonic() - start
+
+    print(f"Exact: {exact_time} ({found} found)   Spacing of 5: {spacing_time} ({near} found)")
+
+
+if __name__ == "__main__":
+    test_22(True)
+    test_23()
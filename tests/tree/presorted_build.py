@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.tree import KDTree
+from tests.tree.build import KDTree as SortingKDTree
+
+# Run from the project root with: python -m tests.tree.presorted_build
+
+
+class Point:
+    # Stands in for an entity, since the tree only needs the id and coordinates
+    def __init__(self, entity_id: int, x: float, y: float):
+        self.id = entity_id
+        self.x = x
+        self.y = y
+
+    def get_coordinates(self) -> tuple[float, float]:
+        return self.x, self.y
+
+
+def same_tree(tree: KDTree, node: int, sorting_node) -> bool:
+    if node == -1 or sorting_node is None:
+        return node == -1 and sorting_node is None
+
+    return ((tree.xs[node], tree.ys[node]) == sorting_node.data and tree.depths[node] == sorting_node.depth and
+            same_tree(tree, tree.left[node], sorting_node.left_child) and
+            same_tree(tree, tree.right[node], sorting_node.right_child))
+
+
+def build_both(test_points: list[tuple[float, float]]):
+    entities = [Point(i, point[0], point[1]) for i, point in enumerate(test_points)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = monotonic()
+        tree = KDTree(entities)
+        tree_time = monotonic() - start
+
+    start = monotonic()
+    sorting_tree = SortingKDTree(list(test_points))
+    sorting_time = monotonic() - start
+
+    return tree, tree_time, sorting_tree, sorting_time
+
+
+def test_16(display_tree: bool = False):
+    # Lots of points that share an x or y value, to check equal values get split the same way
+    random.seed(16)
+    print("Running Test 16")
+    for size in [1, 2, 34, 1000, 4000]:
+        test_points = [(random.randint(0, 100), random.randint(0, 100)) for i in range(size)]
+        tree, tree_time, sorting_tree, sorting_time = build_both(test_points)
+
+        print(f"{size} points   Same tree: {same_tree(tree, tree.root, sorting_tree.nodes[0])}   "
+              f"Every node placed: {sorted(tree.entity_nodes.values()) == list(range(size))}")
+        if display_tree:
+            print(f"Presorted: {tree_time}   Sorting every depth: {sorting_time}")
+
+
+def test_17():
+    # 50000 points, about as many entities as a large world has
+    random.seed(17)
+    print("\n\n\nRunning Test 17")
+    test_points = [(random.uniform(0, 1000), random.uniform(0, 1000)) for i in range(50000)]
+    tree, tree_time, sorting_tree, sorting_time = build_both(test_points)
+
+    print(f"Same tree: {same_tree(tree, tree.root, sorting_tree.nodes[0])}")
+    print(f"Presorted: {tree_time}   Sorting every depth: {sorting_time}")
+
+
+if __name__ == "__main__":
+    test_16(True)
+    test_17()
@@ -0,0 +1,134 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+import numpy as np
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.grid import SpatialGrid
+from src.world import World
+from tests.tree.presorted_build import Point
+from tests.tree.range_search_many import build_tree
+
+# Run from the project root with: python -m tests.tree.radius_search
+
+
+def brute_force(entities: list[Point], point: tuple[float, float], radius: float) -> list[int]:
+    distances = [((entity.x - point[0])**2 + (entity.y - point[1])**2, entity.id) for entity in entities
+                 if entity.get_coordinates() != point]
+    return [entity_id for distance, entity_id in sorted(distances) if distance <= radius**2]
+
+
+def ids(entities: list) -> list[int]:
+    return [entity.id for entity in entities]
+
+
+def test_24(display: bool = False):
+    # Radius and k-nearest searches should match checking every entity, on both the tree and the grid
+    random.seed(24)
+    tree, entities = build_tree(3000, 500)
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = SpatialGrid(list(entities), 500, 50)
+
+        for entity in random.sample(entities, 300):
+            entities.remove(entity)
+            tree.delete(entity)
+            grid.delete(entity)
+        for entity in random.sample(entities, 300):
+            entity.x, entity.y = random.uniform(0, 500), random.uniform(0, 500)
+            tree.move(entity)
+            grid.move(entity)
+
+    circles = [(random.choice(entities).get_coordinates(), random.uniform(2, 60)) for i in range(150)]
+    circles += [((random.uniform(-20, 520), random.uniform(-20, 520)), random.uniform(2, 60)) for i in range(150)]
+
+    print("Running Test 24")
+    for name, index in [("KD-Tree", tree), ("Grid", grid)]:
+        mismatches = []
+        for point, radius in circles:
+            expected = brute_force(entities, point, radius)
+            if ids(index.query_radius(point, radius, sort=True)) != expected or \
+                    ids(index.query_radius(point, radius, k=4)) != expected[:4] or \
+                    ids(index.query_knn(point, 6)) != brute_force(entities, point, np.inf)[:6] or \
+                    ids(index.query_knn(point, 6, radius)) != expected[:6]:
+                mismatches.append((point, radius))
+
+        indptr, found = index.query_radius_many(np.array([point for point, radius in circles]),
+                                                np.array([radius for point, radius in circles]), k=5)
+        many_mismatches = [i for i, (point, radius) in enumerate(circles)
+                           if found[indptr[i]:indptr[i + 1]].tolist() != brute_force(entities, point, radius)[:5]]
+
+        print(f"{name:<8} Mismatched searches: {len(mismatches)}   Mismatched batched searches: {len(many_mismatches)}")
+        if display:
+            for point, radius in mismatches:
+                print(point, radius)
+
+
+def test_25():
+    # Box searches against radius searches for 5000 creatures over a world with 20000 entities
+    random.seed(25)
+    tree, entities = build_tree(20000, 1000)
+    centres = np.array([random.choice(entities).get_coordinates() for i in range(5000)])
+    radii = np.array([random.uniform(5, 40) for i in range(5000)])
+
+    print("\n\n\nRunning Test 25")
+    start = monotonic()
+    box_indptr, box_ids = tree.range_search_many(centres, radii)
+    box_time = monotonic() - start
+
+    start = monotonic()
+    radius_indptr, radius_ids = tree.query_radius_many(centres, radii)
+    radius_time = monotonic() - start
+
+    start = monotonic()
+    tree.query_radius_many(centres, radii, k=8)
+    closest_time = monotonic() - start
+
+    print(f"Box: {box_time} ({len(box_ids)} found)   Radius: {radius_time} ({len(radius_ids)} found)   "
+          f"Closest 8: {closest_time}")
+
+
+def test_59():
+    # The largest radius should follow children that grow past it, so every creature's search still finds
+    # everything close enough to collide with it
+    random.seed(59)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', None, None)
+        # Some creatures are about to have children bigger than any creature the world started with
+        for creature in world.creatures[::4]:
+            creature.genes.radius.value = world.largest_radius * 1.5
+            creature.energy += 2 * creature.genes.birth_energy.value
+        world = World(None, None, world.size, world.creatures, world.food, world.largest_radius, 1,
+                      world.food_spawnrate, 0, 0, 0, False, [], [], [], [], [], world.specimens, world.species_id)
+    starting_radius = world.largest_radius
+
+    print("\n\n\nRunning Test 59")
+    missed = 0
+    behind = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for step in range(1200):
+            world.step(1 / 120)
+            behind += any(creature.radius > world.largest_radius for creature in world.creatures)
+            if step % 100 == 0:
+                entities = world.creatures + world.food
+                positions = np.array([entity.get_coordinates() for entity in entities])
+                radii = np.array([entity.radius for entity in entities])
+                range_searches = world.range_search_creatures(1 / 120)
+                for creature in world.creatures:
+                    distances = np.hypot(*(positions - creature.get_coordinates()).T)
+                    touching = {entities[index].id for index in (distances <= radii + creature.radius).nonzero()[0]}
+                    found = {entity.id for entity in range_searches[creature.id][0]}
+                    missed += len(touching - found - {creature.id})
+
+    print(f"Largest radius: {starting_radius:.3f} -> {world.largest_radius:.3f}   "
+          f"Steps with a larger creature: {behind}   Touching entities missed: {missed}")
+
+
+if __name__ == "__main__":
+    test_24(True)
+    test_25()
+    test_59()
@@ -0,0 +1,79 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+import numpy as np
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.tree import KDTree
+from tests.tree.presorted_build import Point
+
+# Run from the project root with: python -m tests.tree.range_search_many
+
+
+def build_tree(size: int, world_size: int) -> tuple[KDTree, list[Point]]:
+    entities = [Point(i, random.uniform(0, world_size), random.uniform(0, world_size)) for i in range(size)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree = KDTree(list(entities))
+
+    return tree, entities
+
+
+def run_both(tree: KDTree, centres: list[tuple[float, float]], half_sizes: list[float]):
+    start = monotonic()
+    single = []
+    for point, boxsize in zip(centres, half_sizes):
+        found = tree.range_search(point, (point[0] - boxsize, point[1] + boxsize), (point[0] + boxsize, point[1] - boxsize),
+                                  sort=True)
+        single.append([entity.id for entity in found])
+    single_time = monotonic() - start
+
+    start = monotonic()
+    indptr, ids = tree.range_search_many(np.array(centres), np.array(half_sizes), sort=True)
+    many_time = monotonic() - start
+
+    many = [ids[indptr[i]:indptr[i + 1]].tolist() for i in range(len(centres))]
+    return single, single_time, many, many_time
+
+
+def test_18(display: bool = False):
+    # The batched search should give the same entities, in the same order, as searching one box at a time
+    random.seed(18)
+    tree, entities = build_tree(4000, 600)
+
+    # Some searches are centred on entities, which should not find themselves
+    centres = [random.choice(entities).get_coordinates() for i in range(250)]
+    centres += [(random.uniform(0, 600), random.uniform(0, 600)) for i in range(250)]
+    half_sizes = [random.uniform(2, 60) for i in range(500)]
+
+    print("Running Test 18")
+    single, single_time, many, many_time = run_both(tree, centres, half_sizes)
+
+    mismatches = [i for i in range(len(centres)) if single[i] != many[i]]
+    print(f"Mismatched searches: {len(mismatches)}")
+    if display:
+        for i in mismatches:
+            print(centres[i], half_sizes[i], single[i], many[i])
+
+
+def test_19():
+    # 5000 creature-sized searches over a world with 20000 entities
+    random.seed(19)
+    tree, entities = build_tree(20000, 1000)
+    centres = [random.choice(entities).get_coordinates() for i in range(5000)]
+    half_sizes = [random.uniform(5, 40) for i in range(5000)]
+
+    print("\n\n\nRunning Test 19")
+    single, single_time, many, many_time = run_both(tree, centres, half_sizes)
+
+    print(f"One at a time: {single_time}   Batched: {many_time}")
+    print(f"Entities found: {sum(len(found) for found in many)}")
+
+
+if __name__ == "__main__":
+    test_18(True)
+    test_19()
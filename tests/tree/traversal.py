@@ -0,0 +1,76 @@
+import os
+import random
+import threading
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from tests.tree.range_search_many import build_tree
+
+# Run from the project root with: python -m tests.tree.traversal
+
+
+def search_boxes(tree, boxes: list[tuple[tuple[float, float], float]], **kwargs) -> list[list[int]]:
+    results = []
+    for point, boxsize in boxes:
+        found = tree.range_search(point, (point[0] - boxsize, point[1] + boxsize),
+                                  (point[0] + boxsize, point[1] - boxsize), **kwargs)
+        results.append([entity.id for entity in found])
+
+    return results
+
+
+def test_20(display: bool = False):
+    # Asking for the k closest entities should give the start of the fully sorted list
+    random.seed(20)
+    tree, entities = build_tree(4000, 600)
+    boxes = [(random.choice(entities).get_coordinates(), random.uniform(5, 60)) for i in range(300)]
+
+    print("Running Test 20")
+    start = monotonic()
+    unsorted = search_boxes(tree, boxes)
+    unsorted_time = monotonic() - start
+
+    start = monotonic()
+    closest = search_boxes(tree, boxes, k=5)
+    closest_time = monotonic() - start
+
+    start = monotonic()
+    every = search_boxes(tree, boxes, sort=True)
+    sorted_time = monotonic() - start
+
+    mismatches = [i for i in range(len(boxes)) if closest[i] != every[i][:5] or set(unsorted[i]) != set(every[i])]
+    print(f"Unsorted: {unsorted_time}   Closest 5: {closest_time}   Sorted: {sorted_time}")
+    print(f"Mismatched searches: {len(mismatches)}")
+    if display:
+        for i in mismatches:
+            print(boxes[i], closest[i], every[i][:5])
+
+
+def test_21():
+    # Searches on the same tree from several threads should give the same results as searching on one thread
+    random.seed(21)
+    tree, entities = build_tree(4000, 600)
+    boxes = [(random.choice(entities).get_coordinates(), random.uniform(5, 60)) for i in range(2000)]
+    expected = search_boxes(tree, boxes, sort=True)
+
+    print("\n\n\nRunning Test 21")
+    results = {}
+
+    def worker(thread_number: int):
+        results[thread_number] = search_boxes(tree, boxes, sort=True)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"Threads matching: {sum(result == expected for result in results.values())} / {len(threads)}")
+    print(f"Stacks made: {len(tree.stack_pool)}")
+
+
+if __name__ == "__main__":
+    test_20(True)
+    test_21()
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import tracemalloc
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.entity import Creature, Food
+
+# Run from the project root with: python -m tests.world.memory
+# Add --million to also measure 1000000 of each, which needs about 5GB of memory
+
+
+def bytes_per_entity(create, count: int) -> float:
+    """
+    Makes count entities and gives the memory they use, divided by count
+    :param create: Makes one entity
+    :param count:
+    :return:
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    entities = [create() for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del entities
+    return used / count
+
+
+def test_51(populations: tuple[int, ...] = (10000, 100000)):
+    # Memory used by each creature (with its genes) and each food, at different population sizes.
+    # 1000000 can be added to the populations, but that run needs about 5GB: the creatures take about 2GB,
+    # and the tracemalloc traces more than that again
+    random.seed(51)
+
+    def create_creature() -> Creature:
+        return Creature.create(random.uniform(0, 1000), random.uniform(0, 1000), None, (1000, 1000), 1)
+
+    def create_food() -> Food:
+        return Food.create(random.uniform(0, 1000), random.uniform(0, 1000), None, (1000, 1000), 5000, 50000)
+
+    print("Running Test 51")
+    for count in populations:
+        with contextlib.redirect_stdout(io.StringIO()):
+            creature_bytes = bytes_per_entity(create_creature, count)
+            food_bytes = bytes_per_entity(create_food, count)
+        print(f"{count:<8} Creature: {creature_bytes:.0f} bytes   Food: {food_bytes:.0f} bytes")
+
+    creature = create_creature()
+    print(f"Has a __dict__: Creature {hasattr(creature, '__dict__')}   Food {hasattr(create_food(), '__dict__')}   "
+          f"Genes {hasattr(creature.genes, '__dict__')}   Gene {hasattr(creature.genes.speed, '__dict__')}")
+
+
+if __name__ == "__main__":
+    if '--million' in sys.argv[1:]:
+        test_51((10000, 100000, 1000000))
+    else:
+        test_51()
@@ -0,0 +1,80 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.genes import CreatureGenes
+from src.species import SpeciesIndex
+
+# Run from the project root with: python -m tests.world.species
+
+
+def scan_specimens(specimens: dict[int, CreatureGenes], genes: CreatureGenes) -> int | None:
+    # The old way of finding a species, one specimen and one gene at a time
+    for specimen_id, specimen in specimens.items():
+        different_count = 0
+        for gene_name, gene in genes.items():
+            if gene_name not in ['species', 'generation']:
+                specimen_gene = getattr(specimen, gene_name)
+                if abs(specimen_gene.value - gene.value) >= specimen_gene.value / 2:
+                    different_count += 1
+
+        if different_count <= 6:
+            return specimen_id
+
+
+def make_genes(count: int) -> list[CreatureGenes]:
+    # Children of a few parents, so that some of them belong to the same species and some don't
+    with contextlib.redirect_stdout(io.StringIO()):
+        parents = [CreatureGenes.create(species=1, generation=1) for i in range(20)]
+        return [random.choice(parents).child(random.choice(parents), factor=random.choice([1, 20, 200]))
+                for i in range(count)]
+
+
+def test_52():
+    # The index should give the same species as going through the specimens, one child at a time or many at once
+    random.seed(52)
+    specimens = {specimen_id: genes for specimen_id, genes in enumerate(make_genes(60), start=1)}
+    index = SpeciesIndex(specimens)
+    children = make_genes(2000)
+
+    print("Running Test 52")
+    expected = [scan_specimens(specimens, genes) for genes in children]
+    single = [index.classify(genes) for genes in children]
+    batch = index.classify_many(children)
+    print(f"Specimens: {len(index)}   New species: {expected.count(None)}   "
+          f"Mismatched one at a time: {sum(a != b for a, b in zip(expected, single))}   "
+          f"Mismatched in a batch: {sum(a != b for a, b in zip(expected, batch))}")
+
+
+def test_53():
+    # Finding the species of 1000 children with 1000 species, going through the specimens against the index
+    random.seed(53)
+    specimens = {specimen_id: genes for specimen_id, genes in enumerate(make_genes(1000), start=1)}
+    index = SpeciesIndex(specimens)
+    children = make_genes(1000)
+
+    print("\n\n\nRunning Test 53")
+    start = monotonic()
+    expected = [scan_specimens(specimens, genes) for genes in children]
+    scan_time = monotonic() - start
+
+    start = monotonic()
+    single = [index.classify(genes) for genes in children]
+    single_time = monotonic() - start
+
+    start = monotonic()
+    batch = index.classify_many(children)
+    batch_time = monotonic() - start
+
+    print(f"Going through specimens: {scan_time:.4f}s   Index: {single_time:.4f}s   Index batch: {batch_time:.4f}s   "
+          f"Same: {expected == single == batch}")
+
+
+if __name__ == "__main__":
+    test_52()
+    test_53()
@@ -0,0 +1,150 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+import numpy as np
+import pygame
+
+from src.characteristics import generate_characteristics
+from src.entity import Creature
+from src.statistics import QuantileSketch, PopulationStatistics
+from src.ui import CreatureCharacteristicsDisplay, LargeContentDisplay, TextDisplay
+from src.world import World, Camera
+
+# Run from the project root with: python -m tests.world.statistics
+
+
+def test_54():
+    # Quantiles from the sketch should be within 1% of the real ones after values are added and removed,
+    # and a world's statistics should follow its creatures as they are born and die
+    random.seed(54)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    values = [random.choice([-1, 1]) * random.lognormvariate(0, 2) for i in range(20000)]
+    sketch.add(np.array(values))
+    removed = random.sample(values, 8000)
+    sketch.remove(np.array(removed))
+    for value in removed:
+        values.remove(value)
+
+    print("Running Test 54")
+    values.sort()
+    worst_error = 0
+    for fraction in [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]:
+        expected = values[min(int(fraction * len(values)), len(values) - 1)]
+        worst_error = max(worst_error, abs(sketch.quantile(fraction) - expected) / abs(expected))
+    rank_error = abs(sketch.rank(values[len(values) // 3]) - 1 / 3)
+    print(f"Values: {sketch.count}   Worst quantile error: {worst_error:.4f}   Rank error: {rank_error:.4f}   "
+          f"Mean error: {abs(sketch.mean() - sum(values) / len(values)):.6f}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', None, None)
+        for step in range(300):
+            world.step(1 / 120)
+
+    speeds = sorted(creature.genes.speed.value for creature in world.creatures)
+    summary = world.statistics.summary()
+    print(f"Creatures: {len(world.creatures)}   Counted: {summary['speed']['count']}   "
+          f"Mean speed: {np.mean(speeds):.3f} and {summary['speed']['mean']:.3f}   "
+          f"Median speed: {speeds[len(speeds) // 2]:.3f} and {summary['speed']['median']:.3f}   "
+          f"Same summary until a change: {world.statistics.summary() is summary}")
+
+
+def test_55():
+    # Describing a creature in a population of 100000, sorting every speed against the statistics,
+    # and making the stats panel every frame
+    random.seed(55)
+    pygame.init()
+    pygame.display.set_mode((100, 100))
+    with contextlib.redirect_stdout(io.StringIO()):
+        creatures = [Creature.create(random.uniform(0, 1000), random.uniform(0, 1000), None, (1000, 1000), 1)
+                     for i in range(100000)]
+
+    print("\n\n\nRunning Test 55")
+    start = monotonic()
+    statistics = PopulationStatistics(creatures)
+    build_time = monotonic() - start
+
+    start = monotonic()
+    for creature in creatures[:20]:
+        speeds = sorted(other.genes.speed.value for other in creatures)
+        q1, q3 = speeds[len(speeds) // 4], speeds[3 * len(speeds) // 4]
+    sort_time = (monotonic() - start) / 20
+
+    start = monotonic()
+    for creature in creatures[:1000]:
+        generate_characteristics(creature, statistics.summary())
+    summary_time = (monotonic() - start) / 1000
+
+    start = monotonic()
+    for frame in range(20):
+        # Without the font and image caches, the panel loads them from disk again every frame
+        TextDisplay.fonts.clear()
+        LargeContentDisplay.images.clear()
+        CreatureCharacteristicsDisplay(creatures[0], statistics.summary())
+    loading_time = (monotonic() - start) / 20
+
+    start = monotonic()
+    for frame in range(100):
+        CreatureCharacteristicsDisplay(creatures[0], statistics.summary())
+    display_time = (monotonic() - start) / 100
+
+    print(f"Building the statistics: {build_time:.4f}s   Sorting speeds: {sort_time:.5f}s per creature   "
+          f"Summary: {summary_time:.6f}s per creature")
+    print(f"Stats panel loading from disk: {loading_time:.5f}s per frame   Cached: {display_time:.5f}s per frame")
+
+
+def test_58():
+    # Showing the stats panel for one creature while the world keeps stepping, the way the game does every frame,
+    # against making a new panel every frame. The panel should only be made again when the population changes
+    random.seed(58)
+    pygame.init()
+    camera = Camera(pygame.display.set_mode((1200, 800)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', None, None)
+
+    print("\n\n\nRunning Test 58")
+    frames = 300
+    panel_time = 0
+    new_panel_time = 0
+    panels = 0
+    wrong_lines = 0
+    changes = 0
+    display = None
+    summary = world.statistics.summary()
+    creature = max(world.creatures, key=lambda creature: creature.energy)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in range(frames):
+            world.step(1 / 120)
+            if creature.dead:
+                creature = max(world.creatures, key=lambda creature: creature.energy)
+
+            changes += world.statistics.summary() is not summary
+            summary = world.statistics.summary()
+
+            start = monotonic()
+            previous, display = display, camera.characteristics_display(creature, summary)
+            panel_time += monotonic() - start
+
+            start = monotonic()
+            CreatureCharacteristicsDisplay(creature, world.statistics.summary())
+            new_panel_time += monotonic() - start
+
+            panels += display is not previous
+            wrong_lines += display.live_text != CreatureCharacteristicsDisplay.live_content(creature)
+
+    print(f"Creatures: {len(world.creatures)}   Panels made: {panels} in {frames} frames   "
+          f"Population changes: {changes}   Out of date lines: {wrong_lines}")
+    print(f"Stats panel: {panel_time / frames:.5f}s per frame   New panel: {new_panel_time / frames:.5f}s per frame")
+
+
+if __name__ == "__main__":
+    test_54()
+    test_55()
+    test_58()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import os
+import random
+from time import monotonic
+
+if not os.path.exists('logs/'):
+    os.mkdir('logs/')
+
+from src.entity import Creature
+from src.store import EntityStore
+from src.world import World
+from tests.tree.presorted_build import Point
+
+# Run from the project root with: python -m tests.world.store
+
+
+def test_47():
+    # The store should hold the same entities as a list after random removals and additions,
+    # and a world should never keep dead creatures or eaten food after a step
+    random.seed(47)
+    points = [Point(i, random.uniform(0, 100), random.uniform(0, 100)) for i in range(2000)]
+    store = EntityStore(points)
+    expected = list(points)
+
+    print("Running Test 47")
+    for i in range(3000):
+        if random.random() < 0.6 and len(expected) != 0:
+            point = random.choice(expected)
+            expected.remove(point)
+            store.remove(point)
+        else:
+            point = Point(2000 + i, random.uniform(0, 100), random.uniform(0, 100))
+            expected.append(point)
+            store.append(point)
+
+    indexes_match = all(store[index].id == entity_id for entity_id, index in store.indexes.items())
+    print(f"Same entities: {sorted(point.id for point in store) == sorted(point.id for point in expected)}   "
+          f"Indexes match: {indexes_match}   Lookups match: {all(store.get(point.id) is point for point in expected)}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = World.from_preset('random', None, None)
+        leftovers = 0
+        for step in range(300):
+            world.step(1 / 120)
+            leftovers += sum(creature.dead for creature in world.creatures) + sum(food.eaten for food in world.food)
+        in_tree = sorted(entity.id for entity in world.tree.entities.values())
+
+    in_world = sorted(entity.id for entity in world.creatures + world.food)
+    print(f"Dead or eaten entities left after a step: {leftovers}   Same entities as the tree: {in_tree == in_world}")
+
+
+def test_48():
+    # Removing half of 20000 creatures one at a time, from a list and from the store
+    random.seed(48)
+    with contextlib.redirect_stdout(io.StringIO()):
+        creatures = [Creature.create(random.uniform(0, 1000), random.uniform(0, 1000), None, (1000, 1000), 1)
+                     for i in range(20000)]
+    dying = random.sample(creatures, 10000)
+
+    print("\n\n\nRunning Test 48")
+    creature_list = list(creatures)
+    start = monotonic()
+    for creature in dying:
+        creature_list.remove(creature)
+    list_time = monotonic() - start
+
+    store = EntityStore(creatures)
+    start = monotonic()
+    store.remove_many(dying)
+    store_time = monotonic() - start
+
+    print(f"List: {list_time:.4f}s   Store: {store_time:.4f}s   Left: {len(creature_list)} and {len(store)}")
+
+
+if __name__ == "__main__":
+    test_47()
+    test_48()